@@ -88,6 +88,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'fucec_missions.wsgi.application'
 
+# Serveur ASGI (uvicorn, daphne...) requis pour les flux temps réel des notifications
+ASGI_APPLICATION = 'fucec_missions.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -96,6 +99,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Base de test sur fichier : la base en mémoire partagée verrouille les
+        # tables entre connexions au lieu d'attendre (tests multi-threads)
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -136,6 +142,15 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Fichiers téléversés (justificatifs) et générés (ordres de mission)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Justificatifs : reçus en flux (missions.uploads), refusés dès la réception
+# au-delà de JUSTIFICATIF_TAILLE_MAX octets ou hors des types acceptés
+JUSTIFICATIF_TAILLE_MAX = config('JUSTIFICATIF_TAILLE_MAX', default=20 * 1024 * 1024, cast=int)
+JUSTIFICATIF_TYPES_MIME = ['application/pdf', 'image/jpeg', 'image/png']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -154,7 +169,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Par numéro de page, ou par curseur (?curseur=) sur les vues qui le permettent
+    'DEFAULT_PAGINATION_CLASS': 'missions.pagination.PaginationOptionnelle',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -163,6 +179,61 @@ REST_FRAMEWORK = {
     ),
 }
 
+# COUNT des listes paginées : mis en cache par (périmètre, filtres) pendant
+# PAGINATION_COMPTE_TTL secondes et invalidé à chaque écriture du modèle ;
+# sur PostgreSQL, une liste sans filtre de plus de PAGINATION_ESTIMATION_SEUIL
+# lignes utilise l'estimation du planificateur (pg_class.reltuples)
+PAGINATION_COMPTE_TTL = config('PAGINATION_COMPTE_TTL', default=30, cast=int)
+PAGINATION_ESTIMATION_SEUIL = config('PAGINATION_ESTIMATION_SEUIL', default=100000, cast=int)
+
+# ============================================
+# CACHE
+# Cache local au processus par défaut ; avec plusieurs workers, définir
+# CACHE_URL (ex. redis://127.0.0.1:6379/1) pour partager comptes et invalidations
+# ============================================
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Flux SSE des notifications : durée de validité (secondes) du jeton passé
+# en ?jeton= par EventSource, qui ne peut pas envoyer d'en-tête Authorization
+NOTIFICATIONS_FLUX_JETON_TTL = config('NOTIFICATIONS_FLUX_JETON_TTL', default=60, cast=int)
+
+# Données de référence (titulaires de rôle, responsables d'entité, barèmes,
+# véhicules) : cache dédié, local au processus par défaut.
+# REFERENCES_CACHE_URL accepte redis://... ou file:///chemin/du/dossier
+REFERENCES_CACHE_URL = config('REFERENCES_CACHE_URL', default='')
+REFERENCES_CACHE_TTL = config('REFERENCES_CACHE_TTL', default=3600, cast=int)
+if REFERENCES_CACHE_URL.startswith('file://'):
+    CACHES['references'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': REFERENCES_CACHE_URL[len('file://'):],
+        'TIMEOUT': REFERENCES_CACHE_TTL,
+    }
+elif REFERENCES_CACHE_URL:
+    CACHES['references'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REFERENCES_CACHE_URL,
+        'TIMEOUT': REFERENCES_CACHE_TTL,
+    }
+else:
+    CACHES['references'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'references',
+        'TIMEOUT': REFERENCES_CACHE_TTL,
+    }
+
 # ============================================
 # JWT CONFIGURATION
 # ============================================
@@ -228,4 +299,34 @@ CSRF_TRUSTED_ORIGINS = [
 # Configuration CSRF pour développement avec Angular
 CSRF_COOKIE_HTTPONLY = False  # Permet l'accès JavaScript au cookie CSRF
 CSRF_COOKIE_SAMESITE = 'Lax'
-SESSION_COOKIE_SAMESITE = 'Lax'
\ No newline at end of file
+SESSION_COOKIE_SAMESITE = 'Lax'
+# ============================================
+# EMAIL CONFIGURATION
+# Les e-mails sont écrits dans la file EmailSortant puis envoyés par la
+# commande process_email_outbox. En local, EMAIL_BACKEND peut pointer vers
+# django.core.mail.backends.console.EmailBackend ou filebased.EmailBackend
+# ============================================
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'emails'))
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
+
+# Nouvelles tentatives d'envoi : délai doublé à chaque échec
+EMAIL_OUTBOX_MAX_TENTATIVES = config('EMAIL_OUTBOX_MAX_TENTATIVES', default=5, cast=int)
+EMAIL_OUTBOX_DELAI_SECONDES = config('EMAIL_OUTBOX_DELAI_SECONDES', default=60, cast=int)
+
+# Fenêtre (secondes) pendant laquelle les notifications regroupables d'un
+# même destinataire sont cumulées en un seul récapitulatif (0 : désactivé)
+EMAIL_RECAPITULATIF_FENETRE_SECONDES = config('EMAIL_RECAPITULATIF_FENETRE_SECONDES', default=300, cast=int)
+
+# ============================================
+# PDF
+# Export groupé des ordres de mission : processus de rendu (0 : un par
+# cœur) et nombre maximal de missions par export
+# ============================================
+EXPORT_PDF_PROCESSUS = config('EXPORT_PDF_PROCESSUS', default=0, cast=int)
+EXPORT_PDF_MAX_MISSIONS = config('EXPORT_PDF_MAX_MISSIONS', default=2000, cast=int)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class MissionsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'missions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .emails import registre
+        registre.precharger()
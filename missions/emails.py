@@ -0,0 +1,103 @@
+"""
+Registre des gabarits d'e-mails
+
+Chaque e-mail est décrit une fois (sujet, catégorie de regroupement) et
+rendu à partir des gabarits `missions/emails/<nom>.html` et `<nom>.txt`.
+Les gabarits sont compilés au premier usage (ou au démarrage via
+`precharger`) puis conservés : les relances et récapitulatifs rendent des
+milliers d'e-mails par lot sans relire ni recompiler un fichier.
+"""
+import threading
+
+from django.template import Context, engines
+
+
+# nom: (sujet, catégorie de regroupement dans la file d'envoi)
+EMAILS = {
+    'validation': ("Validation requise - Mission {{ mission.reference }}", 'validation'),
+    'mission_validee': ("Mission validée - {{ mission.reference }}", ''),
+    'mission_rejetee': ("Mission rejetée - {{ mission.reference }}", ''),
+    'signature': ("Signature requise - Mission {{ mission.reference }}", 'signature'),
+    'deblocage_autorise': ("Déblocage autorisé - Mission {{ mission.reference }}", ''),
+    'avance_versee': ("Avance versée - Mission {{ mission.reference }}", ''),
+    'retour_declare': ("Retour de mission déclaré - {{ mission.reference }}", ''),
+    'justificatifs_deposes': ("Justificatifs déposés - {{ mission.reference }}", ''),
+    'justificatifs_rejetes': ("Justificatifs rejetés - {{ mission.reference }}", ''),
+    'remboursement_fucec': ("Remboursement FUCEC - {{ mission.reference }}", ''),
+    'remboursement_agent': ("Remboursement agent - {{ mission.reference }}", ''),
+    'mission_equilibree': ("Mission équilibrée - {{ mission.reference }}", ''),
+    'relance_signature': ("RAPPEL: Signature requise - Mission {{ mission.reference }}", 'relance_signature'),
+    'relance_validation': ("RAPPEL: Validation requise - Mission {{ mission.reference }}", 'relance_validation'),
+    'relance_justificatifs': ("RAPPEL: Dépôt des justificatifs - Mission {{ mission.reference }}", ''),
+    'escalade_justificatifs': ("ESCALADE: Justificatifs en retard - Mission {{ mission.reference }}", ''),
+    'annonce': ("{{ titre }}", ''),
+    'recapitulatif': ("{{ sujet }}", ''),
+}
+
+
+class GabaritEmail:
+    """Sujet, texte et HTML compilés d'un e-mail."""
+
+    def __init__(self, nom, sujet, categorie, moteur):
+        self.nom = nom
+        self.categorie = categorie
+        self.sujet = moteur.from_string('{% autoescape off %}' + sujet + '{% endautoescape %}')
+        self.texte = moteur.get_template(f'missions/emails/{nom}.txt')
+        self.html = moteur.get_template(f'missions/emails/{nom}.html')
+
+    def rendre(self, contexte):
+        """Retourne (sujet, texte, html) pour un contexte."""
+        return self.rendre_lot([contexte])[0]
+
+    def rendre_lot(self, contextes):
+        """
+        Rend une liste de contextes avec un seul objet Context, empilé puis
+        dépilé pour chaque e-mail.
+        """
+        resultats = []
+        contexte_rendu = Context(autoescape=True)
+        for contexte in contextes:
+            with contexte_rendu.push(contexte):
+                resultats.append((
+                    ' '.join(self.sujet.template.render(contexte_rendu).split())[:255],
+                    self.texte.template.render(contexte_rendu),
+                    self.html.template.render(contexte_rendu),
+                ))
+        return resultats
+
+
+class RegistreEmails:
+    """Cache des gabarits compilés, partagé par les services et le worker d'envoi."""
+
+    def __init__(self, emails=None):
+        self.emails = emails or EMAILS
+        self._gabarits = {}
+        self._verrou = threading.Lock()
+
+    def gabarit(self, nom):
+        gabarit = self._gabarits.get(nom)
+        if gabarit is None:
+            with self._verrou:
+                gabarit = self._gabarits.get(nom)
+                if gabarit is None:
+                    sujet, categorie = self.emails[nom]
+                    gabarit = GabaritEmail(nom, sujet, categorie, engines['django'])
+                    self._gabarits[nom] = gabarit
+        return gabarit
+
+    def precharger(self):
+        """Compile tous les gabarits (une erreur de gabarit apparaît dès le démarrage)."""
+        for nom in self.emails:
+            self.gabarit(nom)
+
+    def rendre(self, nom, contexte):
+        return self.gabarit(nom).rendre(contexte)
+
+    def rendre_lot(self, nom, contextes):
+        return self.gabarit(nom).rendre_lot(contextes)
+
+    def vider(self):
+        self._gabarits.clear()
+
+
+registre = RegistreEmails()
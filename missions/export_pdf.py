@@ -0,0 +1,152 @@
+"""
+Export groupé des ordres de mission (mois, entité)
+
+Les données de toutes les missions sont lues en quelques requêtes
+(select_related / prefetch_related), puis :
+
+- en ZIP, chaque ordre de mission est repris du fichier généré par le
+  worker s'il est à jour, sinon rendu sur un pool de processus ; l'archive
+  est produite au fil des rendus et envoyée par morceaux, sans être
+  construite en mémoire ;
+- en PDF unique, les ordres sont rendus dans un seul document reportlab
+  (un par page), écrit dans un fichier temporaire puis envoyé par morceaux.
+"""
+import collections
+import itertools
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from users.models import User
+from .models import DocumentPDF, Mission, MissionStatus
+from .pdf import donnees_ordre_mission, empreinte_donnees, rendre_ordre_mission, rendre_ordres_mission
+from .travaux_pdf import fichier_a_jour
+
+# Taille des morceaux envoyés au client
+TAILLE_MORCEAU = 64 * 1024
+
+# Missions disposant d'un ordre de mission (validées ou au-delà)
+STATUTS_ORDRE_MISSION = (
+    MissionStatus.VALIDEE, MissionStatus.EN_COURS, MissionStatus.RETOUR, MissionStatus.CLOTUREE,
+)
+
+
+def missions_a_exporter(queryset=None, mois=None, entite=None):
+    """
+    Missions validées (ou au-delà) commençant dans `mois` (date) et/ou
+    rattachées au sous-arbre de `entite`, avec tout ce que lit l'ordre de mission.
+    """
+    queryset = Mission.objects.all() if queryset is None else queryset
+    queryset = queryset.filter(statut__in=STATUTS_ORDRE_MISSION)
+    if mois is not None:
+        queryset = queryset.filter(date_debut__year=mois.year, date_debut__month=mois.month)
+    if entite is not None:
+        queryset = queryset.filter(entite__in_subtree=entite)
+    return (
+        queryset.select_related('createur', 'entite', 'vehicule')
+        .prefetch_related(Prefetch('participants', queryset=User.objects.only('first_name', 'last_name')))
+        .order_by('date_debut', 'reference')
+    )
+
+
+class _Flux:
+    """Fichier en écriture seule dont le contenu est récupéré par morceaux (ZIP en flux)."""
+
+    def __init__(self):
+        self.morceaux = []
+
+    def write(self, donnees):
+        self.morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        contenu = b''.join(self.morceaux)
+        self.morceaux = []
+        return contenu
+
+
+class ExportOrdresMission:
+    """Export d'un ensemble de missions en ZIP (un PDF par mission) ou en PDF unique."""
+
+    FENETRE = 4
+
+    def __init__(self, missions, processus=None):
+        self.missions = list(missions)
+        self.processus = processus or settings.EXPORT_PDF_PROCESSUS or None
+
+    def _donnees(self):
+        return [donnees_ordre_mission(mission, mission.vehicule) for mission in self.missions]
+
+    def fichiers(self):
+        """(nom, contenu) de chaque ordre de mission, dans l'ordre des missions."""
+        donnees = self._donnees()
+        documents = {
+            document.mission_id: document
+            for document in DocumentPDF.objects.filter(
+                mission__in=self.missions, type='ORDRE_MISSION', statut='PRET'
+            )
+        }
+
+        a_rendre = collections.deque(
+            d for mission, d in zip(self.missions, donnees)
+            if mission.pk not in documents or not fichier_a_jour(documents[mission.pk], empreinte_donnees(d))
+        )
+        rendus = self._rendus(list(a_rendre))
+        for mission, d in zip(self.missions, donnees):
+            document = documents.get(mission.pk)
+            if a_rendre and d is a_rendre[0]:
+                a_rendre.popleft()
+                contenu = next(rendus)
+            else:
+                with document.fichier.open('rb') as fichier:
+                    contenu = fichier.read()
+            yield f"ordre_mission_{mission.reference}.pdf", contenu
+
+    def _rendus(self, liste_donnees):
+        """
+        Rendus sur le pool de processus, restitués dans l'ordre. Au plus
+        FENETRE rendus par processus sont en cours ou en attente de lecture :
+        un client lent ne fait pas s'accumuler les PDF en mémoire.
+        """
+        if not liste_donnees:
+            return
+        restantes = iter(liste_donnees)
+        processus = self.processus or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processus) as executor:
+            fenetre = collections.deque(
+                executor.submit(rendre_ordre_mission, d)
+                for d in itertools.islice(restantes, processus * self.FENETRE)
+            )
+            while fenetre:
+                contenu = fenetre.popleft().result()
+                suivante = next(restantes, None)
+                if suivante is not None:
+                    fenetre.append(executor.submit(rendre_ordre_mission, suivante))
+                yield contenu
+
+    def flux_zip(self):
+        """Archive ZIP produite et restituée par morceaux."""
+        flux = _Flux()
+        with zipfile.ZipFile(flux, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for nom, contenu in self.fichiers():
+                archive.writestr(nom, contenu)
+                morceau = flux.vider()
+                if morceau:
+                    yield morceau
+        # Répertoire central, écrit à la fermeture de l'archive
+        yield flux.vider()
+
+    def flux_pdf(self):
+        """PDF unique, rendu dans un fichier temporaire puis restitué par morceaux."""
+        with tempfile.TemporaryFile() as sortie:
+            rendre_ordres_mission(self._donnees(), sortie)
+            sortie.seek(0)
+            while morceau := sortie.read(TAILLE_MORCEAU):
+                yield morceau
@@ -0,0 +1,74 @@
+"""
+Lecture incrémentale des fichiers d'import (CSV, XLSX)
+
+Chaque lecteur produit des couples (numéro de ligne, dict) sans charger le
+fichier en mémoire ; les cellules vides sont omises pour que les valeurs par
+défaut du modèle s'appliquent.
+"""
+import csv
+import datetime
+import io
+import os
+
+
+def lire_fichier(fichier, nom):
+    """Choisit le lecteur selon l'extension de `nom`."""
+    extension = os.path.splitext(nom)[1].lower()
+    if extension == '.csv':
+        return lire_csv(fichier)
+    if extension == '.xlsx':
+        return lire_xlsx(fichier)
+    raise ValueError(f'Format de fichier non supporté: {extension or nom} (CSV ou XLSX attendu)')
+
+
+def lire_csv(fichier):
+    """Lit un CSV binaire (UTF-8, séparateur `,` `;` ou tabulation)."""
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    try:
+        dialecte = csv.Sniffer().sniff(texte.readline(), delimiters=',;\t')
+    except csv.Error:
+        dialecte = csv.excel
+    texte.seek(0)
+
+    lecteur = csv.DictReader(texte, dialect=dialecte)
+    lecteur.fieldnames = [_normaliser_entete(nom) for nom in lecteur.fieldnames or []]
+    for ligne in lecteur:
+        yield lecteur.line_num, _normaliser(ligne)
+    texte.detach()
+
+
+def lire_xlsx(fichier):
+    """Lit la première feuille d'un classeur XLSX en mode lecture seule."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Le format XLSX nécessite le paquet openpyxl')
+
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entetes = [_normaliser_entete(str(nom or '')) for nom in next(lignes, ())]
+        for numero, valeurs in enumerate(lignes, start=2):
+            if any(valeur not in (None, '') for valeur in valeurs):
+                yield numero, _normaliser(dict(zip(entetes, valeurs)))
+    finally:
+        classeur.close()
+
+
+def _normaliser_entete(nom):
+    return nom.strip().lower().replace(' ', '_')
+
+
+def _normaliser(ligne):
+    """Retire les cellules vides et convertit les dates-heures du tableur."""
+    resultat = {}
+    for cle, valeur in ligne.items():
+        if not cle:
+            continue
+        if isinstance(valeur, str):
+            valeur = valeur.strip()
+        elif isinstance(valeur, datetime.datetime):
+            valeur = valeur.date()
+        if valeur not in (None, ''):
+            resultat[cle] = valeur
+    return resultat
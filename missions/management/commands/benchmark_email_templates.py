@@ -0,0 +1,96 @@
+"""
+Commande Django mesurant le rendu des e-mails de relance : gabarits du
+registre rendus en lot, un par un, et recompilés à chaque e-mail
+"""
+import datetime
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import get_template
+from django.utils import timezone
+
+from missions.emails import registre
+from missions.models import Mission, SignatureFinanciere
+from missions.services import TimerService
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Mesure le rendu de N e-mails de relance de signature (sans base de données)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--emails',
+            type=int,
+            default=10000,
+            help='Nombre d\'e-mails rendus par mesure',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Nombre de mesures par méthode (médiane retenue)',
+        )
+
+    def handle(self, *args, **options):
+        signatures = self._signatures(options['emails'])
+        contextes = [{'signature': s, 'mission': s.mission} for s in signatures]
+
+        methodes = [
+            ('Registre, rendu en lot', lambda: registre.rendre_lot('relance_signature', contextes)),
+            ('Registre, un rendu par e-mail', lambda: [registre.rendre('relance_signature', c) for c in contextes]),
+            ('TimerService (rendu + EmailSortant)', lambda: TimerService._messages_relance_signature(signatures)),
+            ('Gabarits recompilés à chaque e-mail', lambda: self._sans_cache(contextes)),
+        ]
+
+        registre.precharger()
+        reference = None
+        for nom, methode in methodes:
+            durees = []
+            for _ in range(options['repeat']):
+                debut = time.perf_counter()
+                methode()
+                durees.append(time.perf_counter() - debut)
+            duree = statistics.median(durees)
+            reference = reference or duree
+            self.stdout.write(
+                f"{nom:<40} {duree * 1000:9.1f} ms  "
+                f"{len(contextes) / duree:9.0f} e-mails/s  x{duree / reference:.1f}"
+            )
+
+    @staticmethod
+    def _sans_cache(contextes):
+        """Rendu sans registre : lecture et compilation des gabarits pour chaque e-mail."""
+        moteur = engines['django']
+        fichiers = [
+            get_template(f'missions/emails/relance_signature.{extension}').origin.name
+            for extension in ('txt', 'html')
+        ]
+        for contexte in contextes:
+            for fichier in fichiers:
+                with open(fichier, encoding='utf-8') as source:
+                    moteur.from_string(source.read()).render(contexte)
+
+    @staticmethod
+    def _signatures(nombre):
+        """Signatures en mémoire (non enregistrées), avec mission et signataire."""
+        now = timezone.now()
+        signataire = User(identifiant='bench', email='bench@example.com', first_name='Bench', last_name='Mark')
+        signatures = []
+        for i in range(nombre):
+            mission = Mission(
+                reference=f"MIS-BENCH-{i:06d}",
+                titre=f"Mission de contrôle <{i}>",
+                createur=signataire,
+                budget_estime=Decimal('150000'),
+            )
+            signatures.append(SignatureFinanciere(
+                mission=mission,
+                signataire=signataire,
+                niveau='COMPTABLE',
+                date_limite_signature=now - datetime.timedelta(hours=i % 72),
+            ))
+        return signatures
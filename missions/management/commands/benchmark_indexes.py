@@ -0,0 +1,223 @@
+"""
+Commande Django mesurant les requêtes chaudes du workflow avec et sans les
+index déclarés dans les modèles (plan EXPLAIN et latence)
+"""
+import datetime
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from missions.models import Mission, Validation, SignatureFinanciere, Notification, Avance
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare le plan et la latence des requêtes chaudes avec et sans index'
+
+    MODELS = [Mission, Validation, SignatureFinanciere, Notification, Avance]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missions',
+            type=int,
+            default=100000,
+            help='Nombre de missions générées (environ 10 lignes par mission au total)',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Nombre d\'utilisateurs générés',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Nombre d\'exécutions par requête pour la mesure de latence',
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            rows = self._seed(options['missions'], options['users'])
+            self.stdout.write(f'{rows} lignes générées en {time.perf_counter() - start:.1f}s')
+
+            queries = self._hot_queries()
+
+            self._set_indexes(False)
+            before = {name: self._measure(queryset) for name, queryset in queries}
+            self._set_indexes(True)
+            after = {name: self._measure(queryset) for name, queryset in queries}
+
+            # Les données de mesure ne sont jamais conservées
+            transaction.set_rollback(True)
+
+        for name, _ in queries:
+            (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{name}: {ms_before:.2f} ms → {ms_after:.2f} ms'
+            ))
+            self.stdout.write(f'  sans index:\n    {plan_before}')
+            self.stdout.write(f'  avec index:\n    {plan_after}')
+
+    def _set_indexes(self, present):
+        """Supprime ou recrée les index déclarés dans `Meta.indexes`."""
+        # L'éditeur sert seulement à générer le SQL : SQLite refuse de l'ouvrir
+        # dans une transaction, mais y accepte CREATE/DROP INDEX
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in self.MODELS:
+                for index in model._meta.indexes:
+                    if present:
+                        sql = str(index.create_sql(model, editor))
+                    else:
+                        sql = editor.sql_delete_index % {
+                            'name': editor.quote_name(index.name),
+                            'table': editor.quote_name(model._meta.db_table),
+                        }
+                    cursor.execute(sql)
+            cursor.execute('ANALYZE')
+
+    def _measure(self, queryset):
+        """Plan d'exécution et latence médiane (ms) d'une requête."""
+        plan = queryset.explain().replace('\n', '\n    ')
+        durations = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            durations.append((time.perf_counter() - start) * 1000)
+        return plan, statistics.median(durations)
+
+    def _hot_queries(self):
+        """Requêtes des services et des vues, sur un utilisateur et une mission types."""
+        now = timezone.now()
+        user = User.objects.filter(identifiant__startswith='bench.').order_by('?').first()
+        mission = Mission.objects.filter(reference__startswith='BENCH-').order_by('?').first()
+
+        return [
+            ('prochaine_validation', Validation.objects.filter(
+                mission=mission, ordre__gt=1, statut='EN_ATTENTE'
+            ).order_by('ordre')[:1]),
+            ('validations_du_valideur', Validation.objects.filter(
+                valideur=user, statut='EN_ATTENTE'
+            )),
+            ('prochaine_signature', SignatureFinanciere.objects.filter(
+                mission=mission, ordre__gt=1, statut='EN_ATTENTE'
+            ).order_by('ordre')[:1]),
+            ('signatures_du_signataire', SignatureFinanciere.objects.filter(
+                signataire=user, statut='EN_ATTENTE'
+            ).order_by('ordre')),
+            ('signatures_en_retard', SignatureFinanciere.objects.filter(
+                statut='EN_ATTENTE', date_limite_signature__lt=now, relance_effectuee=False
+            )),
+            ('justificatifs_en_retard', Mission.objects.filter(
+                retour_declare=True, justificatifs_deposes=False, date_limite_justificatifs__lt=now
+            )),
+            ('missions_a_archiver', Mission.objects.filter(
+                cloturee=True, archivee=False, date_cloture__lt=now - datetime.timedelta(days=60)
+            )),
+            ('missions_du_createur', Mission.objects.filter(
+                createur=user
+            ).order_by('-date_creation')[:20]),
+            ('notifications', Notification.objects.filter(
+                destinataire=user
+            ).order_by('-date_creation')[:20]),
+            ('notifications_non_lues', Notification.objects.filter(
+                destinataire=user, lue=False
+            ).order_by('-date_creation')),
+            ('avances_du_beneficiaire', Avance.objects.filter(
+                beneficiaire=user
+            ).order_by('-date_creation')[:20]),
+        ]
+
+    def _seed(self, mission_count, user_count):
+        """
+        Génère un jeu de données à la distribution réaliste : la grande
+        majorité des validations et signatures est traitée, des notifications
+        lues et des missions clôturées et archivées.
+        """
+        rng = random.Random(42)
+        now = timezone.now()
+        today = now.date()
+        batch_size = 5000
+
+        users = User.objects.bulk_create(
+            [
+                User(identifiant=f'bench.{i}', email=f'bench{i}@bench.test', role='AGENT')
+                for i in range(user_count)
+            ],
+            batch_size=batch_size,
+        )
+
+        missions = []
+        for i in range(mission_count):
+            cloturee = rng.random() < 0.7
+            retour_declare = cloturee or rng.random() < 0.5
+            debut = today - datetime.timedelta(days=rng.randint(0, 1500))
+            missions.append(Mission(
+                reference=f'BENCH-{i:07d}',
+                titre=f'Mission {i}',
+                date_debut=debut,
+                date_fin=debut + datetime.timedelta(days=rng.randint(0, 10)),
+                lieu_mission='Lomé',
+                createur=rng.choice(users),
+                statut='CLOTUREE' if cloturee else 'EN_ATTENTE',
+                retour_declare=retour_declare,
+                justificatifs_deposes=cloturee or rng.random() < 0.8,
+                date_limite_justificatifs=now - datetime.timedelta(days=rng.randint(-5, 1500)) if retour_declare else None,
+                cloturee=cloturee,
+                date_cloture=now - datetime.timedelta(days=rng.randint(0, 1500)) if cloturee else None,
+                archivee=cloturee and rng.random() < 0.95,
+            ))
+        missions = Mission.objects.bulk_create(missions, batch_size=batch_size)
+
+        validations, signatures, notifications, avances = [], [], [], []
+        for mission in missions:
+            termine = mission.statut == 'CLOTUREE' or rng.random() < 0.8
+            for ordre, niveau in enumerate(('CHEF_AGENCE', 'RESPONSABLE_COPEC', 'DG'), start=1):
+                validations.append(Validation(
+                    mission=mission,
+                    valideur=rng.choice(users),
+                    niveau=niveau,
+                    ordre=ordre,
+                    statut='VALIDEE' if termine else 'EN_ATTENTE',
+                ))
+            for ordre, niveau in enumerate(('AGENT', 'CHEF_AGENCE', 'DIRECTEUR_FINANCES'), start=1):
+                signatures.append(SignatureFinanciere(
+                    mission=mission,
+                    niveau=niveau,
+                    signataire=rng.choice(users),
+                    ordre=ordre,
+                    statut='SIGNE' if termine else 'EN_ATTENTE',
+                    date_limite_signature=now - datetime.timedelta(hours=rng.randint(-72, 2000)),
+                    relance_effectuee=termine or rng.random() < 0.5,
+                ))
+            for _ in range(3):
+                notifications.append(Notification(
+                    destinataire=rng.choice(users),
+                    titre=mission.reference,
+                    message='Benchmark',
+                    lue=rng.random() < 0.9,
+                ))
+            avances.append(Avance(
+                mission=mission,
+                montant=rng.randint(10, 500) * 1000,
+                verse_par=rng.choice(users),
+                beneficiaire=mission.createur,
+            ))
+
+        for model, objects in (
+            (Validation, validations),
+            (SignatureFinanciere, signatures),
+            (Notification, notifications),
+            (Avance, avances),
+        ):
+            model.objects.bulk_create(objects, batch_size=batch_size)
+
+        return len(users) + len(missions) + len(validations) + len(signatures) + len(notifications) + len(avances)
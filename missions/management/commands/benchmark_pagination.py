@@ -0,0 +1,122 @@
+"""
+Commande Django comparant la pagination par numéro de page (OFFSET + COUNT)
+et par curseur sur la liste des missions, en première page et en page profonde
+"""
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from missions.models import Mission
+from missions.pagination import encoder_curseur
+from missions.views import MissionListView
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Mesure la latence de la liste des missions par numéro de page et par curseur'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missions',
+            type=int,
+            default=110000,
+            help='Nombre de missions générées',
+        )
+        parser.add_argument(
+            '--page',
+            type=int,
+            default=5000,
+            help='Page profonde mesurée',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Nombre de requêtes par mesure (médiane retenue)',
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        page = options['page']
+        taille = 20
+
+        with transaction.atomic():
+            debut = time.perf_counter()
+            admin = self._seed(options['missions'])
+            self.stdout.write(f"{options['missions']} missions générées en {time.perf_counter() - debut:.1f}s")
+
+            # Curseur de la page `page` : position de la dernière ligne de la page précédente
+            ordre = MissionListView.keyset_ordering
+            rang = (page - 1) * taille - 1
+            precedente = Mission.objects.order_by(*ordre).values_list(
+                *[champ.lstrip('-') for champ in ordre]
+            )[rang:rang + 1]
+            if not precedente:
+                raise CommandError(f"Pas assez de missions pour atteindre la page {page}")
+            curseur = encoder_curseur(precedente[0])
+
+            mesures = [
+                ('page 1, numéro de page', '/?page=1'),
+                ('page 1, curseur', '/?curseur='),
+                (f'page {page}, numéro de page', f'/?page={page}'),
+                (f'page {page}, curseur', f'/?curseur={curseur}'),
+            ]
+            resultats = [(nom, *self._mesurer(admin, url)) for nom, url in mesures]
+
+            # Les données de mesure ne sont jamais conservées
+            transaction.set_rollback(True)
+
+        for nom, duree, requetes, lignes in resultats:
+            self.stdout.write(f"{nom:<32} {duree:8.2f} ms  {requetes} requêtes  {lignes} lignes")
+
+    def _mesurer(self, user, url):
+        """Latence médiane (ms), nombre de requêtes et de lignes d'une page."""
+        vue = MissionListView.as_view()
+        factory = APIRequestFactory()
+        durees = []
+        for _ in range(self.repeat):
+            request = factory.get(url, HTTP_HOST='localhost')
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as requetes:
+                debut = time.perf_counter()
+                response = vue(request)
+                response.render()
+                durees.append((time.perf_counter() - debut) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url}: HTTP {response.status_code}")
+        return statistics.median(durees), len(requetes.captured_queries), len(response.data['results'])
+
+    def _seed(self, nombre):
+        """Missions de test réparties sur plusieurs mois (par lots de même date)."""
+        admin = User.objects.create(identifiant='bench.admin', email='admin@bench.test', role='ADMIN')
+        aujourd_hui = timezone.now().date()
+        missions = Mission.objects.bulk_create(
+            [
+                Mission(
+                    reference=f'BENCH-{i:07d}',
+                    titre=f'Mission {i}',
+                    date_debut=aujourd_hui,
+                    date_fin=aujourd_hui,
+                    lieu_mission='Lomé',
+                    createur=admin,
+                )
+                for i in range(nombre)
+            ],
+            batch_size=5000,
+        )
+
+        # bulk_create horodate tout à l'identique : une date par lot de 1000
+        now = timezone.now()
+        for lot, i in enumerate(range(0, len(missions), 1000)):
+            Mission.objects.filter(pk__in=[m.pk for m in missions[i:i + 1000]]).update(
+                date_creation=now - datetime.timedelta(minutes=lot)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return admin
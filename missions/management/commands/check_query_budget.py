@@ -0,0 +1,114 @@
+"""
+Commande Django vérifiant que les listes paginées respectent un budget de
+requêtes fixe, indépendant de la taille de page
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from missions import views
+from missions.models import (
+    Mission, MissionIntervenant, Validation, SignatureFinanciere, Avance
+)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Vérifie le nombre de requêtes SQL par page des listes de l\'API'
+
+    # (nom, vue, utilisateur qui consulte)
+    ENDPOINTS = [
+        ('missions', views.MissionListView, 'chef'),
+        ('validations', views.ValidationListView, 'chef'),
+        ('signatures', views.SignatureListView, 'chef'),
+        ('avances', views.AvanceListCreateView, 'comptable'),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-sizes',
+            default='5,20,50',
+            help='Tailles de page à comparer (séparées par des virgules)',
+        )
+        parser.add_argument(
+            '--budget',
+            type=int,
+            default=10,
+            help='Nombre maximal de requêtes autorisées par page',
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        budget = options['budget']
+        results = {}
+
+        with transaction.atomic():
+            users = self._seed(max(page_sizes))
+            for name, view_class, role in self.ENDPOINTS:
+                results[name] = [
+                    self._count_queries(view_class, users[role], size) for size in page_sizes
+                ]
+            # Les données de mesure ne sont jamais conservées
+            transaction.set_rollback(True)
+
+        errors = []
+        for name, counts in results.items():
+            line = ', '.join(f'{size}/page: {count}' for size, count in zip(page_sizes, counts))
+            if len(set(counts)) > 1 or max(counts) > budget:
+                errors.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: {line}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}: {line}'))
+
+        if errors:
+            raise CommandError(
+                f'Budget de {budget} requêtes dépassé ou dépendant de la taille de page: {", ".join(errors)}'
+            )
+
+    def _count_queries(self, view_class, user, page_size):
+        """Nombre de requêtes pour une page de `page_size` éléments."""
+        pagination_class = type('BudgetPagination', (PageNumberPagination,), {'page_size': page_size})
+        view = view_class.as_view(pagination_class=pagination_class)
+        request = APIRequestFactory().get('/', HTTP_HOST='localhost')
+        force_authenticate(request, user=user)
+
+        with CaptureQueriesContext(connection) as context:
+            response = view(request)
+            response.render()
+        if response.status_code != 200:
+            raise CommandError(f'{view_class.__name__}: HTTP {response.status_code} {response.content[:200]}')
+        return len(context.captured_queries)
+
+    def _seed(self, count):
+        """Crée une équipe et `count` missions avec leurs relations."""
+        chef = User.objects.create_user('budget.chef', 'chef@budget.test', None, role='CHEF_AGENCE')
+        comptable = User.objects.create_user('budget.comptable', 'cpt@budget.test', None, role='COMPTABLE')
+        agents = [
+            User.objects.create_user(f'budget.agent{i}', f'agent{i}@budget.test', None, manager=chef)
+            for i in range(3)
+        ]
+
+        today = datetime.date.today()
+        for i in range(count):
+            agent = agents[i % len(agents)]
+            mission = Mission.objects.create(
+                reference=f'BUDGET-{i:05d}',
+                titre=f'Mission {i}',
+                date_debut=today,
+                date_fin=today,
+                lieu_mission='Lomé',
+                createur=agent,
+                statut='EN_ATTENTE',
+            )
+            mission.participants.set(agents)
+            for intervenant in agents:
+                MissionIntervenant.objects.create(mission=mission, intervenant=intervenant)
+            Validation.objects.create(mission=mission, valideur=chef, niveau='N_PLUS_1')
+            SignatureFinanciere.objects.create(mission=mission, niveau='CHEF_AGENCE', signataire=chef)
+            Avance.objects.create(mission=mission, montant=1000, verse_par=comptable, beneficiaire=agent)
+
+        return {'chef': chef, 'comptable': comptable}
@@ -3,6 +3,7 @@ Commande Django pour vérifier les timers et envoyer les relances automatiques
 """
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from missions.models import ChangementEcheance
 from missions.services import TimerService
 
 
@@ -28,45 +29,78 @@ class Command(BaseCommand):
             self.style.SUCCESS(f'Début de la vérification des timers à {timezone.now()}')
         )
 
+        now = timezone.now()
+
         # 1. Vérifier les signatures en retard
         self.stdout.write('Vérification des signatures en retard...')
         try:
-            if not dry_run:
-                TimerService.check_overdue_signatures()
+            if dry_run:
+                relances = TimerService.overdue_signatures(now).count()
+            else:
+                relances = TimerService.check_overdue_signatures()
             self.stdout.write(
-                self.style.SUCCESS('✓ Vérification des signatures terminée')
+                self.style.SUCCESS(f'✓ Vérification des signatures terminée ({relances} relances)')
             )
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'✗ Erreur lors de la vérification des signatures: {e}')
             )
 
-        # 2. Vérifier les justificatifs en retard
+        # 2. Vérifier les validations en retard
+        self.stdout.write('Vérification des validations en retard...')
+        try:
+            if dry_run:
+                relances = TimerService.overdue_validations(now).count()
+            else:
+                relances = TimerService.check_overdue_validations()
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Vérification des validations terminée ({relances} relances)')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'✗ Erreur lors de la vérification des validations: {e}')
+            )
+
+        # 3. Vérifier les justificatifs en retard
         self.stdout.write('Vérification des justificatifs en retard...')
         try:
-            if not dry_run:
-                TimerService.check_overdue_justificatifs()
+            if dry_run:
+                relances = TimerService.justificatifs_to_remind(now).count()
+                escalades = TimerService.justificatifs_to_escalate(now).count()
+            else:
+                relances, escalades = TimerService.check_overdue_justificatifs()
             self.stdout.write(
-                self.style.SUCCESS('✓ Vérification des justificatifs terminée')
+                self.style.SUCCESS(
+                    f'✓ Vérification des justificatifs terminée ({relances} relances, {escalades} escalades)'
+                )
             )
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'✗ Erreur lors de la vérification des justificatifs: {e}')
             )
 
-        # 3. Vérifier les missions à archiver
+        # 4. Vérifier les missions à archiver
         self.stdout.write('Vérification des missions à archiver...')
         try:
-            if not dry_run:
-                TimerService.check_missions_to_archive()
+            if dry_run:
+                archivees = TimerService.missions_to_archive(now).count()
+            else:
+                archivees = TimerService.check_missions_to_archive()
             self.stdout.write(
-                self.style.SUCCESS('✓ Vérification d\'archivage terminée')
+                self.style.SUCCESS(f'✓ Vérification d\'archivage terminée ({archivees} missions archivées)')
             )
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'✗ Erreur lors de la vérification d\'archivage: {e}')
             )
 
+        # 5. Purger le flux de l'échéancier (changements non consommés)
+        if not dry_run:
+            purges = ChangementEcheance.purger()
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Flux des échéances purgé ({purges} changements anciens)')
+            )
+
         self.stdout.write(
             self.style.SUCCESS(f'Fin de la vérification des timers à {timezone.now()}')
         )
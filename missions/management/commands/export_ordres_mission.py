@@ -0,0 +1,77 @@
+"""
+Commande Django exportant les ordres de mission d'un mois et/ou d'une entité
+en une archive ZIP ou un PDF unique
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from missions.export_pdf import ExportOrdresMission, missions_a_exporter
+from users.models import Entite
+
+
+class Command(BaseCommand):
+    help = 'Exporte les ordres de mission (mois, entité) en ZIP ou en PDF unique'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mois',
+            help='Mois de début des missions (AAAA-MM)',
+        )
+        parser.add_argument(
+            '--entite',
+            help='Code de l\'entité (sous-entités comprises)',
+        )
+        parser.add_argument(
+            '--sortie',
+            choices=['zip', 'pdf'],
+            default='zip',
+            help='ZIP (un PDF par mission) ou PDF unique',
+        )
+        parser.add_argument(
+            '--fichier',
+            required=True,
+            help='Fichier de destination',
+        )
+        parser.add_argument(
+            '--processus',
+            type=int,
+            default=None,
+            help='Nombre de processus de rendu (par défaut : EXPORT_PDF_PROCESSUS ou nombre de cœurs)',
+        )
+
+    def handle(self, *args, **options):
+        mois = None
+        if options['mois']:
+            try:
+                mois = parse_date(f"{options['mois']}-01")
+            except ValueError:
+                pass
+            if mois is None:
+                raise CommandError('Mois invalide (format AAAA-MM)')
+
+        entite = None
+        if options['entite']:
+            try:
+                entite = Entite.objects.get(code=options['entite'])
+            except Entite.DoesNotExist:
+                raise CommandError(f"Entité introuvable: {options['entite']}")
+
+        debut = time.perf_counter()
+        missions = list(missions_a_exporter(mois=mois, entite=entite))
+        if not missions:
+            raise CommandError('Aucun ordre de mission à exporter')
+
+        export = ExportOrdresMission(missions, processus=options['processus'])
+        flux = export.flux_zip() if options['sortie'] == 'zip' else export.flux_pdf()
+        taille = 0
+        with open(options['fichier'], 'wb') as fichier:
+            for morceau in flux:
+                fichier.write(morceau)
+                taille += len(morceau)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(missions)} ordres de mission exportés dans {options['fichier']} "
+            f"({taille / 1024:.0f} Ko) en {time.perf_counter() - debut:.1f}s"
+        ))
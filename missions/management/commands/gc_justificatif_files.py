@@ -0,0 +1,61 @@
+"""
+Commande Django de collecte des fichiers justificatifs stockés
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from missions import stockage
+from missions.models import Justificatif
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompte les références des contenus stockés, supprime ceux qui n\'en ont plus '
+        'et les fichiers qu\'aucun contenu ne désigne'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--importer',
+            action='store_true',
+            help='Passe d\'abord les fichiers des justificatifs antérieurs au stockage dédupliqué',
+        )
+        parser.add_argument(
+            '--delai',
+            type=int,
+            default=60,
+            help='Âge minimal (minutes) d\'un fichier sans contenu avant suppression (60 par défaut)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche les fichiers sans contenu sans rien modifier',
+        )
+
+    def handle(self, *args, **options):
+        orphelins = list(stockage.fichiers_orphelins(default_storage, timezone.timedelta(minutes=options['delai'])))
+        if options['dry_run']:
+            for nom in orphelins:
+                self.stdout.write(nom)
+            self.stdout.write(f'{len(orphelins)} fichiers sans contenu')
+            return
+
+        if options['importer']:
+            importes = 0
+            anciens = Justificatif.objects.filter(contenu__isnull=True).exclude(fichier='').exclude(fichier__isnull=True)
+            for justificatif in anciens.iterator():
+                if not justificatif.fichier.storage.exists(justificatif.fichier.name):
+                    self.stdout.write(self.style.WARNING(f'Fichier absent: {justificatif.fichier.name}'))
+                    continue
+                stockage.importer(justificatif)
+                importes += 1
+            self.stdout.write(f'{importes} justificatifs importés')
+
+        corriges = stockage.recompter()
+        collectes = stockage.collecter()
+        for nom in orphelins:
+            default_storage.delete(nom)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {corriges} références corrigées, {collectes} contenus et {len(orphelins)} fichiers supprimés'
+        ))
@@ -0,0 +1,58 @@
+"""
+Commande Django pour importer des missions en masse depuis un fichier CSV ou XLSX
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from missions.imports import lire_fichier
+from missions.services import MissionImportService
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Importe des missions depuis un fichier CSV ou XLSX (une mission par ligne)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help='Chemin du fichier CSV ou XLSX')
+        parser.add_argument(
+            '--createur',
+            required=True,
+            help='Identifiant du créateur des lignes sans colonne "createur"',
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=MissionImportService.TAILLE_LOT,
+            help='Nombre de lignes validées et insérées par lot',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            createur = User.objects.get(identifiant=options['createur'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur inconnu: {options['createur']}")
+
+        debut = timezone.now()
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                rapport = MissionImportService.importer(
+                    lire_fichier(fichier, options['fichier']),
+                    createur,
+                    peut_assigner=True,
+                    taille_lot=options['taille_lot'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for erreur in rapport['erreurs']:
+            details = '; '.join(
+                f"{champ}: {' '.join(str(message) for message in messages)}"
+                for champ, messages in erreur['erreurs'].items()
+            )
+            self.stdout.write(self.style.ERROR(f"✗ ligne {erreur['ligne']}: {details}"))
+
+        duree = (timezone.now() - debut).total_seconds()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {rapport['crees']}/{rapport['lignes']} missions importées en {duree:.2f}s "
+            f"({len(rapport['erreurs'])} lignes en erreur)"
+        ))
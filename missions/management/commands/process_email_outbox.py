@@ -0,0 +1,50 @@
+"""
+Commande Django envoyant les e-mails de la file EmailSortant
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from missions.outbox import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = 'Envoie les e-mails en attente sur un pool de connexions SMTP, avec nouvelles tentatives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--connexions',
+            type=int,
+            default=4,
+            help='Nombre de connexions SMTP ouvertes en parallèle',
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=100,
+            help='Nombre d\'e-mails réservés par lot',
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=2,
+            help='Attente (secondes) quand la file est vide',
+        )
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help='Vide la file puis s\'arrête au lieu d\'attendre de nouveaux e-mails',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS(f'Démarrage de l\'envoi des e-mails à {timezone.now()}')
+        )
+        worker = OutboxWorker(connexions=options['connexions'], taille_lot=options['taille_lot'])
+        try:
+            envoyes, echecs = worker.executer(intervalle=options['intervalle'], une_fois=options['une_fois'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Arrêt de l\'envoi des e-mails'))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {envoyes} e-mails envoyés, {echecs} échecs')
+        )
@@ -0,0 +1,53 @@
+"""
+Commande Django générant les PDF de la file DocumentPDF
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from missions.travaux_pdf import GenerateurPDF
+
+
+class Command(BaseCommand):
+    help = 'Génère les PDF en attente (ordres de mission) sur un pool de processus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processus',
+            type=int,
+            default=None,
+            help='Nombre de processus de rendu (par défaut : nombre de cœurs)',
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=20,
+            help='Nombre de documents réservés par lot',
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=2,
+            help='Attente (secondes) quand la file est vide',
+        )
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help='Vide la file puis s\'arrête au lieu d\'attendre de nouveaux documents',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS(f'Démarrage de la génération des PDF à {timezone.now()}')
+        )
+        generateur = GenerateurPDF(processus=options['processus'], taille_lot=options['taille_lot'])
+        try:
+            generes, echecs = generateur.executer(intervalle=options['intervalle'], une_fois=options['une_fois'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Arrêt de la génération des PDF'))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {generes - generateur.reutilises} PDF générés, '
+                f'{generateur.reutilises} inchangés réutilisés, {echecs} échecs'
+            )
+        )
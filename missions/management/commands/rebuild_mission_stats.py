@@ -0,0 +1,21 @@
+"""
+Commande Django pour reconstruire la table d'agrégats des missions
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from missions.models import StatistiqueMission
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit entièrement la table StatistiqueMission à partir des missions'
+
+    def handle(self, *args, **options):
+        debut = timezone.now()
+        self.stdout.write('Reconstruction des statistiques de missions...')
+
+        nombre = StatistiqueMission.reconstruire()
+
+        duree = (timezone.now() - debut).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {nombre} agrégats reconstruits en {duree:.2f}s')
+        )
@@ -0,0 +1,21 @@
+"""
+Commande Django pour recalculer les compteurs de notifications non lues
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from missions.models import CompteurNotifications
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de notifications non lues à partir des notifications'
+
+    def handle(self, *args, **options):
+        debut = timezone.now()
+        self.stdout.write('Reconstruction des compteurs de notifications...')
+
+        nombre = CompteurNotifications.reconstruire()
+
+        duree = (timezone.now() - debut).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {nombre} compteurs reconstruits en {duree:.2f}s')
+        )
@@ -0,0 +1,27 @@
+"""
+Commande Django remettant en file les PDF déjà générés
+"""
+from django.core.management.base import BaseCommand
+
+from missions.models import DocumentPDF
+from missions.travaux_pdf import redemander
+
+
+class Command(BaseCommand):
+    help = (
+        'Remet en file les PDF générés (après un changement de nom, d\'entité ou de véhicule) ; '
+        'process_pdf_jobs ne rend que ceux dont les données ont changé'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mission',
+            type=int,
+            action='append',
+            help='Mission à rafraîchir (répétable ; toutes par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        missions = options['mission'] or DocumentPDF.objects.values_list('mission_id', flat=True)
+        total = redemander(missions)
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} documents remis en file'))
@@ -0,0 +1,31 @@
+"""
+Commande Django lançant l'échéancier des timers (processus long)
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from missions.scheduler import Echeancier
+
+
+class Command(BaseCommand):
+    help = 'Déclenche les relances et archivages à leur échéance, sans balayage périodique'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=5,
+            help='Délai maximal (secondes) entre deux lectures du flux de changements',
+        )
+
+    def handle(self, *args, **options):
+        logging.getLogger('missions.scheduler').setLevel(logging.INFO)
+        self.stdout.write(
+            self.style.SUCCESS(f'Démarrage de l\'échéancier à {timezone.now()}')
+        )
+        try:
+            Echeancier().executer(intervalle=options['intervalle'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Arrêt de l\'échéancier'))
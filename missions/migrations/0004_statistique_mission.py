@@ -0,0 +1,68 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollup(apps, schema_editor):
+    """Construit les agrégats à partir des missions existantes."""
+    Mission = apps.get_model('missions', 'Mission')
+    StatistiqueMission = apps.get_model('missions', 'StatistiqueMission')
+    montants = ('budget_estime', 'avance_demandee', 'total_depenses', 'solde_calcule')
+
+    lignes = Mission.objects.order_by().values('entite_id', 'type', 'statut', 'date_debut').annotate(
+        nombre_missions=models.Count('id'),
+        **{f'somme_{champ}': models.Sum(champ) for champ in montants}
+    )
+    StatistiqueMission.objects.bulk_create(
+        [
+            StatistiqueMission(
+                entite_id=ligne['entite_id'],
+                type=ligne['type'],
+                statut=ligne['statut'],
+                jour=ligne['date_debut'],
+                nombre=ligne['nombre_missions'],
+                **{champ: ligne[f'somme_{champ}'] or 0 for champ in montants}
+            )
+            for ligne in lignes
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0003_update_mission_references'),
+        ('users', '0003_hierarchy_closure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='total_depenses',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total des dépenses déclarées, calculé avec le solde', max_digits=12, verbose_name='Total des dépenses'),
+        ),
+        migrations.CreateModel(
+            name='StatistiqueMission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=20, verbose_name='Type de mission')),
+                ('statut', models.CharField(max_length=15, verbose_name='Statut')),
+                ('jour', models.DateField(help_text='Date de début des missions agrégées', verbose_name='Jour')),
+                ('nombre', models.IntegerField(default=0, verbose_name='Nombre de missions')),
+                ('budget_estime', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Budget estimé')),
+                ('avance_demandee', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Avances demandées')),
+                ('total_depenses', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Total des dépenses')),
+                ('solde_calcule', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Solde')),
+                ('entite', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='statistiques_missions', to='users.entite', verbose_name='Entité')),
+            ],
+            options={
+                'verbose_name': 'Statistique de missions',
+                'verbose_name_plural': 'Statistiques de missions',
+                'ordering': ['jour'],
+                'unique_together': {('entite', 'type', 'statut', 'jour')},
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0004_statistique_mission'),
+        ('users', '0003_hierarchy_closure'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avance',
+            index=models.Index(fields=['beneficiaire', '-date_creation'], name='avance_beneficiaire_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['createur', '-date_creation'], name='mission_createur_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['entite', '-date_creation'], name='mission_entite_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(condition=models.Q(('justificatifs_deposes', False), ('retour_declare', True)), fields=['date_limite_justificatifs'], name='mission_justif_retard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(condition=models.Q(('archivee', False), ('cloturee', True)), fields=['date_cloture'], name='mission_a_archiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['destinataire', '-date_creation'], name='notification_dest_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('lue', False)), fields=['destinataire', '-date_creation'], name='notification_non_lue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signaturefinanciere',
+            index=models.Index(fields=['mission', 'statut', 'ordre'], name='signature_mission_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signaturefinanciere',
+            index=models.Index(fields=['signataire', 'statut', 'ordre'], name='signature_signataire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signaturefinanciere',
+            index=models.Index(condition=models.Q(('relance_effectuee', False), ('statut', 'EN_ATTENTE')), fields=['date_limite_signature'], name='signature_relance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='validation',
+            index=models.Index(fields=['mission', 'statut', 'ordre'], name='validation_mission_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='validation',
+            index=models.Index(fields=['valideur', 'statut'], name='validation_valideur_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='validation',
+            index=models.Index(condition=models.Q(('est_actif', True), ('statut', 'EN_ATTENTE')), fields=['valideur', 'mission'], name='validation_en_attente_idx'),
+        ),
+    ]
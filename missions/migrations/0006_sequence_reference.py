@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:02
+
+import datetime
+
+from django.db import migrations, models
+
+
+def init_sequences(apps, schema_editor):
+    """Reprend les compteurs au plus grand numéro déjà attribué chaque jour."""
+    Mission = apps.get_model('missions', 'Mission')
+    SequenceReference = apps.get_model('missions', 'SequenceReference')
+
+    valeurs = {}
+    for reference in Mission.objects.filter(reference__startswith='MIS-').values_list('reference', flat=True).iterator():
+        try:
+            _, jour, numero = reference.split('-')
+            jour = datetime.datetime.strptime(jour, '%Y%m%d').date()
+            numero = int(numero)
+        except ValueError:
+            continue
+        valeurs[jour] = max(valeurs.get(jour, 0), numero)
+
+    SequenceReference.objects.bulk_create(
+        [SequenceReference(prefixe='MIS', jour=jour, valeur=valeur) for jour, valeur in valeurs.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0005_workflow_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixe', models.CharField(max_length=10, verbose_name='Préfixe')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('valeur', models.PositiveIntegerField(default=0, verbose_name='Dernière valeur attribuée')),
+            ],
+            options={
+                'verbose_name': 'Séquence de références',
+                'verbose_name_plural': 'Séquences de références',
+                'unique_together': {('prefixe', 'jour')},
+            },
+        ),
+        migrations.RunPython(init_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0006_sequence_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangementEcheance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(max_length=50, verbose_name='Modèle')),
+                ('objet_id', models.PositiveBigIntegerField(verbose_name="Identifiant de l'objet")),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+            ],
+            options={
+                'verbose_name': "Changement d'échéance",
+                'verbose_name_plural': "Changements d'échéances",
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='validation',
+            name='relance_effectuee',
+            field=models.BooleanField(default=False, help_text="Une relance a-t-elle été envoyée après l'échéance ?", verbose_name='Relance effectuée'),
+        ),
+    ]
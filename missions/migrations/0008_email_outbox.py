@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0007_timer_scheduler'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailSortant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sujet', models.CharField(max_length=255, verbose_name='Sujet')),
+                ('corps_texte', models.TextField(verbose_name='Corps texte')),
+                ('corps_html', models.TextField(blank=True, verbose_name='Corps HTML')),
+                ('expediteur', models.CharField(max_length=254, verbose_name='Expéditeur')),
+                ('destinataires', models.JSONField(default=list, verbose_name='Destinataires')),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', "En cours d'envoi"), ('ENVOYE', 'Envoyé'), ('ECHEC', 'Échec définitif')], default='EN_ATTENTE', max_length=10, verbose_name='Statut')),
+                ('tentatives', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('prochaine_tentative', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('derniere_erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('verrou', models.CharField(blank=True, max_length=32, verbose_name='Verrou')),
+                ('date_verrou', models.DateTimeField(blank=True, null=True, verbose_name='Date de réservation')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_envoi', models.DateTimeField(blank=True, null=True, verbose_name="Date d'envoi")),
+            ],
+            options={
+                'verbose_name': 'E-mail sortant',
+                'verbose_name_plural': 'E-mails sortants',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(condition=models.Q(('statut', 'EN_ATTENTE')), fields=['prochaine_tentative'], name='email_a_envoyer_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0008_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailsortant',
+            name='categorie',
+            field=models.CharField(blank=True, max_length=30, verbose_name='Catégorie'),
+        ),
+        migrations.AddField(
+            model_name='emailsortant',
+            name='cle_regroupement',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Clé de regroupement'),
+        ),
+        migrations.AddIndex(
+            model_name='emailsortant',
+            index=models.Index(condition=models.Q(('statut', 'EN_ATTENTE'), models.Q(('cle_regroupement', ''), _negated=True)), fields=['cle_regroupement'], name='email_a_regrouper_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0009_email_digest'),
+        ('users', '0003_hierarchy_closure'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurNotifications',
+            fields=[
+                ('utilisateur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='compteur_notifications', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('non_lues', models.IntegerField(default=0, verbose_name='Notifications non lues')),
+            ],
+            options={
+                'verbose_name': 'Compteur de notifications',
+                'verbose_name_plural': 'Compteurs de notifications',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_dest_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['destinataire', '-date_creation', '-id'], name='notification_dest_date_idx'),
+        ),
+    ]
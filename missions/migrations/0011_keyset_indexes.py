@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0010_notification_feed'),
+        ('users', '0003_hierarchy_closure'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avance',
+            index=models.Index(fields=['-date_creation', '-id'], name='avance_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='justificatif',
+            index=models.Index(fields=['-date_creation', '-id'], name='justificatif_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='justificatif',
+            index=models.Index(fields=['intervenant', '-date_creation', '-id'], name='justificatif_interv_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['-date_creation', '-id'], name='mission_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='validation',
+            index=models.Index(fields=['statut', '-date_creation', '-id'], name='validation_statut_date_idx'),
+        ),
+    ]
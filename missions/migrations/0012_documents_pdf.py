@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0011_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('ORDRE_MISSION', 'Ordre de mission')], default='ORDRE_MISSION', max_length=20, verbose_name='Type')),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', 'En cours de génération'), ('PRET', 'Prêt'), ('ECHEC', 'Échec définitif')], default='EN_ATTENTE', max_length=10, verbose_name='Statut')),
+                ('fichier', models.FileField(blank=True, help_text='Dernière version générée', upload_to='ordres_mission/%Y/%m/', verbose_name='Fichier')),
+                ('empreinte', models.CharField(blank=True, help_text='Empreinte du contenu du fichier (ETag)', max_length=64, verbose_name='Empreinte SHA-256')),
+                ('taille', models.PositiveIntegerField(default=0, help_text='Taille du fichier en octets', verbose_name='Taille')),
+                ('tentatives', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('prochaine_tentative', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('derniere_erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('verrou', models.CharField(blank=True, max_length=32, verbose_name='Verrou')),
+                ('date_verrou', models.DateTimeField(blank=True, null=True, verbose_name='Date de réservation')),
+                ('date_demande', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de demande')),
+                ('date_generation', models.DateTimeField(blank=True, null=True, verbose_name='Date de génération')),
+                ('mission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents_pdf', to='missions.mission', verbose_name='Mission')),
+            ],
+            options={
+                'verbose_name': 'Document PDF',
+                'verbose_name_plural': 'Documents PDF',
+                'ordering': ['-date_demande'],
+                'indexes': [models.Index(condition=models.Q(('statut', 'EN_ATTENTE')), fields=['prochaine_tentative'], name='document_pdf_a_generer_idx')],
+                'constraints': [models.UniqueConstraint(fields=('mission', 'type'), name='document_pdf_mission_type_uniq')],
+            },
+        ),
+    ]
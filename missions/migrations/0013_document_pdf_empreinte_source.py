@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0012_documents_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentpdf',
+            name='empreinte_source',
+            field=models.CharField(blank=True, help_text='Empreinte SHA-256 des données rendues dans le fichier', max_length=64, verbose_name='Empreinte des données'),
+        ),
+    ]
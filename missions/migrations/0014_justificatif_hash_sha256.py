@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0013_document_pdf_empreinte_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='justificatif',
+            name='hash_sha256',
+            field=models.CharField(blank=True, help_text='Hash SHA-256 du fichier, calculé pendant le téléversement', max_length=64, verbose_name='Hash SHA-256'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:38
+
+import django.db.models.deletion
+import missions.models_fichiers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0014_justificatif_hash_sha256'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='justificatif',
+            name='fichier',
+            field=models.FileField(blank=True, help_text='Justificatif scanné ou photo', max_length=255, null=True, upload_to='justificatifs/%Y/%m/', verbose_name='Fichier'),
+        ),
+        migrations.CreateModel(
+            name='FichierStocke',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('fichier', models.FileField(max_length=255, upload_to=missions.models_fichiers.chemin_fichier_stocke, verbose_name='Fichier')),
+                ('taille', models.BigIntegerField(default=0, help_text='Taille du fichier en octets', verbose_name='Taille')),
+                ('type_mime', models.CharField(blank=True, max_length=100, verbose_name='Type MIME')),
+                ('references', models.PositiveIntegerField(default=0, help_text='Nombre de justificatifs utilisant ce contenu', verbose_name='Références')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+            ],
+            options={
+                'verbose_name': 'Fichier stocké',
+                'verbose_name_plural': 'Fichiers stockés',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(condition=models.Q(('references', 0)), fields=['date_modification'], name='fichier_stocke_orphelin_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='justificatif',
+            name='contenu',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='justificatifs', to='missions.fichierstocke', verbose_name='Contenu stocké'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+MONTANTS = ('nombre', 'budget_estime', 'avance_demandee', 'total_depenses', 'solde_calcule')
+
+
+def fusionner_doublons(apps, schema_editor):
+    """Fusionne les agrégats sans entité en double et supprime les agrégats vides."""
+    StatistiqueMission = apps.get_model('missions', 'StatistiqueMission')
+    doublons = (
+        StatistiqueMission.objects.filter(entite__isnull=True).order_by()
+        .values('type', 'statut', 'jour').annotate(lignes=models.Count('id')).filter(lignes__gt=1)
+    )
+    for doublon in doublons:
+        lignes = list(StatistiqueMission.objects.filter(
+            entite__isnull=True, type=doublon['type'], statut=doublon['statut'], jour=doublon['jour']
+        ).order_by('pk'))
+        conservee = lignes[0]
+        for champ in MONTANTS:
+            setattr(conservee, champ, sum(getattr(ligne, champ) for ligne in lignes))
+        conservee.save(update_fields=MONTANTS)
+        StatistiqueMission.objects.filter(pk__in=[ligne.pk for ligne in lignes[1:]]).delete()
+    StatistiqueMission.objects.filter(nombre__lte=0).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0015_fichiers_stockes'),
+        ('users', '0003_hierarchy_closure'),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionner_doublons, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='statistiquemission',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='statistiquemission',
+            constraint=models.UniqueConstraint(condition=models.Q(('entite__isnull', False)), fields=('entite', 'type', 'statut', 'jour'), name='statistique_mission_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistiquemission',
+            constraint=models.UniqueConstraint(condition=models.Q(('entite__isnull', True)), fields=('type', 'statut', 'jour'), name='statistique_mission_sans_entite_unique'),
+        ),
+    ]
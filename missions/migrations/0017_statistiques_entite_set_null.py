@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0016_statistiques_contraintes_uniques'),
+        ('users', '0003_hierarchy_closure'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statistiquemission',
+            name='entite',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statistiques_missions', to='users.entite', verbose_name='Entité'),
+        ),
+    ]
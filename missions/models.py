@@ -1,13 +1,21 @@
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from users.models import User
+from users.models import User, UserRole, UserClosure, EntiteClosure
+from users.permissions import ContextePermissions
 
 # Import des modèles supplémentaires
 from .models_vehicules import Vehicule, Bareme
 from .models_finance import Ticket, Avance, Depense
-from .models_documents import EtatDepenses, Notification, AuditLog
+from .models_documents import EtatDepenses, Notification, CompteurNotifications, AuditLog
+from .models_statistiques import StatistiqueMission
+from .models_sequences import SequenceReference
+from .models_echeances import ChangementEcheance
+from .models_emails import EmailSortant
+from .models_pdf import DocumentPDF
+from .models_fichiers import FichierStocke
 
 
 class MissionStatus(models.TextChoices):
@@ -28,6 +36,29 @@ class MissionType(models.TextChoices):
     AUTRE = 'AUTRE', _('Autre')
 
 
+class MissionQuerySet(models.QuerySet):
+    """QuerySet des missions avec filtrage hiérarchique."""
+
+    def visible_to(self, user, contexte=None):
+        """
+        Missions visibles par l'utilisateur : les siennes, celles de tous ses
+        subordonnés (directs et indirects) et celles des entités dont il est
+        responsable. Admins et DG voient tout. Les vues passent le contexte
+        de permissions de la requête (contexte_permissions).
+        """
+        contexte = contexte or ContextePermissions(user)
+        if contexte.voit_tout:
+            return self.all()
+
+        subordonnes = UserClosure.objects.filter(ancestor=user).values('descendant')
+        entites = EntiteClosure.objects.filter(ancestor__responsable=user).values('descendant')
+        return self.filter(
+            models.Q(createur=user) |
+            models.Q(createur__in=subordonnes) |
+            models.Q(entite__in=entites)
+        )
+
+
 class Mission(models.Model):
     """Modèle principal pour les missions."""
 
@@ -220,6 +251,14 @@ class Mission(models.Model):
     )
 
     # Clôture et archivage
+    total_depenses = models.DecimalField(
+        _('Total des dépenses'),
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text=_('Total des dépenses déclarées, calculé avec le solde')
+    )
+
     solde_calcule = models.DecimalField(
         _('Solde calculé'),
         max_digits=12,
@@ -257,10 +296,30 @@ class Mission(models.Model):
         auto_now_add=True
     )
 
+    objects = MissionQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Mission')
         verbose_name_plural = _('Missions')
         ordering = ['-date_creation']
+        indexes = [
+            # Listes « mes missions » / visible_to, triées par date de création
+            models.Index(fields=['createur', '-date_creation'], name='mission_createur_date_idx'),
+            models.Index(fields=['entite', '-date_creation'], name='mission_entite_date_idx'),
+            # Liste complète en mode curseur (date_creation, id)
+            models.Index(fields=['-date_creation', '-id'], name='mission_date_id_idx'),
+            # Timers : justificatifs en retard et missions à archiver
+            models.Index(
+                fields=['date_limite_justificatifs'],
+                name='mission_justif_retard_idx',
+                condition=models.Q(retour_declare=True, justificatifs_deposes=False),
+            ),
+            models.Index(
+                fields=['date_cloture'],
+                name='mission_a_archiver_idx',
+                condition=models.Q(cloturee=True, archivee=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.reference} - {self.titre}"
@@ -277,15 +336,62 @@ class Mission(models.Model):
         """Nombre de participants."""
         return self.participants.count()
 
+    def can_be_validated_by(self, user):
+        """Vérifie si l'utilisateur a une validation en attente sur cette mission."""
+        if self.statut != MissionStatus.EN_ATTENTE:
+            return False
+        return self.validations.filter(
+            valideur=user,
+            statut=ValidationStatus.EN_ATTENTE,
+            est_actif=True
+        ).exists()
+
     def save(self, *args, **kwargs):
         """Génère automatiquement une référence si elle n'existe pas."""
         if not self.reference:
-            # Génère une référence basée sur la date et un compteur
-            from django.utils import timezone
-            today = timezone.now().date()
-            count = Mission.objects.filter(date_creation__date=today).count() + 1
-            self.reference = f"MIS-{today.strftime('%Y%m%d')}-{count:03d}"
-        super().save(*args, **kwargs)
+            # Génère une référence basée sur la date et un compteur journalier
+            self.reference = SequenceReference.prochaine_reference('MIS', timezone.now().date())
+
+        ancienne = None if self._state.adding else self._statistique_en_base()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            nouvelle = self._contribution_statistique()
+            StatistiqueMission.remplacer(ancienne, nouvelle)
+        self._statistique = nouvelle
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Mémorise la contribution aux statistiques telle que chargée
+        if not instance.get_deferred_fields():
+            instance._statistique = instance._contribution_statistique()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._statistique = None
+
+    def _contribution_statistique(self):
+        """Clé d'agrégat et montants de la mission dans StatistiqueMission."""
+        return (
+            (self.entite_id, self.type, self.statut, self.date_debut),
+            tuple(Decimal(str(getattr(self, champ) or 0)) for champ in StatistiqueMission.MONTANTS),
+        )
+
+    def _statistique_en_base(self):
+        """Contribution actuellement enregistrée pour cette mission."""
+        contribution = getattr(self, '_statistique', None)
+        if contribution is not None:
+            return contribution
+        ancienne = Mission.objects.filter(pk=self.pk).values(
+            'entite_id', 'type', 'statut', 'date_debut', *StatistiqueMission.MONTANTS
+        ).first()
+        if ancienne is None:
+            return None
+        return (
+            (ancienne['entite_id'], ancienne['type'], ancienne['statut'], ancienne['date_debut']),
+            tuple(Decimal(str(ancienne[champ] or 0)) for champ in StatistiqueMission.MONTANTS),
+        )
 
 
 class MissionIntervenant(models.Model):
@@ -431,6 +537,17 @@ class SignatureFinanciere(models.Model):
         verbose_name_plural = _('Signatures financières')
         ordering = ['mission', 'ordre']
         unique_together = ['mission', 'niveau']
+        indexes = [
+            # Prochaine signature d'une mission et signatures d'un signataire
+            models.Index(fields=['mission', 'statut', 'ordre'], name='signature_mission_statut_idx'),
+            models.Index(fields=['signataire', 'statut', 'ordre'], name='signature_signataire_idx'),
+            # Timer : signatures en retard non relancées
+            models.Index(
+                fields=['date_limite_signature'],
+                name='signature_relance_idx',
+                condition=models.Q(statut='EN_ATTENTE', relance_effectuee=False),
+            ),
+        ]
 
     def __str__(self):
         return f"Signature {self.niveau} - {self.mission.titre}"
@@ -510,11 +627,30 @@ class Validation(models.Model):
         help_text=_('Indique si cette validation est toujours active')
     )
 
+    relance_effectuee = models.BooleanField(
+        _('Relance effectuée'),
+        default=False,
+        help_text=_('Une relance a-t-elle été envoyée après l\'échéance ?')
+    )
+
     class Meta:
         verbose_name = _('Validation')
         verbose_name_plural = _('Validations')
         ordering = ['mission', 'ordre']
         unique_together = ['mission', 'valideur', 'niveau']
+        indexes = [
+            # Prochaine validation d'une mission
+            models.Index(fields=['mission', 'statut', 'ordre'], name='validation_mission_statut_idx'),
+            models.Index(fields=['valideur', 'statut'], name='validation_valideur_statut_idx'),
+            # Liste en mode curseur (date_creation, id)
+            models.Index(fields=['statut', '-date_creation', '-id'], name='validation_statut_date_idx'),
+            # Validations en attente d'un valideur (annotation des listes)
+            models.Index(
+                fields=['valideur', 'mission'],
+                name='validation_en_attente_idx',
+                condition=models.Q(statut='EN_ATTENTE', est_actif=True),
+            ),
+        ]
 
     def __str__(self):
         return f"Validation {self.mission.titre} - {self.valideur.get_full_name()} ({self.niveau})"
@@ -586,6 +722,7 @@ class Justificatif(models.Model):
     fichier = models.FileField(
         _('Fichier'),
         upload_to='justificatifs/%Y/%m/',
+        max_length=255,
         blank=True,
         null=True,
         help_text=_('Justificatif scanné ou photo')
@@ -611,6 +748,23 @@ class Justificatif(models.Model):
         help_text=_('Hash MD5 du fichier pour vérification d\'intégrité')
     )
 
+    hash_sha256 = models.CharField(
+        _('Hash SHA-256'),
+        max_length=64,
+        blank=True,
+        help_text=_('Hash SHA-256 du fichier, calculé pendant le téléversement')
+    )
+
+    # Contenu dédupliqué : `fichier` pointe alors sur le fichier partagé du contenu
+    contenu = models.ForeignKey(
+        FichierStocke,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='justificatifs',
+        verbose_name=_('Contenu stocké')
+    )
+
     uploader = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -720,6 +874,11 @@ class Justificatif(models.Model):
         verbose_name = _('Justificatif')
         verbose_name_plural = _('Justificatifs')
         ordering = ['-date_creation']
+        indexes = [
+            # Liste en mode curseur (date_creation, id)
+            models.Index(fields=['-date_creation', '-id'], name='justificatif_date_id_idx'),
+            models.Index(fields=['intervenant', '-date_creation', '-id'], name='justificatif_interv_date_idx'),
+        ]
 
     def __str__(self):
         return f"Justificatif {self.mission.titre} - {self.intervenant.get_full_name()} - {self.montant} {self.devise}"
@@ -729,15 +888,12 @@ class Justificatif(models.Model):
         """Retourne le montant formaté."""
         return f"{self.montant:,.0f} {self.devise}"
 
-    def peut_etre_valide_par(self, user):
-        """Vérifie si l'utilisateur peut valider ce justificatif."""
-        if not user.can_validate:
-            return False
-
-        # Les validateurs peuvent valider les justificatifs de leur équipe
-        if user.role == 'CHEF_AGENCE':
-            return self.intervenant.manager == user or self.intervenant in user.get_subordinates()
-        elif user.role in ['RESPONSABLE_COPEC', 'DG', 'RH', 'COMPTABLE']:
-            return True
-
-        return False
\ No newline at end of file
+    def peut_etre_valide_par(self, user, contexte=None):
+        """
+        Vérifie si l'utilisateur peut valider ce justificatif. Passer le
+        contexte de permissions de la requête évite de recharger les
+        subordonnés à chaque justificatif.
+        """
+        if contexte is None:
+            contexte = ContextePermissions(user)
+        return contexte.peut_valider_justificatif(self)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from users.models import User
 
@@ -132,10 +132,113 @@ class Notification(models.Model):
         verbose_name = _('Notification')
         verbose_name_plural = _('Notifications')
         ordering = ['-date_creation']
+        indexes = [
+            # Fil paginé par curseur sur (date_creation, id)
+            models.Index(fields=['destinataire', '-date_creation', '-id'], name='notification_dest_date_idx'),
+            # Notifications non lues d'un utilisateur
+            models.Index(
+                fields=['destinataire', '-date_creation'],
+                name='notification_non_lue_idx',
+                condition=models.Q(lue=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.titre} - {self.destinataire.get_full_name()}"
 
+    def save(self, *args, **kwargs):
+        creation = self._state.adding
+        # Compteur ajusté dans la transaction de l'insertion (voir CompteurNotifications.lire)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creation and not self.lue:
+                CompteurNotifications.ajuster([self.destinataire_id], 1)
+
+
+class CompteurNotifications(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur (badge du frontend).
+
+    Ajusté à chaque création ou lecture de notification ; une ligne absente
+    est initialisée par un COUNT à la première lecture du compteur. Tant
+    qu'elle manque, initialisation et ajustements verrouillent la ligne de
+    l'utilisateur : un ajustement concurrent attend la fin du COUNT (puis
+    s'applique à la nouvelle ligne), ou le COUNT attend la validation de la
+    transaction qui a ajusté (et en voit les notifications).
+    """
+
+    utilisateur = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='compteur_notifications',
+        verbose_name=_('Utilisateur')
+    )
+
+    non_lues = models.IntegerField(
+        _('Notifications non lues'),
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('Compteur de notifications')
+        verbose_name_plural = _('Compteurs de notifications')
+
+    def __str__(self):
+        return f"{self.utilisateur_id}: {self.non_lues} non lues"
+
+    @classmethod
+    def ajuster(cls, utilisateur_ids, delta):
+        """
+        Ajoute `delta` aux compteurs des utilisateurs donnés. À appeler dans
+        la transaction qui crée ou modifie les notifications.
+        """
+        if not delta:
+            return
+        utilisateur_ids = set(utilisateur_ids)
+        with transaction.atomic():
+            existants = set(cls.objects.filter(utilisateur_id__in=utilisateur_ids).values_list('pk', flat=True))
+            if existants != utilisateur_ids:
+                # Compteurs absents : même verrou que leur initialisation (lire)
+                cls._verrouiller(utilisateur_ids - existants)
+            cls.objects.filter(utilisateur_id__in=utilisateur_ids).update(
+                non_lues=models.F('non_lues') + delta
+            )
+
+    @classmethod
+    def lire(cls, utilisateur_id):
+        """Nombre de non lues : une lecture par clé primaire, un COUNT la première fois."""
+        non_lues = cls.objects.filter(pk=utilisateur_id).values_list('non_lues', flat=True).first()
+        if non_lues is not None:
+            return non_lues
+        with transaction.atomic():
+            cls._verrouiller([utilisateur_id])
+            non_lues = cls.objects.filter(pk=utilisateur_id).values_list('non_lues', flat=True).first()
+            if non_lues is None:
+                non_lues = Notification.objects.filter(destinataire_id=utilisateur_id, lue=False).count()
+                cls.objects.create(utilisateur_id=utilisateur_id, non_lues=non_lues)
+        return non_lues
+
+    @staticmethod
+    def _verrouiller(utilisateur_ids):
+        list(User.objects.select_for_update().filter(pk__in=utilisateur_ids).values_list('pk', flat=True))
+
+    @classmethod
+    def reconstruire(cls):
+        """Recalcule tous les compteurs ; retourne le nombre d'utilisateurs concernés."""
+        with transaction.atomic():
+            cls.objects.all().delete()
+            comptes = (
+                Notification.objects.filter(lue=False)
+                .values('destinataire_id')
+                .annotate(nombre=models.Count('id'))
+                .order_by()
+            )
+            return len(cls.objects.bulk_create(
+                [cls(utilisateur_id=ligne['destinataire_id'], non_lues=ligne['nombre']) for ligne in comptes],
+                batch_size=1000
+            ))
+
 
 class AuditLog(models.Model):
     """Modèle pour les logs d'audit."""
@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ChangementEcheance(models.Model):
+    """
+    Flux des objets dont une échéance a pu changer.
+
+    Alimenté quand une sauvegarde de mission, validation ou signature modifie
+    un champ lu par l'échéancier (`run_timer_scheduler`), qui ne relit que
+    les objets listés ici au lieu de rebalayer les tables. Les changements
+    non consommés (échéancier arrêté) sont purgés par `check_timers`.
+    """
+
+    # Champs lus par l'échéancier (missions.scheduler), par modèle
+    CHAMPS_SUIVIS = {
+        'mission': (
+            'retour_declare', 'justificatifs_deposes', 'relance_justificatifs',
+            'date_derniere_relance_justificatifs', 'date_limite_justificatifs', 'createur',
+            'cloturee', 'archivee', 'date_cloture',
+        ),
+        'validation': ('statut', 'est_actif', 'relance_effectuee', 'date_echeance'),
+        'signaturefinanciere': ('statut', 'relance_effectuee', 'date_limite_signature'),
+    }
+
+    # Durée de conservation des changements non consommés
+    RETENTION = timezone.timedelta(days=1)
+
+    modele = models.CharField(
+        _('Modèle'),
+        max_length=50
+    )
+
+    objet_id = models.PositiveBigIntegerField(
+        _('Identifiant de l\'objet')
+    )
+
+    date_creation = models.DateTimeField(
+        _('Date de création'),
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _('Changement d\'échéance')
+        verbose_name_plural = _('Changements d\'échéances')
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.modele} #{self.objet_id}"
+
+    @classmethod
+    def purger(cls, avant=None):
+        """Supprime les changements plus anciens que `avant` ; retourne leur nombre."""
+        avant = avant or timezone.now() - cls.RETENTION
+        nombre, _ = cls.objects.filter(date_creation__lt=avant).delete()
+        return nombre
@@ -0,0 +1,125 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class EmailSortant(models.Model):
+    """
+    File d'attente des e-mails sortants.
+
+    Les services y écrivent dans leur propre transaction (un e-mail n'existe
+    que si l'opération qui le déclenche est validée) ; la commande
+    `process_email_outbox` les envoie, avec nouvelles tentatives espacées.
+    """
+
+    STATUTS = [
+        ('EN_ATTENTE', _('En attente')),
+        ('EN_COURS', _('En cours d\'envoi')),
+        ('ENVOYE', _('Envoyé')),
+        ('ECHEC', _('Échec définitif')),
+    ]
+
+    sujet = models.CharField(
+        _('Sujet'),
+        max_length=255
+    )
+
+    corps_texte = models.TextField(
+        _('Corps texte')
+    )
+
+    corps_html = models.TextField(
+        _('Corps HTML'),
+        blank=True
+    )
+
+    expediteur = models.CharField(
+        _('Expéditeur'),
+        max_length=254
+    )
+
+    destinataires = models.JSONField(
+        _('Destinataires'),
+        default=list
+    )
+
+    # Les e-mails d'une même catégorie et des mêmes destinataires peuvent être
+    # regroupés en un récapitulatif (voir missions.outbox.RECAPITULATIFS)
+    categorie = models.CharField(
+        _('Catégorie'),
+        max_length=30,
+        blank=True
+    )
+
+    cle_regroupement = models.CharField(
+        _('Clé de regroupement'),
+        max_length=255,
+        blank=True
+    )
+
+    statut = models.CharField(
+        _('Statut'),
+        max_length=10,
+        choices=STATUTS,
+        default='EN_ATTENTE'
+    )
+
+    tentatives = models.PositiveIntegerField(
+        _('Tentatives'),
+        default=0
+    )
+
+    prochaine_tentative = models.DateTimeField(
+        _('Prochaine tentative'),
+        default=timezone.now
+    )
+
+    derniere_erreur = models.TextField(
+        _('Dernière erreur'),
+        blank=True
+    )
+
+    # Réservation par un worker (jeton et date) pour éviter les doubles envois
+    verrou = models.CharField(
+        _('Verrou'),
+        max_length=32,
+        blank=True
+    )
+
+    date_verrou = models.DateTimeField(
+        _('Date de réservation'),
+        null=True,
+        blank=True
+    )
+
+    date_creation = models.DateTimeField(
+        _('Date de création'),
+        auto_now_add=True
+    )
+
+    date_envoi = models.DateTimeField(
+        _('Date d\'envoi'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = _('E-mail sortant')
+        verbose_name_plural = _('E-mails sortants')
+        ordering = ['-date_creation']
+        indexes = [
+            # E-mails à envoyer, par date de prochaine tentative
+            models.Index(
+                fields=['prochaine_tentative'],
+                name='email_a_envoyer_idx',
+                condition=models.Q(statut='EN_ATTENTE'),
+            ),
+            models.Index(
+                fields=['cle_regroupement'],
+                name='email_a_regrouper_idx',
+                condition=models.Q(statut='EN_ATTENTE') & ~models.Q(cle_regroupement=''),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sujet} → {', '.join(self.destinataires)} ({self.statut})"
@@ -0,0 +1,75 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+def chemin_fichier_stocke(instance, filename):
+    """Chemin adressé par le contenu : justificatifs/contenus/ab/cd/<sha256>.<ext>."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'bin'
+    return f"justificatifs/contenus/{instance.sha256[:2]}/{instance.sha256[2:4]}/{instance.sha256}.{extension}"
+
+
+class FichierStocke(models.Model):
+    """
+    Contenu de fichier justificatif, stocké une seule fois.
+
+    Les justificatifs au contenu identique (même SHA-256) partagent la même
+    ligne et le même fichier ; `references` compte les justificatifs qui
+    l'utilisent. Le dernier libéré emporte la ligne et le fichier (voir
+    missions.stockage).
+    """
+
+    sha256 = models.CharField(
+        _('SHA-256'),
+        max_length=64,
+        unique=True
+    )
+
+    fichier = models.FileField(
+        _('Fichier'),
+        upload_to=chemin_fichier_stocke,
+        max_length=255
+    )
+
+    taille = models.BigIntegerField(
+        _('Taille'),
+        default=0,
+        help_text=_('Taille du fichier en octets')
+    )
+
+    type_mime = models.CharField(
+        _('Type MIME'),
+        max_length=100,
+        blank=True
+    )
+
+    references = models.PositiveIntegerField(
+        _('Références'),
+        default=0,
+        help_text=_('Nombre de justificatifs utilisant ce contenu')
+    )
+
+    date_creation = models.DateTimeField(
+        _('Date de création'),
+        auto_now_add=True
+    )
+
+    date_modification = models.DateTimeField(
+        _('Date de modification'),
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = _('Fichier stocké')
+        verbose_name_plural = _('Fichiers stockés')
+        ordering = ['-date_creation']
+        indexes = [
+            # Contenus sans référence, à collecter
+            models.Index(
+                fields=['date_modification'],
+                name='fichier_stocke_orphelin_idx',
+                condition=models.Q(references=0),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.references} références)"
@@ -145,6 +145,11 @@ class Avance(models.Model):
         verbose_name = _('Avance')
         verbose_name_plural = _('Avances')
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['beneficiaire', '-date_creation'], name='avance_beneficiaire_date_idx'),
+            # Liste complète en mode curseur (date_creation, id)
+            models.Index(fields=['-date_creation', '-id'], name='avance_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"Avance {self.montant} FCFA - {self.mission.titre}"
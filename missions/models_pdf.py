@@ -0,0 +1,134 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class DocumentPDF(models.Model):
+    """
+    Document PDF généré pour une mission (ordre de mission).
+
+    Une ligne par (mission, type) sert à la fois de demande de génération
+    et d'artefact : les services la remettent EN_ATTENTE dans leur
+    transaction, la commande `process_pdf_jobs` la rend hors des requêtes
+    et enregistre le fichier, nommé d'après l'empreinte SHA-256 de son
+    contenu (servie comme ETag au téléchargement). Si les données affichées
+    n'ont pas changé (`empreinte_source`), le fichier existant est conservé.
+    """
+
+    TYPES = [
+        ('ORDRE_MISSION', _('Ordre de mission')),
+    ]
+
+    STATUTS = [
+        ('EN_ATTENTE', _('En attente')),
+        ('EN_COURS', _('En cours de génération')),
+        ('PRET', _('Prêt')),
+        ('ECHEC', _('Échec définitif')),
+    ]
+
+    mission = models.ForeignKey(
+        'Mission',
+        on_delete=models.CASCADE,
+        related_name='documents_pdf',
+        verbose_name=_('Mission')
+    )
+
+    type = models.CharField(
+        _('Type'),
+        max_length=20,
+        choices=TYPES,
+        default='ORDRE_MISSION'
+    )
+
+    statut = models.CharField(
+        _('Statut'),
+        max_length=10,
+        choices=STATUTS,
+        default='EN_ATTENTE'
+    )
+
+    fichier = models.FileField(
+        _('Fichier'),
+        upload_to='ordres_mission/%Y/%m/',
+        blank=True,
+        help_text=_('Dernière version générée')
+    )
+
+    empreinte = models.CharField(
+        _('Empreinte SHA-256'),
+        max_length=64,
+        blank=True,
+        help_text=_('Empreinte du contenu du fichier (ETag)')
+    )
+
+    # Empreinte des données affichées : inchangée, le fichier est resservi sans rendu
+    empreinte_source = models.CharField(
+        _('Empreinte des données'),
+        max_length=64,
+        blank=True,
+        help_text=_('Empreinte SHA-256 des données rendues dans le fichier')
+    )
+
+    taille = models.PositiveIntegerField(
+        _('Taille'),
+        default=0,
+        help_text=_('Taille du fichier en octets')
+    )
+
+    tentatives = models.PositiveIntegerField(
+        _('Tentatives'),
+        default=0
+    )
+
+    prochaine_tentative = models.DateTimeField(
+        _('Prochaine tentative'),
+        default=timezone.now
+    )
+
+    derniere_erreur = models.TextField(
+        _('Dernière erreur'),
+        blank=True
+    )
+
+    # Réservation par un worker (jeton et date) pour éviter les doubles rendus
+    verrou = models.CharField(
+        _('Verrou'),
+        max_length=32,
+        blank=True
+    )
+
+    date_verrou = models.DateTimeField(
+        _('Date de réservation'),
+        null=True,
+        blank=True
+    )
+
+    date_demande = models.DateTimeField(
+        _('Date de demande'),
+        default=timezone.now
+    )
+
+    date_generation = models.DateTimeField(
+        _('Date de génération'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = _('Document PDF')
+        verbose_name_plural = _('Documents PDF')
+        ordering = ['-date_demande']
+        constraints = [
+            models.UniqueConstraint(fields=['mission', 'type'], name='document_pdf_mission_type_uniq'),
+        ]
+        indexes = [
+            # Documents à générer, par date de prochaine tentative
+            models.Index(
+                fields=['prochaine_tentative'],
+                name='document_pdf_a_generer_idx',
+                condition=models.Q(statut='EN_ATTENTE'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_display()} - {self.mission_id} ({self.statut})"
@@ -0,0 +1,62 @@
+from django.db import models, transaction
+from django.utils.translation import gettext_lazy as _
+
+
+class SequenceReference(models.Model):
+    """
+    Compteur journalier des références (ex. MIS-20260115-001).
+
+    Une ligne par (préfixe, jour) incrémentée atomiquement : l'UPDATE
+    verrouille la ligne jusqu'à la fin de la transaction, deux créations
+    concurrentes obtiennent donc toujours des numéros distincts.
+    """
+
+    prefixe = models.CharField(
+        _('Préfixe'),
+        max_length=10
+    )
+
+    jour = models.DateField(
+        _('Jour')
+    )
+
+    valeur = models.PositiveIntegerField(
+        _('Dernière valeur attribuée'),
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('Séquence de références')
+        verbose_name_plural = _('Séquences de références')
+        unique_together = ['prefixe', 'jour']
+
+    def __str__(self):
+        return f"{self.prefixe}-{self.jour:%Y%m%d}: {self.valeur}"
+
+    @classmethod
+    def reserver(cls, prefixe, jour, nombre=1):
+        """Réserve `nombre` valeurs consécutives du compteur du jour (range)."""
+        compteur = cls.objects.filter(prefixe=prefixe, jour=jour)
+        with transaction.atomic():
+            if not compteur.update(valeur=models.F('valeur') + nombre):
+                # Premier numéro du jour : crée la ligne sans conflit
+                # possible, puis incrémente comme les autres
+                cls.objects.bulk_create([cls(prefixe=prefixe, jour=jour)], ignore_conflicts=True)
+                compteur.update(valeur=models.F('valeur') + nombre)
+            derniere = compteur.values_list('valeur', flat=True).get()
+        return range(derniere - nombre + 1, derniere + 1)
+
+    @classmethod
+    def suivant(cls, prefixe, jour):
+        """Réserve et retourne la prochaine valeur du compteur du jour."""
+        return cls.reserver(prefixe, jour)[0]
+
+    @classmethod
+    def prochaines_references(cls, prefixe, jour, nombre):
+        """Réserve `nombre` références formatées `PREFIXE-AAAAMMJJ-NNN`."""
+        return [f"{prefixe}-{jour:%Y%m%d}-{valeur:03d}" for valeur in cls.reserver(prefixe, jour, nombre)]
+
+    @classmethod
+    def prochaine_reference(cls, prefixe, jour):
+        """Référence formatée `PREFIXE-AAAAMMJJ-NNN`."""
+        return cls.prochaines_references(prefixe, jour, 1)[0]
@@ -0,0 +1,198 @@
+from django.db import IntegrityError, models, transaction
+from django.utils.translation import gettext_lazy as _
+
+
+class StatistiqueMission(models.Model):
+    """
+    Agrégat matérialisé des missions par (entité, type, statut, jour).
+
+    Maintenu incrémentalement à chaque sauvegarde ou suppression de mission,
+    et reconstruit par la commande `rebuild_mission_stats`.
+    """
+
+    # Champs de Mission sommés dans chaque agrégat
+    MONTANTS = ('budget_estime', 'avance_demandee', 'total_depenses', 'solde_calcule')
+
+    entite = models.ForeignKey(
+        'users.Entite',
+        # Comme Mission.entite ; les agrégats sont d'abord fusionnés (detacher_entite)
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='statistiques_missions',
+        verbose_name=_('Entité')
+    )
+
+    type = models.CharField(
+        _('Type de mission'),
+        max_length=20
+    )
+
+    statut = models.CharField(
+        _('Statut'),
+        max_length=15
+    )
+
+    jour = models.DateField(
+        _('Jour'),
+        help_text=_('Date de début des missions agrégées')
+    )
+
+    nombre = models.IntegerField(
+        _('Nombre de missions'),
+        default=0
+    )
+
+    budget_estime = models.DecimalField(
+        _('Budget estimé'),
+        max_digits=16,
+        decimal_places=2,
+        default=0
+    )
+
+    avance_demandee = models.DecimalField(
+        _('Avances demandées'),
+        max_digits=16,
+        decimal_places=2,
+        default=0
+    )
+
+    total_depenses = models.DecimalField(
+        _('Total des dépenses'),
+        max_digits=16,
+        decimal_places=2,
+        default=0
+    )
+
+    solde_calcule = models.DecimalField(
+        _('Solde'),
+        max_digits=16,
+        decimal_places=2,
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('Statistique de missions')
+        verbose_name_plural = _('Statistiques de missions')
+        ordering = ['jour']
+        # Une ligne par agrégat, y compris sans entité : les NULL étant distincts
+        # dans une contrainte unique (et nulls_distinct non pris en charge par
+        # SQLite), l'agrégat sans entité a sa propre contrainte partielle
+        constraints = [
+            models.UniqueConstraint(
+                fields=['entite', 'type', 'statut', 'jour'],
+                condition=models.Q(entite__isnull=False),
+                name='statistique_mission_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['type', 'statut', 'jour'],
+                condition=models.Q(entite__isnull=True),
+                name='statistique_mission_sans_entite_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} {self.type} {self.statut}: {self.nombre}"
+
+    @classmethod
+    def appliquer(cls, contribution, signe=1):
+        """Ajoute (signe=1) ou retire (signe=-1) la contribution d'une mission."""
+        cle, valeurs = contribution
+        cls._incrementer(cle, signe, tuple(signe * valeur for valeur in valeurs))
+
+    @classmethod
+    def ajouter_missions(cls, missions):
+        """Ajoute des missions créées sans `save()` (ex. `bulk_create`)."""
+        totaux = {}
+        for mission in missions:
+            cle, valeurs = mission._contribution_statistique()
+            nombre, sommes = totaux.get(cle, (0, (0,) * len(cls.MONTANTS)))
+            totaux[cle] = (nombre + 1, tuple(a + b for a, b in zip(sommes, valeurs)))
+        for cle, (nombre, sommes) in totaux.items():
+            cls._incrementer(cle, nombre, sommes)
+
+    @classmethod
+    def _incrementer(cls, cle, nombre, valeurs):
+        """Incrémente l'agrégat `cle`, en le créant au besoin ; un agrégat vidé est supprimé."""
+        entite_id, type_mission, statut, jour = cle
+        increments = {'nombre': models.F('nombre') + nombre}
+        for champ, valeur in zip(cls.MONTANTS, valeurs):
+            increments[champ] = models.F(champ) + valeur
+
+        lookup = {'entite_id': entite_id, 'type': type_mission, 'statut': statut, 'jour': jour}
+        if cls.objects.filter(**lookup).update(**increments):
+            if nombre < 0:
+                cls.objects.filter(**lookup, nombre__lte=0).delete()
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(nombre=nombre, **lookup, **dict(zip(cls.MONTANTS, valeurs)))
+        except IntegrityError:
+            # Créé entre-temps par une autre transaction
+            cls.objects.filter(**lookup).update(**increments)
+
+    @classmethod
+    def remplacer(cls, ancienne, nouvelle):
+        """Remplace l'ancienne contribution d'une mission par la nouvelle."""
+        if ancienne == nouvelle:
+            return
+        if ancienne is not None and nouvelle is not None and ancienne[0] == nouvelle[0]:
+            # Même agrégat : un seul UPDATE avec les différences
+            delta = tuple(n - a for a, n in zip(ancienne[1], nouvelle[1]))
+            cle = ancienne[0]
+            increments = {
+                champ: models.F(champ) + valeur
+                for champ, valeur in zip(cls.MONTANTS, delta) if valeur
+            }
+            entite_id, type_mission, statut, jour = cle
+            cls.objects.filter(entite_id=entite_id, type=type_mission, statut=statut, jour=jour).update(**increments)
+            return
+        if ancienne is not None:
+            cls.appliquer(ancienne, -1)
+        if nouvelle is not None:
+            cls.appliquer(nouvelle, 1)
+
+    @classmethod
+    def detacher_entite(cls, entite_id):
+        """
+        Fusionne les agrégats d'une entité supprimée dans ceux sans entité,
+        comme ses missions (Mission.entite passe à NULL).
+        """
+        with transaction.atomic():
+            agregats = list(cls.objects.select_for_update().filter(entite_id=entite_id))
+            cls.objects.filter(pk__in=[agregat.pk for agregat in agregats]).delete()
+            for agregat in agregats:
+                cls._incrementer(
+                    (None, agregat.type, agregat.statut, agregat.jour),
+                    agregat.nombre,
+                    tuple(getattr(agregat, champ) for champ in cls.MONTANTS)
+                )
+        return len(agregats)
+
+    @classmethod
+    def reconstruire(cls):
+        """Recalcule tous les agrégats à partir de la table des missions."""
+        from .models import Mission
+
+        sommes = {f'somme_{champ}': models.Sum(champ) for champ in cls.MONTANTS}
+        lignes = Mission.objects.order_by().values(
+            'entite_id', 'type', 'statut', 'date_debut'
+        ).annotate(nombre_missions=models.Count('id'), **sommes)
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            agregats = cls.objects.bulk_create(
+                (
+                    cls(
+                        entite_id=ligne['entite_id'],
+                        type=ligne['type'],
+                        statut=ligne['statut'],
+                        jour=ligne['date_debut'],
+                        nombre=ligne['nombre_missions'],
+                        **{champ: ligne[f'somme_{champ}'] or 0 for champ in cls.MONTANTS}
+                    )
+                    for ligne in lignes.iterator()
+                ),
+                batch_size=1000
+            )
+        return len(agregats)
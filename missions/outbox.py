@@ -0,0 +1,253 @@
+"""
+File d'envoi des e-mails (EmailSortant)
+
+`mettre_en_file` remplace `send_mail` dans les services : l'e-mail est une
+ligne écrite dans la transaction en cours, l'envoi SMTP a lieu plus tard dans
+le worker `process_email_outbox`, hors des requêtes et des verrous.
+
+Les e-mails d'une catégorie de RECAPITULATIFS attendent la fenêtre
+EMAIL_RECAPITULATIF_FENETRE_SECONDES ; tous ceux d'un même destinataire
+encore en file partent alors en un seul récapitulatif.
+"""
+import logging
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import models
+from django.utils import timezone
+
+from .emails import registre
+from .models import EmailSortant
+
+logger = logging.getLogger(__name__)
+
+
+# Catégories regroupables : libellés (singulier, pluriel) du récapitulatif
+RECAPITULATIFS = {
+    'validation': ('validation en attente', 'validations en attente'),
+    'signature': ('signature en attente', 'signatures en attente'),
+    'relance_validation': ('validation en retard', 'validations en retard'),
+    'relance_signature': ('signature en retard', 'signatures en retard'),
+}
+
+
+def email_sortant(subject, message, from_email, recipient_list, html_message=None, categorie=''):
+    """E-mail non enregistré (pour `bulk_create`), ou None sans destinataire."""
+    destinataires = [adresse for adresse in recipient_list if adresse]
+    if not destinataires:
+        return None
+    email = EmailSortant(
+        sujet=subject[:255],
+        corps_texte=message,
+        corps_html=html_message or '',
+        expediteur=from_email or settings.DEFAULT_FROM_EMAIL,
+        destinataires=destinataires,
+        categorie=categorie,
+    )
+    fenetre = settings.EMAIL_RECAPITULATIF_FENETRE_SECONDES
+    if categorie in RECAPITULATIFS and fenetre > 0:
+        email.cle_regroupement = f"{categorie}:{','.join(sorted(destinataires))}"[:255]
+        email.prochaine_tentative = timezone.now() + timezone.timedelta(seconds=fenetre)
+    return email
+
+
+def mettre_en_file(subject, message, from_email, recipient_list, html_message=None, categorie=''):
+    """Même signature que `send_mail` : enregistre l'e-mail dans la file."""
+    email = email_sortant(subject, message, from_email, recipient_list, html_message, categorie)
+    if email is not None:
+        email.save()
+    return email
+
+
+def mettre_en_file_lot(emails):
+    """Enregistre une liste d'e-mails (issus de `email_sortant`) en une requête."""
+    emails = [email for email in emails if email is not None]
+    if emails:
+        EmailSortant.objects.bulk_create(emails)
+    return len(emails)
+
+
+class OutboxWorker:
+    """
+    Envoie les e-mails de la file sur un pool de connexions SMTP, ouvertes
+    une fois et réutilisées d'un lot à l'autre.
+
+    Un lot est réservé par un UPDATE portant un jeton unique, ce qui permet
+    plusieurs workers en parallèle ; une réservation plus vieille que
+    `EXPIRATION_VERROU` (worker arrêté en plein envoi) est reprise.
+    """
+
+    EXPIRATION_VERROU = timezone.timedelta(minutes=10)
+
+    def __init__(self, connexions=4, taille_lot=100, max_tentatives=None, delai_secondes=None):
+        self.taille_lot = taille_lot
+        if max_tentatives is None:
+            max_tentatives = settings.EMAIL_OUTBOX_MAX_TENTATIVES
+        if delai_secondes is None:
+            delai_secondes = settings.EMAIL_OUTBOX_DELAI_SECONDES
+        self.max_tentatives = max_tentatives
+        self.delai_secondes = delai_secondes
+        self.nombre_connexions = connexions
+        self.executor = ThreadPoolExecutor(max_workers=connexions, thread_name_prefix='outbox')
+        self.connexions = queue.Queue()
+        for _ in range(connexions):
+            self.connexions.put(None)
+
+    def reserver(self, now):
+        """Réserve le prochain lot d'e-mails à envoyer."""
+        a_envoyer = (
+            models.Q(statut='EN_ATTENTE', prochaine_tentative__lte=now) |
+            models.Q(statut='EN_COURS', date_verrou__lt=now - self.EXPIRATION_VERROU)
+        )
+        candidats = list(
+            EmailSortant.objects.filter(a_envoyer)
+            .order_by('prochaine_tentative')
+            .values_list('pk', flat=True)[:self.taille_lot]
+        )
+        if not candidats:
+            return []
+
+        jeton = uuid.uuid4().hex
+        EmailSortant.objects.filter(a_envoyer, pk__in=candidats).update(
+            statut='EN_COURS', verrou=jeton, date_verrou=now
+        )
+        # Un e-mail regroupable arrivé à échéance emporte ceux, plus récents,
+        # du même destinataire et de la même catégorie
+        cles = set(
+            EmailSortant.objects.filter(verrou=jeton).exclude(cle_regroupement='')
+            .values_list('cle_regroupement', flat=True)
+        )
+        if cles:
+            EmailSortant.objects.filter(statut='EN_ATTENTE', cle_regroupement__in=cles).update(
+                statut='EN_COURS', verrou=jeton, date_verrou=now
+            )
+        return list(EmailSortant.objects.filter(verrou=jeton, statut='EN_COURS').order_by('date_creation'))
+
+    @staticmethod
+    def regrouper(emails):
+        """Liste de (message, e-mails couverts) : un récapitulatif par clé de regroupement."""
+        groupes = {}
+        envois = []
+        for email in emails:
+            if email.cle_regroupement:
+                groupes.setdefault(email.cle_regroupement, []).append(email)
+            else:
+                envois.append((OutboxWorker._message(email), [email]))
+        for groupe in groupes.values():
+            message = OutboxWorker._message(groupe[0]) if len(groupe) == 1 else OutboxWorker._recapitulatif(groupe)
+            envois.append((message, groupe))
+        return envois
+
+    @staticmethod
+    def _message(email):
+        message = EmailMultiAlternatives(email.sujet, email.corps_texte, email.expediteur, email.destinataires)
+        if email.corps_html:
+            message.attach_alternative(email.corps_html, 'text/html')
+        return message
+
+    @staticmethod
+    def _recapitulatif(emails):
+        """Un seul e-mail reprenant tous ceux du groupe."""
+        singulier, pluriel = RECAPITULATIFS[emails[0].categorie]
+        sujet, texte, html = registre.rendre('recapitulatif', {
+            'sujet': f"{len(emails)} {pluriel if len(emails) > 1 else singulier}",
+            'emails': emails,
+        })
+        message = EmailMultiAlternatives(sujet, texte, emails[0].expediteur, emails[0].destinataires)
+        message.attach_alternative(html, 'text/html')
+        return message
+
+    def traiter_lot(self):
+        """Envoie un lot ; retourne (envoyés, échecs)."""
+        emails = self.reserver(timezone.now())
+        if not emails:
+            return 0, 0
+
+        envois = self.regrouper(emails)
+        # Une tranche d'envois par connexion du pool, envoyée d'un bloc
+        tranches = [envois[i::self.nombre_connexions] for i in range(self.nombre_connexions)]
+        resultats = {}
+        for tranche, erreurs in zip(tranches, self.executor.map(self._envoyer_tranche, tranches)):
+            for (_, couverts), erreur in zip(tranche, erreurs):
+                for email in couverts:
+                    resultats[email.pk] = erreur
+        now = timezone.now()
+
+        envoyes = [email.pk for email in emails if resultats[email.pk] is None]
+        EmailSortant.objects.filter(pk__in=envoyes).update(
+            statut='ENVOYE', date_envoi=now, verrou='', derniere_erreur=''
+        )
+
+        echecs = [(email, resultats[email.pk]) for email in emails if resultats[email.pk] is not None]
+        for email, erreur in echecs:
+            tentatives = email.tentatives + 1
+            definitif = tentatives >= self.max_tentatives
+            EmailSortant.objects.filter(pk=email.pk).update(
+                statut='ECHEC' if definitif else 'EN_ATTENTE',
+                tentatives=tentatives,
+                prochaine_tentative=now + timezone.timedelta(seconds=self.delai_secondes * 2 ** (tentatives - 1)),
+                derniere_erreur=erreur,
+                verrou=''
+            )
+            logger.warning(f"Échec d'envoi de l'e-mail {email.pk} (tentative {tentatives}): {erreur}")
+
+        return len(envoyes), len(echecs)
+
+    def _envoyer_tranche(self, envois):
+        """
+        Envoie une tranche de messages sur une même connexion du pool ;
+        retourne l'erreur (ou None) de chaque message.
+        """
+        if not envois:
+            return []
+        connexion = self.connexions.get()
+        erreurs = []
+        try:
+            for message, _ in envois:
+                try:
+                    if connexion is None:
+                        connexion = get_connection(fail_silently=False)
+                        connexion.open()
+                    message.connection = connexion
+                    message.send()
+                    erreurs.append(None)
+                except Exception as e:
+                    # Connexion peut-être rompue : la suivante sera rouverte
+                    if connexion is not None:
+                        try:
+                            connexion.close()
+                        except Exception:
+                            pass
+                    connexion = None
+                    erreurs.append(repr(e))
+        finally:
+            self.connexions.put(connexion)
+        return erreurs
+
+    def executer(self, intervalle=2, une_fois=False, arret=None):
+        """Envoie les lots disponibles, puis attend `intervalle` secondes si la file est vide."""
+        arret = arret or threading.Event()
+        total = [0, 0]
+        try:
+            while not arret.is_set():
+                envoyes, echecs = self.traiter_lot()
+                total[0] += envoyes
+                total[1] += echecs
+                if envoyes + echecs == 0:
+                    if une_fois:
+                        break
+                    arret.wait(intervalle)
+        finally:
+            self.fermer()
+        return tuple(total)
+
+    def fermer(self):
+        self.executor.shutdown()
+        while not self.connexions.empty():
+            connexion = self.connexions.get()
+            if connexion is not None:
+                connexion.close()
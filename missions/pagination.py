@@ -0,0 +1,254 @@
+"""
+Pagination par curseur (keyset) pour les listes longues
+
+Au lieu d'un OFFSET, dont le coût croît avec le numéro de page, chaque page
+reprend après la dernière ligne servie : `WHERE (date, id) < (d, i)` sur un
+index couvrant l'ordre de tri. Le curseur est opaque pour le client.
+
+Les listes paginées par numéro de page comptent leurs lignes une fois par
+(périmètre, filtres) : le COUNT est mis en cache, invalidé à chaque écriture
+du modèle, ou remplacé par l'estimation du planificateur PostgreSQL pour les
+grandes tables sans filtre.
+"""
+import base64
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Ordre des listes chronologiques : plus récentes d'abord, ex aequo départagés
+# par id dans le même sens. Les deux colonnes descendent, comme les index
+# composites (-date_creation, -id) : une seule lecture d'index sert la page,
+# et l'ordre n'est qu'une précision du tri par défaut des modèles.
+ORDRE_CHRONOLOGIQUE = ('-date_creation', '-id')
+
+
+def encoder_curseur(valeurs):
+    """Curseur opaque à partir des valeurs de tri d'une ligne."""
+    texte = json.dumps([valeur.isoformat() if hasattr(valeur, 'isoformat') else valeur for valeur in valeurs])
+    return base64.urlsafe_b64encode(texte.encode()).decode().rstrip('=')
+
+
+def decoder_curseur(curseur, modele, champs):
+    """Valeurs de tri (converties par les champs du modèle) ; ValueError si le curseur est invalide."""
+    try:
+        texte = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)).decode()
+        valeurs = json.loads(texte)
+        if not isinstance(valeurs, list) or len(valeurs) != len(champs):
+            raise ValueError
+        return [modele._meta.get_field(champ).to_python(valeur) for champ, valeur in zip(champs, valeurs)]
+    except (ValueError, TypeError, ValidationError):
+        raise ValueError('Curseur invalide')
+
+
+def au_dela(ordre, valeurs, inclus=False):
+    """
+    Filtre des lignes situées après `valeurs` dans l'ordre `ordre` (ex.
+    ('-date_creation', '-id')) : comparaison lexicographique des n-uplets.
+    Avec `inclus`, la ligne du curseur elle-même est retenue.
+    """
+    filtre = models.Q()
+    egaux = {}
+    for champ, valeur in zip(ordre, valeurs):
+        nom = champ.lstrip('-')
+        comparaison = 'lt' if champ.startswith('-') else 'gt'
+        filtre |= models.Q(**egaux, **{f'{nom}__{comparaison}': valeur})
+        egaux[nom] = valeur
+    if inclus:
+        filtre |= models.Q(**egaux)
+    return filtre
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur sur un ordre de tri total (le dernier champ doit
+    être unique, typiquement `id`), pris dans `keyset_ordering` de la vue
+    s'il est déclaré. Aucun COUNT n'est exécuté. Réponse : `results`, `next` (URL de la
+    page suivante ou None) et `curseur` (position de la première ligne,
+    utilisable pour « tout marquer comme lu jusqu'ici »).
+    """
+
+    ordering = ORDRE_CHRONOLOGIQUE
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'curseur'
+    page_size_query_param = 'taille'
+
+    def get_page_size(self, request):
+        try:
+            taille = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(taille, self.max_page_size))
+
+    def valeurs(self, ligne):
+        return [getattr(ligne, champ.lstrip('-')) for champ in self.ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = getattr(view, 'keyset_ordering', None) or self.ordering
+        taille = self.get_page_size(request)
+        champs = [champ.lstrip('-') for champ in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        curseur = request.query_params.get(self.cursor_query_param)
+        if curseur:
+            try:
+                queryset = queryset.filter(au_dela(self.ordering, decoder_curseur(curseur, queryset.model, champs)))
+            except ValueError as e:
+                raise NotFound(str(e))
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        lignes = list(queryset[:taille + 1])
+        self.suivant = None
+        if len(lignes) > taille:
+            lignes = lignes[:taille]
+            self.suivant = encoder_curseur(self.valeurs(lignes[-1]))
+        self.premier = encoder_curseur(self.valeurs(lignes[0])) if lignes else None
+        return lignes
+
+    def get_next_link(self):
+        if self.suivant is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.suivant)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'curseur': self.premier,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'curseur': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+def _cle_version(modele):
+    return f'pagination:version:{modele._meta.label_lower}'
+
+
+def invalider_comptes(modele):
+    """Périme tous les comptes en cache des listes de `modele`."""
+    try:
+        cache.incr(_cle_version(modele))
+    except ValueError:
+        # Version absente (jamais lue ou évincée) : rien à périmer
+        pass
+
+
+def compte_en_cache(queryset):
+    """COUNT du queryset, mis en cache selon sa requête SQL (périmètre et filtres)."""
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    cle_version = _cle_version(queryset.model)
+    version = cache.get(cle_version)
+    if version is None:
+        # Horodatage : une version recréée ne retombe jamais sur d'anciens comptes
+        cache.add(cle_version, time.time_ns(), None)
+        version = cache.get(cle_version)
+    empreinte = hashlib.sha1(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+    cle = f'pagination:compte:{queryset.model._meta.label_lower}:{version}:{empreinte}'
+
+    compte = cache.get(cle)
+    if compte is None:
+        compte = queryset.count()
+        cache.set(cle, compte, settings.PAGINATION_COMPTE_TTL)
+    return compte
+
+
+def estimer_compte(queryset):
+    """
+    Estimation du planificateur PostgreSQL pour un queryset sans filtre, ou
+    None (autre base, filtre, ou table sous le seuil où le COUNT reste exact).
+    """
+    connexion = connections[queryset.db]
+    requete = queryset.query
+    if connexion.vendor != 'postgresql' or requete.where or requete.distinct or requete.combinator:
+        return None
+    with connexion.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connexion.ops.quote_name(queryset.model._meta.db_table)]
+        )
+        ligne = cursor.fetchone()
+    if ligne is None or ligne[0] < settings.PAGINATION_ESTIMATION_SEUIL:
+        return None
+    return ligne[0]
+
+
+class PaginatorCompteCache(Paginator):
+    """Paginator dont le nombre total vient du cache ou d'une estimation."""
+
+    compte_exact = True
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, models.QuerySet):
+            return super().count
+        estimation = estimer_compte(self.object_list)
+        if estimation is not None:
+            self.compte_exact = False
+            return estimation
+        return compte_en_cache(self.object_list)
+
+
+class PaginationOptionnelle(PageNumberPagination):
+    """
+    Pagination par défaut de l'API : par numéro de page, ou par curseur
+    lorsque la requête porte le paramètre `curseur` (vide pour la première
+    page) sur une vue déclarant `keyset_ordering`.
+
+    En mode numéro de page, `count` vient de PaginatorCompteCache et
+    `count_exact` indique s'il s'agit d'une estimation.
+    """
+
+    cursor_query_param = KeysetPagination.cursor_query_param
+    django_paginator_class = PaginatorCompteCache
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if getattr(view, 'keyset_ordering', None) and self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.get_page_size(request) or KeysetPagination.page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response({
+            'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.compte_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        if getattr(self, 'keyset', None) is not None:
+            return self.keyset.get_paginated_response_schema(schema)
+        reponse = super().get_paginated_response_schema(schema)
+        reponse['properties']['count_exact'] = {'type': 'boolean'}
+        return reponse
@@ -0,0 +1,138 @@
+"""
+Rendu des PDF (reportlab)
+
+Les fonctions de ce module ne lisent pas la base : elles reçoivent des
+données déjà extraites (chaînes, listes) et retournent les octets du PDF.
+Elles peuvent donc tourner dans un processus du pool de génération, sans
+connexion ni modèle Django.
+
+Le rendu est adressé par son contenu : `empreinte_donnees` résume
+exactement les données affichées (et la version de la mise en page), si
+bien qu'un document dont l'empreinte n'a pas changé est resservi depuis le
+disque sans être rendu à nouveau.
+"""
+import functools
+import hashlib
+import json
+from io import BytesIO
+
+# À incrémenter à chaque changement de mise en page : périme tous les rendus
+VERSION_MISE_EN_PAGE = 1
+
+
+def donnees_ordre_mission(mission, vehicule=None):
+    """Données affichées par l'ordre de mission, extraites de la mission."""
+    return {
+        'reference': mission.reference,
+        'lignes': [
+            ["Référence:", mission.reference],
+            ["Titre:", mission.titre],
+            ["Agent:", mission.createur.get_full_name()],
+            ["Entité:", mission.entite.nom if mission.entite else "N/A"],
+            ["Période:", f"Du {mission.date_debut} au {mission.date_fin}"],
+            ["Lieu:", mission.lieu_mission],
+            ["Budget estimé:", f"{mission.budget_estime:,.0f} FCFA"],
+            ["Objet:", mission.description or "N/A"],
+        ],
+        'participants': [p.get_full_name() for p in mission.participants.all()],
+        'vehicule': (
+            f"{vehicule.marque} {vehicule.modele} - {vehicule.immatriculation}" if vehicule else None
+        ),
+    }
+
+
+def empreinte_donnees(donnees):
+    """Empreinte SHA-256 des données d'un document et de la version de mise en page."""
+    texte = json.dumps([VERSION_MISE_EN_PAGE, donnees], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texte.encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _styles():
+    """Feuille de styles, styles de paragraphe et de table : construits une fois par processus."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    return {
+        'titre': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1  # Centré
+        ),
+        'section': styles['Heading3'],
+        'texte': styles['Normal'],
+        'table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+    }
+
+
+def _story_ordre_mission(donnees):
+    """Flowables reportlab d'un ordre de mission."""
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    styles = _styles()
+    story = []
+
+    # Titre
+    story.append(Paragraph("ORDRE DE MISSION", styles['titre']))
+    story.append(Spacer(1, 12))
+
+    # Informations de la mission
+    table = Table(donnees['lignes'], colWidths=[100, 300])
+    table.setStyle(styles['table'])
+
+    story.append(table)
+    story.append(Spacer(1, 20))
+
+    # Participants
+    if donnees['participants']:
+        story.append(Paragraph("Participants:", styles['section']))
+        story.append(Paragraph(", ".join(donnees['participants']), styles['texte']))
+        story.append(Spacer(1, 12))
+
+    # Véhicule
+    if donnees['vehicule']:
+        story.append(Paragraph("Véhicule:", styles['section']))
+        story.append(Paragraph(donnees['vehicule'], styles['texte']))
+        story.append(Spacer(1, 12))
+
+    return story
+
+
+def rendre_ordre_mission(donnees):
+    """Octets du PDF de l'ordre de mission."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = BytesIO()
+    # invariant : mêmes données, mêmes octets (ETag stable d'un rendu à l'autre)
+    doc = SimpleDocTemplate(buffer, pagesize=A4, invariant=True)
+    doc.build(_story_ordre_mission(donnees))
+    return buffer.getvalue()
+
+
+def rendre_ordres_mission(liste_donnees, sortie):
+    """
+    Un seul PDF regroupant plusieurs ordres de mission (un par page),
+    écrit dans le fichier `sortie`.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+    story = []
+    for donnees in liste_donnees:
+        if story:
+            story.append(PageBreak())
+        story.extend(_story_ordre_mission(donnees))
+    SimpleDocTemplate(sortie, pagesize=A4, invariant=True).build(story)
@@ -0,0 +1,43 @@
+"""
+Plans de chargement déclarés par les serializers et appliqués par les vues
+"""
+
+
+class PrefetchPlan:
+    """
+    Décrit les `select_related`, `prefetch_related` et annotations dont un
+    serializer a besoin pour sérialiser une page sans requête par ligne.
+
+    Une annotation peut être une expression ou une fonction recevant le
+    contexte du serializer (pour dépendre de `request.user`).
+    """
+
+    def __init__(self, select_related=(), prefetch_related=(), annotations=None):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+        self.annotations = annotations or {}
+
+    def apply(self, queryset, context=None):
+        """Applique le plan au queryset."""
+        context = context or {}
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.annotations:
+            queryset = queryset.annotate(**{
+                name: annotation(context) if callable(annotation) else annotation
+                for name, annotation in self.annotations.items()
+            })
+        return queryset
+
+
+class PrefetchPlanMixin:
+    """Mixin de vue : applique le `prefetch_plan` du serializer au queryset."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = getattr(self.get_serializer_class(), 'prefetch_plan', None)
+        if plan is None:
+            return queryset
+        return plan.apply(queryset, self.get_serializer_context())
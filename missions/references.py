@@ -0,0 +1,156 @@
+"""
+Cache des données de référence
+
+Titulaires de rôle (DG, Directeur Finances...), utilisateurs, responsables
+d'entité et véhicules changent rarement mais sont relus à chaque étape des
+workflows. Ils sont servis par le cache `references` (voir
+REFERENCES_CACHE_URL) sous des clés versionnées par espace : une écriture
+sur le modèle (signaux) incrémente la version de son espace, ce qui périme
+toutes ses entrées d'un coup, y compris sur un cache partagé.
+
+Un utilisateur n'est jamais mis en cache en entier : seuls les champs
+CHAMPS_UTILISATEUR le sont (ni mot de passe, ni autres colonnes), et
+l'instance est reconstruite avec les autres champs différés.
+
+Les succès et échecs sont comptés par espace, pour ce processus : exposés
+par `statistiques()` (vue `references/statistiques/`, administrateurs) et
+journalisés tous les JOURNAL_INTERVALLE accès.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+
+from users.models import User
+from .models_vehicules import Vehicule
+
+logger = logging.getLogger(__name__)
+
+# Espaces de clés, invalidés chacun par les écritures d'un modèle
+UTILISATEURS = 'utilisateurs'
+ENTITES = 'entites'
+VEHICULES = 'vehicules'
+
+# Champs d'un utilisateur lus par les workflows, seuls mis en cache
+CHAMPS_UTILISATEUR = (
+    'id', 'identifiant', 'email', 'first_name', 'last_name', 'role', 'manager_id', 'entite_id', 'is_active',
+)
+
+# Nombre d'accès entre deux journalisations des statistiques
+JOURNAL_INTERVALLE = 1000
+
+# Valeur stockée pour « aucun résultat » (None signifie une absence du cache)
+_AUCUN = '__aucun__'
+
+_verrou = threading.Lock()
+_succes = Counter()
+_echecs = Counter()
+
+
+def _cache():
+    return caches['references']
+
+
+def _cle_version(espace):
+    return f'references:version:{espace}'
+
+
+def _version(espace):
+    cache = _cache()
+    version = cache.get(_cle_version(espace))
+    if version is None:
+        # Horodatage : une version recréée ne retombe jamais sur d'anciennes entrées
+        cache.add(_cle_version(espace), time.time_ns(), None)
+        version = cache.get(_cle_version(espace))
+    return version
+
+
+def invalider(espace):
+    """Périme toutes les entrées de l'espace."""
+    try:
+        _cache().incr(_cle_version(espace))
+    except ValueError:
+        # Version absente (jamais lue ou évincée) : rien à périmer
+        pass
+
+
+def obtenir(espace, cle, calcul):
+    """Valeur en cache de (espace, cle), calculée par `calcul()` en cas d'échec."""
+    cache = _cache()
+    cle_complete = f'references:{espace}:{_version(espace)}:{cle}'
+    valeur = cache.get(cle_complete)
+    _compter(_succes if valeur is not None else _echecs, espace)
+    if valeur is not None:
+        return None if valeur == _AUCUN else valeur
+
+    valeur = calcul()
+    cache.set(cle_complete, _AUCUN if valeur is None else valeur)
+    return valeur
+
+
+def _compter(compteur, espace):
+    with _verrou:
+        compteur[espace] += 1
+        acces = sum(_succes.values()) + sum(_echecs.values())
+    if acces % JOURNAL_INTERVALLE == 0:
+        logger.info(f"Cache des références: {statistiques()}")
+
+
+def statistiques():
+    """Succès, échecs et taux de succès par espace, depuis le démarrage du processus."""
+    with _verrou:
+        espaces = set(_succes) | set(_echecs)
+        return {
+            espace: {
+                'succes': _succes[espace],
+                'echecs': _echecs[espace],
+                'taux': _succes[espace] / ((_succes[espace] + _echecs[espace]) or 1),
+            }
+            for espace in sorted(espaces)
+        }
+
+
+def reinitialiser_statistiques():
+    with _verrou:
+        _succes.clear()
+        _echecs.clear()
+
+
+def _utilisateur(espace, cle, queryset):
+    """Utilisateur reconstruit depuis les CHAMPS_UTILISATEUR mis en cache, ou None."""
+    valeurs = obtenir(espace, cle, lambda: queryset.values(*CHAMPS_UTILISATEUR).first())
+    if valeurs is None:
+        return None
+    champs = [champ.attname for champ in User._meta.concrete_fields if champ.attname in valeurs]
+    return User.from_db(queryset.db, champs, [valeurs[champ] for champ in champs])
+
+
+def titulaire_role(role):
+    """Premier utilisateur du rôle (DG, DIRECTEUR_FINANCES...), ou None."""
+    return _utilisateur(UTILISATEURS, f'role:{role}', User.objects.filter(role=role))
+
+
+def utilisateur(user_id):
+    """Utilisateur par id (ex. manager d'un créateur), ou None."""
+    if user_id is None:
+        return None
+    return _utilisateur(UTILISATEURS, f'id:{user_id}', User.objects.filter(pk=user_id))
+
+
+def responsable_entite(entite_id):
+    """Responsable de l'entité, ou None."""
+    if entite_id is None:
+        return None
+    return _utilisateur(
+        ENTITES, f'responsable:{entite_id}',
+        User.objects.filter(entites_responsable__pk=entite_id)
+    )
+
+
+def vehicule(vehicule_id):
+    """Véhicule par id, ou None."""
+    if vehicule_id is None:
+        return None
+    return obtenir(VEHICULES, f'id:{vehicule_id}', lambda: Vehicule.objects.filter(pk=vehicule_id).first())
@@ -0,0 +1,264 @@
+"""
+Échéancier en mémoire des timers du workflow
+
+Les échéances à venir (signatures, validations, justificatifs, archivage)
+sont chargées une fois dans un tas binaire au démarrage ; l'échéancier dort
+jusqu'à la prochaine, et ne relit ensuite que les objets signalés dans
+ChangementEcheance.
+
+Chaque déclenchement est un UPDATE conditionnel (ex. `relance_effectuee`
+encore à False) : seul celui qui modifie la ligne met l'e-mail en file, dans
+la même transaction. Un redémarrage, ou un `check_timers` lancé en parallèle,
+ne relance donc jamais deux fois le même objet.
+"""
+import heapq
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Mission, SignatureFinanciere, Validation, ChangementEcheance
+from .services import TimerService
+
+logger = logging.getLogger(__name__)
+
+
+class TypeEcheance(ABC):
+    """Un type d'échéance : objets en attente, instant de déclenchement et action."""
+
+    nom = None
+    modele = None
+    champs = ()
+
+    @abstractmethod
+    def en_attente(self):
+        """Objets dont l'échéance n'a pas encore été traitée."""
+
+    def instant(self, *valeurs):
+        """Instant de déclenchement à partir des valeurs de `champs`."""
+        return valeurs[0]
+
+    @abstractmethod
+    def declencher(self, pk, now):
+        """Traite l'échéance de l'objet `pk` ; retourne True si une action a eu lieu."""
+
+    def echeances(self, pks=None):
+        """Couples (pk, instant) des objets en attente, éventuellement restreints à `pks`."""
+        queryset = self.en_attente()
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        for pk, *valeurs in queryset.values_list('pk', *self.champs).iterator():
+            yield pk, self.instant(*valeurs)
+
+
+class RelanceSignature(TypeEcheance):
+    nom = 'relance_signature'
+    modele = SignatureFinanciere
+    champs = ('date_limite_signature',)
+
+    def en_attente(self):
+        return SignatureFinanciere.objects.filter(
+            statut='EN_ATTENTE', relance_effectuee=False, date_limite_signature__isnull=False
+        )
+
+    def declencher(self, pk, now):
+        if not TimerService.overdue_signatures(now).filter(pk=pk).update(
+            relance_effectuee=True, date_derniere_relance=now
+        ):
+            return False
+        signature = SignatureFinanciere.objects.select_related('mission', 'signataire').get(pk=pk)
+        TimerService._envoyer(TimerService._messages_relance_signature([signature]))
+        return True
+
+
+class RelanceValidation(TypeEcheance):
+    nom = 'relance_validation'
+    modele = Validation
+    champs = ('date_echeance',)
+
+    def en_attente(self):
+        return Validation.objects.filter(
+            statut='EN_ATTENTE', est_actif=True, relance_effectuee=False, date_echeance__isnull=False
+        )
+
+    def declencher(self, pk, now):
+        if not TimerService.overdue_validations(now).filter(pk=pk).update(relance_effectuee=True):
+            return False
+        validation = Validation.objects.select_related('mission', 'valideur').get(pk=pk)
+        TimerService._envoyer(TimerService._messages_relance_validation([validation]))
+        return True
+
+
+class RelanceJustificatifs(TypeEcheance):
+    nom = 'relance_justificatifs'
+    modele = Mission
+    champs = ('date_limite_justificatifs',)
+
+    def en_attente(self):
+        return Mission.objects.filter(
+            retour_declare=True,
+            justificatifs_deposes=False,
+            relance_justificatifs=False,
+            date_derniere_relance_justificatifs__isnull=True,
+            date_limite_justificatifs__isnull=False
+        )
+
+    def declencher(self, pk, now):
+        if not TimerService.justificatifs_to_remind(now).filter(pk=pk).update(
+            relance_justificatifs=True, date_derniere_relance_justificatifs=now
+        ):
+            return False
+        mission = Mission.objects.select_related('createur').get(pk=pk)
+        TimerService._envoyer(TimerService._messages_relance_justificatifs([mission]))
+        return True
+
+
+class EscaladeJustificatifs(TypeEcheance):
+    nom = 'escalade_justificatifs'
+    modele = Mission
+    champs = ('date_limite_justificatifs', 'date_derniere_relance_justificatifs')
+
+    def en_attente(self):
+        return Mission.objects.filter(
+            retour_declare=True,
+            justificatifs_deposes=False,
+            date_limite_justificatifs__isnull=False,
+            createur__manager__isnull=False
+        )
+
+    def instant(self, date_limite, date_derniere_relance):
+        return (date_derniere_relance or date_limite) + TimerService.DELAI_ESCALADE
+
+    def declencher(self, pk, now):
+        if not TimerService.justificatifs_to_escalate(now).filter(pk=pk).update(
+            date_derniere_relance_justificatifs=now
+        ):
+            return False
+        mission = Mission.objects.select_related('createur__manager').get(pk=pk)
+        TimerService._envoyer(TimerService._messages_escalade([mission], now))
+        return True
+
+
+class Archivage(TypeEcheance):
+    nom = 'archivage'
+    modele = Mission
+    champs = ('date_cloture',)
+
+    def en_attente(self):
+        return Mission.objects.filter(cloturee=True, archivee=False, date_cloture__isnull=False)
+
+    def instant(self, date_cloture):
+        return date_cloture + TimerService.DELAI_ARCHIVAGE
+
+    def declencher(self, pk, now):
+        if not TimerService.missions_to_archive(now).filter(pk=pk).update(archivee=True, date_archivage=now):
+            return False
+        logger.info(f"Mission {pk} archivée automatiquement")
+        return True
+
+
+TYPES = [RelanceSignature(), RelanceValidation(), RelanceJustificatifs(), EscaladeJustificatifs(), Archivage()]
+
+
+class Echeancier:
+    """Tas binaire des prochaines échéances, alimenté par ChangementEcheance."""
+
+    # Nombre de changements lus par passage
+    TAILLE_LOT = 1000
+
+    def __init__(self, types=None):
+        self.types = {type_echeance.nom: type_echeance for type_echeance in (types or TYPES)}
+        self.tas = []
+        # Instant prévu par (type, pk) : les entrées du tas qui ne
+        # correspondent plus sont obsolètes et ignorées
+        self.prevues = {}
+
+    def planifier(self, nom, pk, instant):
+        cle = (nom, pk)
+        if self.prevues.get(cle) == instant:
+            return
+        self.prevues[cle] = instant
+        heapq.heappush(self.tas, (instant, nom, pk))
+
+    def recharger(self, nom, pks=None):
+        """Relit les échéances d'un type (toutes, ou seulement celles de `pks`)."""
+        trouves = set()
+        for pk, instant in self.types[nom].echeances(pks):
+            self.planifier(nom, pk, instant)
+            trouves.add(pk)
+        for pk in set(pks or ()) - trouves:
+            self.prevues.pop((nom, pk), None)
+
+    def charger(self):
+        """Chargement initial : seul balayage complet des tables."""
+        dernier = ChangementEcheance.objects.aggregate(dernier=models.Max('id'))['dernier'] or 0
+        for nom in self.types:
+            self.recharger(nom)
+        ChangementEcheance.objects.filter(id__lte=dernier).delete()
+        logger.info(f"Échéancier chargé: {len(self.prevues)} échéances")
+
+    def lire_changements(self):
+        """Replanifie les objets signalés dans le flux ; retourne le nombre de changements lus."""
+        changements = list(ChangementEcheance.objects.order_by('id')[:self.TAILLE_LOT])
+        if not changements:
+            return 0
+
+        par_modele = defaultdict(set)
+        for changement in changements:
+            par_modele[changement.modele].add(changement.objet_id)
+        for nom, type_echeance in self.types.items():
+            pks = par_modele.get(type_echeance.modele._meta.model_name)
+            if pks:
+                self.recharger(nom, pks)
+
+        ChangementEcheance.objects.filter(id__in=[changement.id for changement in changements]).delete()
+        return len(changements)
+
+    def declencher_echues(self, now):
+        """Déclenche les échéances passées ; retourne le nombre d'actions effectuées."""
+        actions = 0
+        while self.tas and self.tas[0][0] <= now:
+            instant, nom, pk = heapq.heappop(self.tas)
+            if self.prevues.get((nom, pk)) != instant:
+                continue
+            del self.prevues[(nom, pk)]
+
+            try:
+                with transaction.atomic():
+                    if self.types[nom].declencher(pk, now):
+                        actions += 1
+            except Exception:
+                logger.exception(f"Échec du déclenchement {nom} #{pk}")
+
+            # Occurrence suivante éventuelle (escalade tous les 7 jours) ; une
+            # échéance passée non déclenchée attend un nouveau changement
+            self.recharger(nom, [pk])
+            if self.prevues.get((nom, pk), now) <= now:
+                self.prevues.pop((nom, pk), None)
+        return actions
+
+    def prochaine(self):
+        """Instant de la prochaine échéance valide, ou None."""
+        while self.tas and self.prevues.get(self.tas[0][1:]) != self.tas[0][0]:
+            heapq.heappop(self.tas)
+        return self.tas[0][0] if self.tas else None
+
+    def executer(self, intervalle=5, arret=None):
+        """
+        Boucle principale : déclenche les échéances, lit le flux de changements
+        puis dort jusqu'à la prochaine échéance (au plus `intervalle` secondes).
+        """
+        arret = arret or threading.Event()
+        self.charger()
+        while not arret.is_set():
+            self.declencher_echues(timezone.now())
+            self.lire_changements()
+
+            attente = intervalle
+            prochaine = self.prochaine()
+            if prochaine is not None:
+                attente = min(attente, max(0, (prochaine - timezone.now()).total_seconds()))
+            arret.wait(attente)
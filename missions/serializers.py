@@ -1,9 +1,30 @@
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Value
 from django.utils.translation import gettext_lazy as _
 from .models import (
     Mission, Validation, Justificatif, MissionIntervenant,
-    SignatureFinanciere, Ticket, Avance, Depense, EtatDepenses, Notification
+    SignatureFinanciere, Ticket, Avance, Depense, EtatDepenses, Notification,
+    MissionStatus, ValidationStatus
 )
+from . import stockage
+from .pagination import KeysetPagination, decoder_curseur
+from .prefetch import PrefetchPlan
+from users.permissions import contexte_permissions
+
+
+def validation_en_attente_pour(context):
+    """Annotation : l'utilisateur courant a une validation en attente sur la mission."""
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return Value(False)
+    return Exists(Validation.objects.filter(
+        mission=OuterRef('pk'),
+        valideur=user,
+        statut=ValidationStatus.EN_ATTENTE,
+        est_actif=True
+    ))
 
 
 class MissionIntervenantSerializer(serializers.ModelSerializer):
@@ -20,6 +41,8 @@ class MissionIntervenantSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_ajout']
 
+    prefetch_plan = PrefetchPlan(select_related=['intervenant'])
+
 
 class MissionSerializer(serializers.ModelSerializer):
     """Serializer pour les missions."""
@@ -42,8 +65,21 @@ class MissionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation']
 
+    prefetch_plan = PrefetchPlan(
+        select_related=['createur'],
+        prefetch_related=[
+            'participants',
+            Prefetch(
+                'missionintervenant_set',
+                queryset=MissionIntervenantSerializer.prefetch_plan.apply(MissionIntervenant.objects.all())
+            ),
+        ],
+        annotations={'validation_en_attente': validation_en_attente_pour},
+    )
+
     def get_intervenants_count(self, obj):
-        return obj.intervenants_count
+        # Utilise le cache de prefetch lorsqu'il est disponible
+        return len(obj.missionintervenant_set.all())
 
     def get_duree(self, obj):
         return obj.duree
@@ -51,6 +87,8 @@ class MissionSerializer(serializers.ModelSerializer):
     def get_can_be_validated_by_current_user(self, obj):
         request = self.context.get('request')
         if request and request.user:
+            if hasattr(obj, 'validation_en_attente'):
+                return obj.statut == MissionStatus.EN_ATTENTE and obj.validation_en_attente
             return obj.can_be_validated_by(request.user)
         return False
 
@@ -108,6 +146,36 @@ class MissionCreateSerializer(serializers.ModelSerializer):
         return mission
 
 
+class MissionImportSerializer(serializers.ModelSerializer):
+    """
+    Serializer d'une ligne de fichier d'import de missions.
+
+    Les relations restent des identifiants textuels (identifiant utilisateur,
+    code d'entité) : elles sont résolues par lot dans MissionImportService,
+    la validation d'une ligne ne fait donc aucune requête.
+    """
+
+    reference = serializers.CharField(max_length=50, required=False)
+    createur = serializers.CharField(required=False)
+    entite = serializers.CharField(required=False)
+    participants = serializers.CharField(required=False)
+
+    class Meta:
+        model = Mission
+        fields = [
+            'reference', 'titre', 'description', 'type',
+            'date_debut', 'date_fin', 'lieu_mission', 'budget_estime', 'avance_demandee',
+            'createur', 'entite', 'participants'
+        ]
+
+    def validate(self, data):
+        if data['date_fin'] < data['date_debut']:
+            raise serializers.ValidationError(
+                _("La date de fin doit être postérieure à la date de début.")
+            )
+        return data
+
+
 class ValidationSerializer(serializers.ModelSerializer):
     """Serializer pour les validations."""
 
@@ -123,6 +191,8 @@ class ValidationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation', 'en_retard']
 
+    prefetch_plan = PrefetchPlan(select_related=['valideur', 'mission'])
+
     def validate(self, data):
         # Vérifier que l'utilisateur peut valider cette mission
         request = self.context.get('request')
@@ -146,12 +216,14 @@ class JustificatifSerializer(serializers.ModelSerializer):
         model = Justificatif
         fields = [
             'id', 'mission', 'mission_titre', 'intervenant', 'intervenant_nom',
-            'type', 'categorie', 'description', 'montant', 'montant_formate', 'devise',
-            'statut', 'fichier', 'nom_fichier',
+            'type_document', 'categorie', 'description', 'montant', 'montant_formate', 'devise',
+            'statut', 'fichier', 'nom_fichier', 'taille', 'hash_md5', 'hash_sha256',
             'valideur', 'commentaire_validation',
             'date_creation', 'date_soumission', 'date_validation', 'date_remboursement'
         ]
-        read_only_fields = ['id', 'date_creation', 'montant_formate']
+        read_only_fields = ['id', 'date_creation', 'montant_formate', 'taille', 'hash_md5', 'hash_sha256']
+
+    prefetch_plan = PrefetchPlan(select_related=['intervenant', 'mission'])
 
     def get_montant_formate(self, obj):
         return obj.montant_formate
@@ -168,6 +240,43 @@ class JustificatifSerializer(serializers.ModelSerializer):
                 )
         return data
 
+    @staticmethod
+    def _fichier(validated_data):
+        """
+        Taille et empreintes du fichier reçu, calculées pendant le téléversement.
+        Le contenu est stocké une seule fois (missions.stockage) : un doublon
+        est rattaché au fichier existant sans être recopié.
+        """
+        if 'fichier' not in validated_data:
+            return validated_data
+        fichier = validated_data['fichier']
+        if fichier is None:
+            validated_data['contenu'] = None
+            return validated_data
+        validated_data['taille'] = fichier.size
+        validated_data.setdefault('nom_fichier', fichier.name[:255])
+        if hasattr(fichier, 'hash_md5'):
+            validated_data['hash_md5'] = fichier.hash_md5
+        contenu = stockage.stocker(fichier)
+        validated_data['hash_sha256'] = contenu.sha256
+        validated_data['contenu'] = contenu
+        # Nom du fichier partagé : le justificatif n'écrit pas de copie
+        validated_data['fichier'] = contenu.fichier.name
+        return validated_data
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(self._fichier(validated_data))
+
+    def update(self, instance, validated_data):
+        ancien = instance.contenu_id
+        with transaction.atomic():
+            instance = super().update(instance, self._fichier(validated_data))
+            if 'contenu' in validated_data:
+                # Nouveau fichier : référence à l'ancien contenu libérée (y compris s'il est identique)
+                stockage.liberer([ancien])
+        return instance
+
 
 class JustificatifValidationSerializer(serializers.ModelSerializer):
     """Serializer pour la validation des justificatifs."""
@@ -188,7 +297,7 @@ class JustificatifValidationSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and request.user:
             justificatif = self.instance
-            if justificatif and not justificatif.peut_etre_valide_par(request.user):
+            if justificatif and not justificatif.peut_etre_valide_par(request.user, contexte_permissions(request)):
                 raise serializers.ValidationError(
                     _("Vous n'êtes pas autorisé à valider ce justificatif.")
                 )
@@ -209,6 +318,8 @@ class SignatureFinanciereSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation']
 
+    prefetch_plan = PrefetchPlan(select_related=['signataire', 'mission'])
+
 
 class TicketSerializer(serializers.ModelSerializer):
     """Serializer pour les tickets financiers."""
@@ -224,6 +335,8 @@ class TicketSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation']
 
+    prefetch_plan = PrefetchPlan(select_related=['emetteur', 'mission'])
+
 
 class AvanceSerializer(serializers.ModelSerializer):
     """Serializer pour les avances."""
@@ -241,6 +354,8 @@ class AvanceSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation']
 
+    prefetch_plan = PrefetchPlan(select_related=['verse_par', 'beneficiaire', 'mission'])
+
 
 class DepenseSerializer(serializers.ModelSerializer):
     """Serializer pour les dépenses."""
@@ -255,6 +370,8 @@ class DepenseSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation']
 
+    prefetch_plan = PrefetchPlan(select_related=['mission'])
+
 
 class EtatDepensesSerializer(serializers.ModelSerializer):
     """Serializer pour les états des dépenses."""
@@ -271,6 +388,8 @@ class EtatDepensesSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'date_creation']
 
+    prefetch_plan = PrefetchPlan(select_related=['mission', 'valide_par'])
+
 
 class NotificationSerializer(serializers.ModelSerializer):
     """Serializer pour les notifications."""
@@ -284,6 +403,25 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_creation', 'date_lecture']
 
 
+class NotificationLectureSerializer(serializers.Serializer):
+    """Notifications à marquer comme lues : une liste d'ids ou un curseur du fil."""
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    jusqu_a = serializers.CharField(required=False)
+
+    def validate_jusqu_a(self, value):
+        try:
+            decoder_curseur(value, Notification, [champ.lstrip('-') for champ in KeysetPagination.ordering])
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+    def validate(self, data):
+        if ('ids' in data) == ('jusqu_a' in data):
+            raise serializers.ValidationError(_("Indiquer soit 'ids', soit 'jusqu_a'."))
+        return data
+
+
 class AvanceCreateSerializer(serializers.ModelSerializer):
     """Serializer pour créer des avances."""
 
@@ -1,14 +1,26 @@
 """
 Services métier pour le système de gestion des missions FUCEC
 """
+import itertools
 import logging
+import re
+from decimal import Decimal
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
-from django.db import transaction
-from .models import Mission, Validation, SignatureFinanciere, Notification
-from users.models import User
+from django.db import DatabaseError, models, transaction
+from django.db.models.functions import Coalesce, TruncMonth
+from .models import (
+    Mission, MissionStatus, Validation, SignatureFinanciere, Notification, CompteurNotifications,
+    StatistiqueMission, SequenceReference, DocumentPDF, ChangementEcheance
+)
+from . import references, travaux_pdf
+from .emails import registre
+from .outbox import email_sortant, mettre_en_file, mettre_en_file_lot
+from .pdf import donnees_ordre_mission, empreinte_donnees, rendre_ordre_mission
+from .pagination import KeysetPagination, au_dela, decoder_curseur, invalider_comptes
+from .temps_reel import centre
+from users.models import User, Entite
 
 logger = logging.getLogger(__name__)
 
@@ -83,13 +95,13 @@ class ValidationService:
 
         if niveau == 'CHEF_AGENCE':
             # Le manager direct du créateur
-            return createur.manager or createur
+            return references.utilisateur(createur.manager_id) or createur
         elif niveau == 'RESPONSABLE_COPEC':
             # Responsable de l'entité
-            return mission.entite.responsable or createur
+            return references.responsable_entite(mission.entite_id) or createur
         elif niveau == 'DG':
             # DG du système (premier user avec rôle DG)
-            return User.objects.filter(role='DG').first() or createur
+            return references.titulaire_role('DG') or createur
 
         return createur
 
@@ -136,8 +148,8 @@ class ValidationService:
         mission.statut = 'VALIDEE'
         mission.save()
 
-        # Générer l'ordre de mission PDF
-        PDFService.generate_ordre_mission(mission)
+        # Ordre de mission PDF : généré hors de la transaction par le worker
+        PDFService.demander_ordre_mission(mission)
 
         # Initier le workflow de signatures
         SignatureService.initiate_workflow(mission)
@@ -163,7 +175,7 @@ class SignatureService:
         ))
 
         # Signature N+1 (Chef d'agence) (ordre 2)
-        n1 = mission.createur.manager
+        n1 = references.utilisateur(mission.createur.manager_id)
         if n1:
             signatures.append(SignatureFinanciere(
                 mission=mission,
@@ -173,7 +185,7 @@ class SignatureService:
             ))
 
         # Signature Directeur Finances (ordre 3)
-        df = User.objects.filter(role='DIRECTEUR_FINANCES').first()
+        df = references.titulaire_role('DIRECTEUR_FINANCES')
         if df:
             signatures.append(SignatureFinanciere(
                 mission=mission,
@@ -235,6 +247,9 @@ class SignatureService:
 class NotificationService:
     """Service pour gérer les notifications"""
 
+    # Taille des INSERT groupés lors d'une diffusion
+    TAILLE_LOT = 1000
+
     @staticmethod
     def notify_validation_required(validation):
         """Notifie qu'une validation est requise"""
@@ -318,15 +333,14 @@ class NotificationService:
         message = f"Le déblocage des fonds est autorisé pour la mission {mission.titre}"
 
         # Notifier tous les comptables
-        comptables = User.objects.filter(role='COMPTABLE')
-        for comptable in comptables:
-            NotificationService._create_notification(
-                comptable,
-                titre,
-                message,
-                'VALIDATION'
-            )
-            EmailService.send_payment_authorized_notification(mission, comptable)
+        NotificationService.diffuser(
+            User.objects.filter(role='COMPTABLE'),
+            titre,
+            message,
+            'VALIDATION',
+            email='deblocage_autorise',
+            context={'mission': mission}
+        )
 
     @staticmethod
     def notify_payment_made(mission, avance):
@@ -350,15 +364,14 @@ class NotificationService:
         message = f"L'agent {mission.createur.get_full_name()} a déclaré son retour de mission {mission.titre}"
 
         # Notifier RH
-        rh_users = User.objects.filter(role='RH')
-        for rh in rh_users:
-            NotificationService._create_notification(
-                rh,
-                titre,
-                message,
-                'INFO'
-            )
-            EmailService.send_return_declared_notification(mission, rh)
+        NotificationService.diffuser(
+            User.objects.filter(role='RH'),
+            titre,
+            message,
+            'INFO',
+            email='retour_declare',
+            context={'mission': mission}
+        )
 
     @staticmethod
     def notify_justificatifs_submitted(mission):
@@ -367,15 +380,14 @@ class NotificationService:
         message = f"Les justificatifs de mission {mission.titre} ont été déposés par l'agent"
 
         # Notifier RH
-        rh_users = User.objects.filter(role='RH')
-        for rh in rh_users:
-            NotificationService._create_notification(
-                rh,
-                titre,
-                message,
-                'VALIDATION'
-            )
-            EmailService.send_justificatifs_submitted_notification(mission, rh)
+        NotificationService.diffuser(
+            User.objects.filter(role='RH'),
+            titre,
+            message,
+            'VALIDATION',
+            email='justificatifs_deposes',
+            context={'mission': mission}
+        )
 
     @staticmethod
     def notify_justificatifs_rejected(mission, commentaire):
@@ -433,6 +445,76 @@ class NotificationService:
         )
         EmailService.send_mission_balanced_notification(mission)
 
+    @staticmethod
+    def notify_entite(entite, titre, message, type_notif='INFO', lien="", sous_entites=True):
+        """Annonce à tous les membres d'une entité (et de ses sous-entités)"""
+        if sous_entites:
+            membres = User.objects.filter(entite__in_subtree=entite)
+        else:
+            membres = User.objects.filter(entite=entite)
+        return NotificationService.diffuser(
+            membres,
+            titre,
+            message,
+            type_notif,
+            lien,
+            email='annonce',
+            context={'titre': titre, 'message': message, 'entite': entite}
+        )
+
+    @staticmethod
+    def diffuser(destinataires, titre, message, type_notif, lien="", email=None, context=None):
+        """
+        Notifie un ensemble de destinataires (queryset ou liste d'utilisateurs)
+        en quelques requêtes : destinataires lus en une fois, notifications
+        insérées par bulk_create et e-mails mis en file en un lot. Le gabarit
+        `email` est rendu une seule fois avec `context`, commun à tous.
+        Retourne le nombre de destinataires.
+        """
+        if not isinstance(destinataires, models.QuerySet):
+            destinataires = User.objects.filter(pk__in=[getattr(d, 'pk', d) for d in destinataires])
+        lignes = list(destinataires.order_by().distinct().values_list('pk', 'email'))
+        if not lignes:
+            return 0
+
+        with transaction.atomic():
+            Notification.objects.bulk_create([
+                Notification(
+                    destinataire_id=pk,
+                    titre=titre,
+                    message=message,
+                    type=type_notif,
+                    lien=lien
+                )
+                for pk, _ in lignes
+            ], batch_size=NotificationService.TAILLE_LOT)
+            CompteurNotifications.ajuster([pk for pk, _ in lignes], 1)
+            transaction.on_commit(lambda: centre.publier([pk for pk, _ in lignes]))
+            if email:
+                EmailService.diffuser(email, context or {}, [adresse for _, adresse in lignes])
+        return len(lignes)
+
+    @staticmethod
+    def marquer_lues(utilisateur, ids=None, jusqu_a=None):
+        """
+        Marque comme lues les notifications `ids` de l'utilisateur, ou toutes
+        celles jusqu'à la position `jusqu_a` (curseur du fil) incluse.
+        Retourne le nombre de notifications passées à lue.
+        """
+        notifications = Notification.objects.filter(destinataire=utilisateur, lue=False)
+        if ids is not None:
+            notifications = notifications.filter(pk__in=ids)
+        if jusqu_a is not None:
+            ordre = KeysetPagination.ordering
+            valeurs = decoder_curseur(jusqu_a, Notification, [champ.lstrip('-') for champ in ordre])
+            notifications = notifications.filter(au_dela(ordre, valeurs, inclus=True))
+
+        with transaction.atomic():
+            # Seules les lignes réellement modifiées sont décomptées
+            nombre = notifications.update(lue=True, date_lecture=timezone.now())
+            CompteurNotifications.ajuster([utilisateur.pk], -nombre)
+        return nombre
+
     @staticmethod
     def _create_notification(destinataire, titre, message, type_notif, lien=""):
         """Crée une notification en base"""
@@ -451,379 +533,116 @@ class EmailService:
     @staticmethod
     def send_validation_notification(validation):
         """Envoie un email de notification de validation"""
-        subject = f"Validation requise - Mission {validation.mission.reference}"
         context = {
             'validation': validation,
             'mission': validation.mission,
             'valideur': validation.valideur,
         }
-
-        html_message = f"""
-        <h2>Validation requise</h2>
-        <p>Une validation est requise pour la mission <strong>{validation.mission.titre}</strong></p>
-        <p>Référence: {validation.mission.reference}</p>
-        <p>Budget estimé: {validation.mission.budget_estime} FCFA</p>
-        <p>Créateur: {validation.mission.createur.get_full_name()}</p>
-        <p>Date limite: {validation.date_echeance}</p>
-        """
-        plain_message = f"""
-        Validation requise
-
-        Une validation est requise pour la mission {validation.mission.titre}
-        Référence: {validation.mission.reference}
-        Budget estimé: {validation.mission.budget_estime} FCFA
-        Créateur: {validation.mission.createur.get_full_name()}
-        Date limite: {validation.date_echeance}
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [validation.valideur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('validation', context, validation.valideur.email)
 
     @staticmethod
     def send_mission_validated_notification(mission):
         """Envoie un email de mission validée"""
-        subject = f"Mission validée - {mission.reference}"
         context = {'mission': mission}
-
-        html_message = f"""
-        <h2>Mission validée</h2>
-        <p>Votre mission <strong>{mission.titre}</strong> a été validée et approuvée.</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Vous allez recevoir les instructions pour les signatures financières.</p>
-        """
-        plain_message = f"""
-        Mission validée
-
-        Votre mission {mission.titre} a été validée et approuvée.
-        Référence: {mission.reference}
-        Vous allez recevoir les instructions pour les signatures financières.
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('mission_validee', context, mission.createur.email)
 
     @staticmethod
     def send_mission_rejected_notification(mission, validation):
         """Envoie un email de mission rejetée"""
-        subject = f"Mission rejetée - {mission.reference}"
         context = {
             'mission': mission,
             'validation': validation,
         }
-
-        html_message = f"""
-        <h2>Mission rejetée</h2>
-        <p>Votre mission <strong>{mission.titre}</strong> a été rejetée.</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Motif: {validation.commentaire or 'Non spécifié'}</p>
-        """
-        plain_message = f"""
-        Mission rejetée
-
-        Votre mission {mission.titre} a été rejetée.
-        Référence: {mission.reference}
-        Motif: {validation.commentaire or 'Non spécifié'}
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('mission_rejetee', context, mission.createur.email)
 
     @staticmethod
     def send_signature_notification(signature):
         """Envoie un email de notification de signature"""
-        subject = f"Signature requise - Mission {signature.mission.reference}"
         context = {
             'signature': signature,
             'mission': signature.mission,
         }
-
-        html_message = f"""
-        <h2>Signature requise</h2>
-        <p>Votre signature est requise pour la mission <strong>{signature.mission.titre}</strong></p>
-        <p>Référence: {signature.mission.reference}</p>
-        <p>Niveau: {signature.niveau}</p>
-        """
-        plain_message = f"""
-        Signature requise
-
-        Votre signature est requise pour la mission {signature.mission.titre}
-        Référence: {signature.mission.reference}
-        Niveau: {signature.niveau}
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [signature.signataire.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('signature', context, signature.signataire.email)
 
     @staticmethod
     def send_payment_authorized_notification(mission, comptable):
         """Envoie un email de déblocage autorisé"""
-        subject = f"Déblocage autorisé - Mission {mission.reference}"
         context = {
             'mission': mission,
             'comptable': comptable,
         }
-
-        html_message = f"""
-        <h2>Déblocage autorisé</h2>
-        <p>Le déblocage des fonds est autorisé pour la mission <strong>{mission.titre}</strong></p>
-        <p>Référence: {mission.reference}</p>
-        <p>Budget approuvé: {mission.budget_estime} FCFA</p>
-        """
-        plain_message = f"""
-        Déblocage autorisé
-
-        Le déblocage des fonds est autorisé pour la mission {mission.titre}
-        Référence: {mission.reference}
-        Budget approuvé: {mission.budget_estime} FCFA
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [comptable.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('deblocage_autorise', context, comptable.email)
 
     @staticmethod
     def send_payment_made_notification(mission, avance):
         """Envoie un email de paiement effectué"""
-        subject = f"Avance versée - Mission {mission.reference}"
         context = {
             'mission': mission,
             'avance': avance,
         }
-
-        html_message = f"""
-        <h2>Avance versée</h2>
-        <p>Une avance de <strong>{avance.montant} FCFA</strong> a été versée pour votre mission.</p>
-        <p>Mission: {mission.titre}</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Mode de versement: {avance.mode_versement}</p>
-        """
-        plain_message = f"""
-        Avance versée
-
-        Une avance de {avance.montant} FCFA a été versée pour votre mission.
-        Mission: {mission.titre}
-        Référence: {mission.reference}
-        Mode de versement: {avance.mode_versement}
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('avance_versee', context, mission.createur.email)
 
     @staticmethod
     def send_return_declared_notification(mission, rh):
         """Envoie un email de retour déclaré"""
-        subject = f"Retour de mission déclaré - {mission.reference}"
         context = {'mission': mission, 'rh': rh}
-
-        html_message = f"""
-        <h2>Retour de mission déclaré</h2>
-        <p>L'agent <strong>{mission.createur.get_full_name()}</strong> a déclaré son retour de mission.</p>
-        <p>Mission: {mission.titre}</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Date de retour: {mission.date_retour_reelle}</p>
-        <p>L'agent a 72h pour déposer ses justificatifs.</p>
-        """
-        plain_message = f"""
-        Retour de mission déclaré
-
-        L'agent {mission.createur.get_full_name()} a déclaré son retour de mission.
-        Mission: {mission.titre}
-        Référence: {mission.reference}
-        Date de retour: {mission.date_retour_reelle}
-        L'agent a 72h pour déposer ses justificatifs.
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [rh.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('retour_declare', context, rh.email)
 
     @staticmethod
     def send_justificatifs_submitted_notification(mission, rh):
         """Envoie un email de justificatifs déposés"""
-        subject = f"Justificatifs déposés - {mission.reference}"
         context = {'mission': mission, 'rh': rh}
-
-        html_message = f"""
-        <h2>Justificatifs déposés</h2>
-        <p>L'agent <strong>{mission.createur.get_full_name()}</strong> a déposé ses justificatifs de mission.</p>
-        <p>Mission: {mission.titre}</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Veuillez procéder à la vérification des justificatifs.</p>
-        """
-        plain_message = f"""
-        Justificatifs déposés
-
-        L'agent {mission.createur.get_full_name()} a déposé ses justificatifs de mission.
-        Mission: {mission.titre}
-        Référence: {mission.reference}
-        Veuillez procéder à la vérification des justificatifs.
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [rh.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('justificatifs_deposes', context, rh.email)
 
     @staticmethod
     def send_justificatifs_rejected_notification(mission, commentaire):
         """Envoie un email de justificatifs rejetés"""
-        subject = f"Justificatifs rejetés - {mission.reference}"
-        context = {'mission': mission}
-
-        html_message = f"""
-        <h2>Justificatifs rejetés</h2>
-        <p>Vos justificatifs pour la mission <strong>{mission.titre}</strong> ont été rejetés.</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Motif: {commentaire}</p>
-        <p>Veuillez corriger et redéposer vos justificatifs.</p>
-        """
-        plain_message = f"""
-        Justificatifs rejetés
-
-        Vos justificatifs pour la mission {mission.titre} ont été rejetés.
-        Référence: {mission.reference}
-        Motif: {commentaire}
-        Veuillez corriger et redéposer vos justificatifs.
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        context = {'mission': mission, 'commentaire': commentaire}
+        EmailService._envoyer('justificatifs_rejetes', context, mission.createur.email)
 
     @staticmethod
     def send_fucec_refund_notification(mission, montant):
         """Envoie un email de remboursement FUCEC"""
-        subject = f"Remboursement FUCEC - {mission.reference}"
         context = {'mission': mission, 'montant': montant}
-
-        html_message = f"""
-        <h2>Remboursement FUCEC</h2>
-        <p>FUCEC doit vous rembourser <strong>{montant} FCFA</strong> pour la mission <strong>{mission.titre}</strong>.</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Le remboursement sera effectué dans les prochains jours.</p>
-        """
-        plain_message = f"""
-        Remboursement FUCEC
-
-        FUCEC doit vous rembourser {montant} FCFA pour la mission {mission.titre}.
-        Référence: {mission.reference}
-        Le remboursement sera effectué dans les prochains jours.
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('remboursement_fucec', context, mission.createur.email)
 
     @staticmethod
     def send_agent_refund_notification(mission, montant):
         """Envoie un email de remboursement agent"""
-        subject = f"Remboursement agent - {mission.reference}"
         context = {'mission': mission, 'montant': montant}
-
-        html_message = f"""
-        <h2>Remboursement requis</h2>
-        <p>Vous devez rembourser <strong>{montant} FCFA</strong> à FUCEC pour la mission <strong>{mission.titre}</strong>.</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Veuillez procéder au remboursement dans les plus brefs délais.</p>
-        """
-        plain_message = f"""
-        Remboursement requis
-
-        Vous devez rembourser {montant} FCFA à FUCEC pour la mission {mission.titre}.
-        Référence: {mission.reference}
-        Veuillez procéder au remboursement dans les plus brefs délais.
-        """
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+        EmailService._envoyer('remboursement_agent', context, mission.createur.email)
 
     @staticmethod
     def send_mission_balanced_notification(mission):
         """Envoie un email de mission équilibrée"""
-        subject = f"Mission équilibrée - {mission.reference}"
         context = {'mission': mission}
+        EmailService._envoyer('mission_equilibree', context, mission.createur.email)
 
-        html_message = f"""
-        <h2>Mission équilibrée</h2>
-        <p>La mission <strong>{mission.titre}</strong> est équilibrée.</p>
-        <p>Référence: {mission.reference}</p>
-        <p>Les dépenses correspondent exactement aux avances versées.</p>
-        """
-        plain_message = f"""
-        Mission équilibrée
-
-        La mission {mission.titre} est équilibrée.
-        Référence: {mission.reference}
-        Les dépenses correspondent exactement aux avances versées.
-        """
+    @staticmethod
+    def diffuser(nom, context, destinataires):
+        """Rend le gabarit `nom` une fois et met en file un e-mail par destinataire, en un lot."""
+        gabarit = registre.gabarit(nom)
+        subject, plain_message, html_message = gabarit.rendre(context)
+        return mettre_en_file_lot([
+            email_sortant(
+                subject, plain_message, settings.DEFAULT_FROM_EMAIL,
+                [destinataire], html_message, gabarit.categorie
+            )
+            for destinataire in destinataires
+        ])
 
-        send_mail(
+    @staticmethod
+    def _envoyer(nom, context, destinataire):
+        """Rend le gabarit `nom` et met l'e-mail dans la file d'envoi."""
+        gabarit = registre.gabarit(nom)
+        subject, plain_message, html_message = gabarit.rendre(context)
+        mettre_en_file(
             subject,
             plain_message,
             settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
+            [destinataire],
             html_message=html_message,
-            fail_silently=True
+            categorie=gabarit.categorie
         )
 
 
@@ -844,176 +663,210 @@ class TimerService:
             mission.date_limite_justificatifs = mission.date_retour_reelle + timezone.timedelta(hours=72)
             mission.save()
 
-    @staticmethod
-    def check_overdue_signatures():
-        """Vérifie les signatures en retard et envoie des relances"""
-        from .models import SignatureFinanciere
+    # Nombre d'éléments chargés, notifiés et mis à jour par lot
+    TAILLE_LOT = 500
+    DELAI_ESCALADE = timezone.timedelta(days=7)
+    DELAI_ARCHIVAGE = timezone.timedelta(days=60)
 
-        overdue_signatures = SignatureFinanciere.objects.filter(
+    @staticmethod
+    def overdue_signatures(now):
+        """Signatures en attente dont la date limite est dépassée, pas encore relancées."""
+        return SignatureFinanciere.objects.filter(
             statut='EN_ATTENTE',
-            date_limite_signature__lt=timezone.now(),
+            date_limite_signature__lt=now,
             relance_effectuee=False
         )
 
-        for signature in overdue_signatures:
-            TimerService.send_signature_reminder(signature)
-
     @staticmethod
-    def check_overdue_justificatifs():
-        """Vérifie les missions avec justificatifs en retard"""
-        from .models import Mission
+    def overdue_validations(now):
+        """Validations actives en attente dont l'échéance est dépassée, pas encore relancées."""
+        return Validation.objects.filter(
+            statut='EN_ATTENTE',
+            est_actif=True,
+            date_echeance__lt=now,
+            relance_effectuee=False
+        )
 
-        overdue_missions = Mission.objects.filter(
+    @staticmethod
+    def _overdue_justificatifs(now):
+        return Mission.objects.filter(
             retour_declare=True,
             justificatifs_deposes=False,
-            date_limite_justificatifs__lt=timezone.now()
+            date_limite_justificatifs__lt=now
         )
 
-        for mission in overdue_missions:
-            # Vérifier si ça fait 7 jours qu'on n'a pas eu de justificatifs
-            if not mission.date_derniere_relance_justificatifs:
-                days_overdue = (timezone.now() - mission.date_limite_justificatifs).days
-                if days_overdue >= 7:
-                    TimerService.escalate_to_n1(mission)
-                elif not mission.relance_justificatifs:
-                    TimerService.send_justificatifs_reminder(mission)
-            elif (timezone.now() - mission.date_derniere_relance_justificatifs).days >= 7:
-                TimerService.escalate_to_n1(mission)
+    @staticmethod
+    def justificatifs_to_remind(now):
+        """Justificatifs en retard de moins de 7 jours, jamais relancés."""
+        return TimerService._overdue_justificatifs(now).filter(
+            date_derniere_relance_justificatifs__isnull=True,
+            relance_justificatifs=False,
+            date_limite_justificatifs__gt=now - TimerService.DELAI_ESCALADE
+        )
 
     @staticmethod
-    def check_missions_to_archive():
-        """Vérifie les missions à archiver (60j après clôture)"""
-        from .models import Mission
+    def justificatifs_to_escalate(now):
+        """
+        Justificatifs en retard depuis 7 jours sans relance, ou dont la
+        dernière relance date de 7 jours, et dont le créateur a un N+1.
+        """
+        seuil = now - TimerService.DELAI_ESCALADE
+        return TimerService._overdue_justificatifs(now).filter(
+            models.Q(date_derniere_relance_justificatifs__isnull=True, date_limite_justificatifs__lte=seuil) |
+            models.Q(date_derniere_relance_justificatifs__lte=seuil),
+            createur__manager__isnull=False
+        )
 
-        missions_to_archive = Mission.objects.filter(
+    @staticmethod
+    def missions_to_archive(now):
+        """Missions clôturées depuis plus de 60 jours et non archivées."""
+        return Mission.objects.filter(
             cloturee=True,
             archivee=False,
-            date_cloture__lt=timezone.now() - timezone.timedelta(days=60)
+            date_cloture__lt=now - TimerService.DELAI_ARCHIVAGE
         )
 
-        for mission in missions_to_archive:
-            TimerService.archive_mission(mission)
+    @staticmethod
+    def check_overdue_signatures():
+        """Envoie les relances des signatures en retard ; retourne leur nombre."""
+        now = timezone.now()
+        total = 0
+        signatures = TimerService.overdue_signatures(now).select_related('mission', 'signataire')
+        for lot in TimerService._par_lots(signatures):
+            # E-mails en file et drapeaux de relance validés ensemble
+            with transaction.atomic():
+                TimerService._envoyer(TimerService._messages_relance_signature(lot))
+                SignatureFinanciere.objects.filter(pk__in=[s.pk for s in lot]).update(
+                    relance_effectuee=True,
+                    date_derniere_relance=now
+                )
+            total += len(lot)
+        return total
 
     @staticmethod
-    def send_signature_reminder(signature):
-        """Envoie une relance pour une signature en retard"""
-        subject = f"RAPPEL: Signature requise - Mission {signature.mission.reference}"
-        context = {'signature': signature, 'mission': signature.mission}
+    def check_overdue_validations():
+        """Relance les valideurs dont l'échéance est dépassée ; retourne leur nombre."""
+        now = timezone.now()
+        total = 0
+        validations = TimerService.overdue_validations(now).select_related('mission', 'valideur')
+        for lot in TimerService._par_lots(validations):
+            # E-mails en file et drapeaux de relance validés ensemble
+            with transaction.atomic():
+                TimerService._envoyer(TimerService._messages_relance_validation(lot))
+                Validation.objects.filter(pk__in=[v.pk for v in lot]).update(relance_effectuee=True)
+            total += len(lot)
+        return total
 
-        html_message = f"""
-        <h2>Rappel de signature</h2>
-        <p>Vous avez une signature en attente pour la mission <strong>{signature.mission.titre}</strong></p>
-        <p>Référence: {signature.mission.reference}</p>
-        <p>Niveau: {signature.niveau}</p>
-        <p><strong>Cette signature était attendue avant le {signature.date_limite_signature}</strong></p>
-        <p>Veuillez procéder à la signature dans les plus brefs délais.</p>
+    @staticmethod
+    def check_overdue_justificatifs():
         """
-        plain_message = f"""
-        Rappel de signature
-
-        Vous avez une signature en attente pour la mission {signature.mission.titre}
-        Référence: {signature.mission.reference}
-        Niveau: {signature.niveau}
-        Cette signature était attendue avant le {signature.date_limite_signature}
-
-        Veuillez procéder à la signature dans les plus brefs délais.
+        Relance les agents en retard de justificatifs et escalade au N+1 au-delà
+        de 7 jours, puis tous les 7 jours ; retourne (relances, escalades).
         """
+        now = timezone.now()
+        relances = 0
+        for lot in TimerService._par_lots(TimerService.justificatifs_to_remind(now).select_related('createur')):
+            # E-mails en file et drapeaux de relance validés ensemble
+            with transaction.atomic():
+                TimerService._envoyer(TimerService._messages_relance_justificatifs(lot))
+                Mission.objects.filter(pk__in=[m.pk for m in lot]).update(
+                    relance_justificatifs=True,
+                    date_derniere_relance_justificatifs=now
+                )
+            relances += len(lot)
+
+        escalades = 0
+        missions = TimerService.justificatifs_to_escalate(now).select_related('createur__manager')
+        for lot in TimerService._par_lots(missions):
+            # E-mails en file et drapeaux de relance validés ensemble
+            with transaction.atomic():
+                TimerService._envoyer(TimerService._messages_escalade(lot, now))
+                # La prochaine escalade n'aura lieu que 7 jours plus tard
+                Mission.objects.filter(pk__in=[m.pk for m in lot]).update(
+                    date_derniere_relance_justificatifs=now
+                )
+            escalades += len(lot)
+        return relances, escalades
 
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [signature.signataire.email],
-            html_message=html_message,
-            fail_silently=True
-        )
+    @staticmethod
+    def check_missions_to_archive():
+        """Archive en une requête les missions clôturées depuis 60j ; retourne leur nombre."""
+        now = timezone.now()
+        archivees = TimerService.missions_to_archive(now).update(archivee=True, date_archivage=now)
+        logger.info(f"{archivees} missions archivées automatiquement")
+        return archivees
 
-        # Marquer la relance comme effectuée
-        signature.relance_effectuee = True
-        signature.date_derniere_relance = timezone.now()
-        signature.save()
+    @staticmethod
+    def _par_lots(queryset):
+        """Parcourt le queryset par lots, par clé primaire croissante."""
+        dernier = 0
+        while True:
+            lot = list(queryset.filter(pk__gt=dernier).order_by('pk')[:TimerService.TAILLE_LOT])
+            if not lot:
+                return
+            yield lot
+            dernier = lot[-1].pk
 
     @staticmethod
-    def send_justificatifs_reminder(mission):
-        """Envoie une relance pour les justificatifs"""
-        subject = f"RAPPEL: Dépôt des justificatifs - Mission {mission.reference}"
-        context = {'mission': mission}
+    def _envoyer(messages):
+        """Met un lot d'e-mails dans la file d'envoi, en une requête."""
+        mettre_en_file_lot(messages)
 
-        html_message = f"""
-        <h2>Rappel: Dépôt des justificatifs</h2>
-        <p>La date limite pour déposer vos justificatifs de mission approche.</p>
-        <p>Mission: <strong>{mission.titre}</strong></p>
-        <p>Référence: {mission.reference}</p>
-        <p>Date limite: {mission.date_limite_justificatifs}</p>
-        <p>Veuillez déposer vos justificatifs dans les plus brefs délais.</p>
+    @staticmethod
+    def _messages(nom, objets, context, destinataire):
         """
-        plain_message = f"""
-        Rappel: Dépôt des justificatifs
-
-        La date limite pour déposer vos justificatifs de mission approche.
-        Mission: {mission.titre}
-        Référence: {mission.reference}
-        Date limite: {mission.date_limite_justificatifs}
-
-        Veuillez déposer vos justificatifs dans les plus brefs délais.
+        E-mails non enregistrés du gabarit `nom`, un par objet, rendus en lot ;
+        `context` et `destinataire` sont appelés sur chaque objet.
         """
+        gabarit = registre.gabarit(nom)
+        rendus = gabarit.rendre_lot([context(objet) for objet in objets])
+        return [
+            email_sortant(
+                subject, plain_message, settings.DEFAULT_FROM_EMAIL,
+                [destinataire(objet)], html_message, gabarit.categorie
+            )
+            for objet, (subject, plain_message, html_message) in zip(objets, rendus)
+        ]
 
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [mission.createur.email],
-            html_message=html_message,
-            fail_silently=True
+    @staticmethod
+    def _messages_relance_signature(signatures):
+        """Relances pour des signatures en retard"""
+        return TimerService._messages(
+            'relance_signature',
+            signatures,
+            lambda s: {'signature': s, 'mission': s.mission},
+            lambda s: s.signataire.email
         )
 
-        # Marquer la relance comme effectuée
-        mission.relance_justificatifs = True
-        mission.date_derniere_relance_justificatifs = timezone.now()
-        mission.save()
-
     @staticmethod
-    def escalate_to_n1(mission):
-        """Escalade vers N+1 quand les justificatifs sont en retard de 7j"""
-        n1 = mission.createur.manager
-        if n1:
-            subject = f"ESCALADE: Justificatifs en retard - Mission {mission.reference}"
-
-            html_message = f"""
-            <h2>Escalade: Justificatifs en retard</h2>
-            <p>L'agent {mission.createur.get_full_name()} n'a toujours pas déposé ses justificatifs.</p>
-            <p>Mission: <strong>{mission.titre}</strong></p>
-            <p>Référence: {mission.reference}</p>
-            <p>Date de retour: {mission.date_retour_reelle}</p>
-            <p>Délai dépassé depuis: {(timezone.now() - mission.date_limite_justificatifs).days} jours</p>
-            """
-            plain_message = f"""
-            Escalade: Justificatifs en retard
-
-            L'agent {mission.createur.get_full_name()} n'a toujours pas déposé ses justificatifs.
-            Mission: {mission.titre}
-            Référence: {mission.reference}
-            Date de retour: {mission.date_retour_reelle}
-            Délai dépassé depuis: {(timezone.now() - mission.date_limite_justificatifs).days} jours
-            """
-
-            send_mail(
-                subject,
-                plain_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [n1.email],
-                html_message=html_message,
-                fail_silently=True
-            )
+    def _messages_relance_validation(validations):
+        """Relances pour des validations dont l'échéance est dépassée"""
+        return TimerService._messages(
+            'relance_validation',
+            validations,
+            lambda v: {'validation': v, 'mission': v.mission},
+            lambda v: v.valideur.email
+        )
 
     @staticmethod
-    def archive_mission(mission):
-        """Archive automatiquement une mission clôturée depuis 60j"""
-        mission.archivee = True
-        mission.date_archivage = timezone.now()
-        mission.save()
+    def _messages_relance_justificatifs(missions):
+        """Relances pour les justificatifs"""
+        return TimerService._messages(
+            'relance_justificatifs',
+            missions,
+            lambda m: {'mission': m},
+            lambda m: m.createur.email
+        )
 
-        logger.info(f"Mission {mission.reference} archivée automatiquement")
+    @staticmethod
+    def _messages_escalade(missions, now):
+        """Escalades vers N+1 quand les justificatifs sont en retard de 7j"""
+        return TimerService._messages(
+            'escalade_justificatifs',
+            missions,
+            lambda m: {'mission': m, 'jours': (now - m.date_limite_justificatifs).days},
+            lambda m: m.createur.manager.email
+        )
 
 
 class MissionReturnService:
@@ -1094,6 +947,7 @@ class MissionReturnService:
         # Solde = Dépenses - Avances
         # Positif = FUCEC doit rembourser l'agent
         # Négatif = Agent doit rembourser FUCEC
+        mission.total_depenses = total_depenses
         mission.solde_calcule = total_depenses - total_avances
         mission.save()
 
@@ -1119,90 +973,28 @@ class MissionReturnService:
 class PDFService:
     """Service pour générer les PDFs"""
 
+    @staticmethod
+    def demander_ordre_mission(mission):
+        """
+        Met l'ordre de mission en file de génération (worker `process_pdf_jobs`) ;
+        le PDF est ensuite servi par le téléchargement de l'ordre de mission.
+        """
+        return travaux_pdf.demander(mission, 'ORDRE_MISSION')
+
     @staticmethod
     def generate_ordre_mission(mission):
         """
-        Génère l'ordre de mission en PDF
+        Génère l'ordre de mission en PDF, de façon synchrone. Le fichier du
+        worker est relu depuis le disque si les données n'ont pas changé.
         """
         try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib import colors
-            from io import BytesIO
-            from django.core.files.base import ContentFile
-
-            # Créer le buffer
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-
-            # Titre
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # Centré
-            )
-            story.append(Paragraph("ORDRE DE MISSION", title_style))
-            story.append(Spacer(1, 12))
-
-            # Informations de la mission
-            info_style = styles['Normal']
-
-            mission_data = [
-                ["Référence:", mission.reference],
-                ["Titre:", mission.titre],
-                ["Agent:", mission.createur.get_full_name()],
-                ["Entité:", mission.entite.nom if mission.entite else "N/A"],
-                ["Période:", f"Du {mission.date_debut} au {mission.date_fin}"],
-                ["Lieu:", mission.lieu_mission],
-                ["Budget estimé:", f"{mission.budget_estime:,.0f} FCFA"],
-                ["Objet:", mission.description or "N/A"],
-            ]
-
-            # Créer la table
-            table = Table(mission_data, colWidths=[100, 300])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            story.append(table)
-            story.append(Spacer(1, 20))
-
-            # Participants
-            if mission.participants.exists():
-                story.append(Paragraph("Participants:", styles['Heading3']))
-                participants = [p.get_full_name() for p in mission.participants.all()]
-                story.append(Paragraph(", ".join(participants), info_style))
-                story.append(Spacer(1, 12))
-
-            # Véhicule
-            if mission.vehicule:
-                story.append(Paragraph("Véhicule:", styles['Heading3']))
-                story.append(Paragraph(
-                    f"{mission.vehicule.marque} {mission.vehicule.modele} - {mission.vehicule.immatriculation}",
-                    info_style
-                ))
-                story.append(Spacer(1, 12))
-
-            # Générer le PDF
-            doc.build(story)
-
-            # Sauvegarder dans la mission (on pourrait créer un champ fichier dans Mission)
-            pdf_content = buffer.getvalue()
-            buffer.close()
-
-            # Pour l'exemple, on sauvegarde comme fichier temporaire
-            # En production, il faudrait ajouter un champ FileField à Mission
+            donnees = donnees_ordre_mission(mission, references.vehicule(mission.vehicule_id))
+            document = DocumentPDF.objects.filter(mission=mission, type='ORDRE_MISSION').first()
+            if document is not None and travaux_pdf.fichier_a_jour(document, empreinte_donnees(donnees)):
+                with document.fichier.open('rb') as fichier:
+                    pdf_content = fichier.read()
+            else:
+                pdf_content = rendre_ordre_mission(donnees)
             filename = f"ordre_mission_{mission.reference}.pdf"
 
             # Log de génération réussie
@@ -1213,3 +1005,257 @@ class PDFService:
         except Exception as e:
             logger.error(f"Erreur lors de la génération du PDF pour la mission {mission.reference}: {str(e)}")
             return None, None
+
+
+class StatistiquesService:
+    """Service pour les statistiques agrégées des missions"""
+
+    STATUTS = {
+        'brouillons': MissionStatus.BROUILLON,
+        'en_attente': MissionStatus.EN_ATTENTE,
+        'validees': MissionStatus.VALIDEE,
+        'en_cours': MissionStatus.EN_COURS,
+        'retours': MissionStatus.RETOUR,
+        'cloturees': MissionStatus.CLOTUREE,
+        'rejetees': MissionStatus.REJETEE,
+    }
+
+    # Dimension de regroupement -> colonnes retournées pour chaque groupe
+    DIMENSIONS = {
+        'entite': ('entite', 'entite__nom'),
+        'type': ('type',),
+        'createur': ('createur', 'createur__first_name', 'createur__last_name'),
+        'mois': ('mois',),
+    }
+
+    # Dimensions disponibles dans la table d'agrégats StatistiqueMission
+    DIMENSIONS_AGREGEES = ('entite', 'type', 'mois')
+
+    @staticmethod
+    def _montant(expression):
+        return Coalesce(
+            expression,
+            models.Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=16, decimal_places=2)
+        )
+
+    @staticmethod
+    def aggregations(compter):
+        """
+        Comptes et budgets par statut, calculés par agrégation conditionnelle.
+        `compter(condition)` renvoie l'expression de comptage des missions.
+        """
+        montant = StatistiquesService._montant
+        aggregations = {
+            'total': compter(None),
+            'budget_total': montant(models.Sum('budget_estime')),
+            'avances_total': montant(models.Sum('avance_demandee')),
+            'depenses_total': montant(models.Sum('total_depenses')),
+            'solde_total': montant(models.Sum('solde_calcule')),
+        }
+        for alias, statut in StatistiquesService.STATUTS.items():
+            condition = models.Q(statut=statut)
+            aggregations[alias] = compter(condition)
+            aggregations[f'budget_{alias}'] = montant(models.Sum('budget_estime', filter=condition))
+        return aggregations
+
+    @staticmethod
+    def compute(missions, group_by=(), date_debut=None, date_fin=None):
+        """
+        Calcule les statistiques en une seule requête SQL sur les missions.
+        Les bornes de dates et le regroupement par mois portent sur date_debut.
+        """
+        return StatistiquesService._compute(
+            missions,
+            'date_debut',
+            lambda condition: models.Count('id', filter=condition),
+            group_by, date_debut, date_fin
+        )
+
+    @staticmethod
+    def compute_from_rollup(group_by=(), date_debut=None, date_fin=None):
+        """
+        Mêmes statistiques que `compute` sur toutes les missions, lues dans la
+        table d'agrégats : le coût dépend du nombre d'agrégats, pas de missions.
+        """
+        return StatistiquesService._compute(
+            StatistiqueMission.objects.all(),
+            'jour',
+            lambda condition: Coalesce(models.Sum('nombre', filter=condition), 0),
+            group_by, date_debut, date_fin
+        )
+
+    @staticmethod
+    def _compute(queryset, champ_date, compter, group_by, date_debut, date_fin):
+        if date_debut:
+            queryset = queryset.filter(**{f'{champ_date}__gte': date_debut})
+        if date_fin:
+            queryset = queryset.filter(**{f'{champ_date}__lte': date_fin})
+
+        aggregations = StatistiquesService.aggregations(compter)
+        if not group_by:
+            return queryset.aggregate(**aggregations)
+
+        if 'mois' in group_by:
+            queryset = queryset.annotate(mois=TruncMonth(champ_date))
+        colonnes = [
+            colonne
+            for dimension in group_by
+            for colonne in StatistiquesService.DIMENSIONS[dimension]
+        ]
+        groupes = list(
+            queryset.order_by().values(*colonnes).annotate(**aggregations).order_by(*colonnes)
+        )
+
+        # Les totaux se déduisent des groupes, sans seconde requête
+        stats = {key: sum(groupe[key] for groupe in groupes) for key in aggregations}
+        stats['groupes'] = groupes
+        return stats
+
+
+class MissionImportService:
+    """
+    Import en masse de missions depuis un fichier (voir missions.imports).
+
+    Les lignes sont traitées par lots : validation sans requête, résolution
+    des utilisateurs et entités en une requête par lot, réservation des
+    références en un seul incrément de séquence, puis `bulk_create` des
+    missions et des participants. Une ligne invalide est reportée sans
+    interrompre l'import.
+    """
+
+    TAILLE_LOT = 500
+
+    @staticmethod
+    def importer(lignes, importeur, peut_assigner=False, taille_lot=None):
+        """
+        Importe les (numéro, ligne) de `lignes`. Sans colonne `createur`, la
+        mission est créée au nom de `importeur` ; `peut_assigner` autorise
+        d'autres créateurs.
+        """
+        taille_lot = taille_lot or MissionImportService.TAILLE_LOT
+        rapport = {'lignes': 0, 'crees': 0, 'erreurs': []}
+        references_vues = set()
+        lignes = iter(lignes)
+
+        while True:
+            lot = list(itertools.islice(lignes, taille_lot))
+            if not lot:
+                break
+            rapport['lignes'] += len(lot)
+            crees, erreurs = MissionImportService._importer_lot(
+                lot, importeur, peut_assigner, references_vues
+            )
+            rapport['crees'] += crees
+            rapport['erreurs'].extend(erreurs)
+
+        return rapport
+
+    @staticmethod
+    def _importer_lot(lot, importeur, peut_assigner, references_vues):
+        from .serializers import MissionImportSerializer
+
+        erreurs = []
+        valides = []
+        for numero, ligne in lot:
+            serializer = MissionImportSerializer(data=ligne)
+            if serializer.is_valid():
+                valides.append((numero, serializer.validated_data))
+            else:
+                erreurs.append({'ligne': numero, 'erreurs': serializer.errors})
+
+        # Une requête par lot pour chaque relation
+        identifiants, codes, references = set(), set(), set()
+        for _, donnees in valides:
+            if 'createur' in donnees:
+                identifiants.add(donnees['createur'])
+            identifiants.update(MissionImportService._participants(donnees))
+            if 'entite' in donnees:
+                codes.add(donnees['entite'])
+            if 'reference' in donnees:
+                references.add(donnees['reference'])
+        utilisateurs = {u.identifiant: u for u in User.objects.filter(identifiant__in=identifiants)}
+        entites = {e.code: e for e in Entite.objects.filter(code__in=codes)}
+        references_existantes = set(
+            Mission.objects.filter(reference__in=references).values_list('reference', flat=True)
+        )
+
+        a_creer = []
+        for numero, donnees in valides:
+            problemes = {}
+            createur = importeur
+            if 'createur' in donnees:
+                createur = utilisateurs.get(donnees['createur'])
+                if createur is None:
+                    problemes['createur'] = [f"Utilisateur inconnu: {donnees['createur']}"]
+                elif createur != importeur and not peut_assigner:
+                    problemes['createur'] = ['Vous ne pouvez importer que vos propres missions']
+            entite = None
+            if 'entite' in donnees:
+                entite = entites.get(donnees['entite'])
+                if entite is None:
+                    problemes['entite'] = [f"Entité inconnue: {donnees['entite']}"]
+            inconnus = [p for p in MissionImportService._participants(donnees) if p not in utilisateurs]
+            if inconnus:
+                problemes['participants'] = [f"Utilisateurs inconnus: {', '.join(inconnus)}"]
+            reference = donnees.get('reference')
+            if reference in references_existantes or reference in references_vues:
+                problemes['reference'] = [f'Référence déjà utilisée: {reference}']
+
+            if problemes:
+                erreurs.append({'ligne': numero, 'erreurs': problemes})
+                continue
+            if reference:
+                references_vues.add(reference)
+
+            champs = {
+                champ: valeur for champ, valeur in donnees.items()
+                if champ not in ('createur', 'entite', 'participants')
+            }
+            mission = Mission(createur=createur, entite=entite, **champs)
+            participants = [utilisateurs[p] for p in MissionImportService._participants(donnees)]
+            a_creer.append((numero, mission, participants))
+
+        if not a_creer:
+            return 0, erreurs
+
+        sans_reference = [mission for _, mission, _ in a_creer if not mission.reference]
+        if sans_reference:
+            reservees = SequenceReference.prochaines_references(
+                'MIS', timezone.now().date(), len(sans_reference)
+            )
+            for mission, reference in zip(sans_reference, reservees):
+                mission.reference = reference
+
+        try:
+            with transaction.atomic():
+                missions = Mission.objects.bulk_create([mission for _, mission, _ in a_creer])
+                Participant = Mission.participants.through
+                Participant.objects.bulk_create([
+                    Participant(mission_id=mission.pk, user_id=participant.pk)
+                    for mission, (_, _, participants) in zip(missions, a_creer)
+                    for participant in set(participants)
+                ])
+                # bulk_create ne passe pas par Mission.save() ni par les signaux :
+                # statistiques, flux de l'échéancier et comptes des listes sont
+                # tenus ici (les missions importées, en brouillon, n'ont pas de PDF)
+                StatistiqueMission.ajouter_missions(missions)
+                ChangementEcheance.objects.bulk_create([
+                    ChangementEcheance(modele='mission', objet_id=mission.pk) for mission in missions
+                ])
+                invalider_comptes(Mission)
+                transaction.on_commit(lambda: invalider_comptes(Mission))
+        except DatabaseError as e:
+            logger.exception("Échec de l'import d'un lot de missions")
+            erreurs.extend(
+                {'ligne': numero, 'erreurs': {'non_field_errors': [str(e)]}}
+                for numero, _, _ in a_creer
+            )
+            return 0, erreurs
+
+        return len(missions), erreurs
+
+    @staticmethod
+    def _participants(donnees):
+        """Identifiants listés dans la colonne participants (séparés par , ; ou |)."""
+        return [p for p in re.split(r'[,;|\s]+', donnees.get('participants', '')) if p]
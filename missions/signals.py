@@ -0,0 +1,173 @@
+"""
+Signaux de l'application missions
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import User, Entite
+from . import references, stockage, travaux_pdf
+from .models import (
+    Mission, StatistiqueMission, Validation, SignatureFinanciere, ChangementEcheance, Notification,
+    CompteurNotifications, Justificatif, Avance, Vehicule
+)
+from .pagination import invalider_comptes
+from .temps_reel import centre
+
+
+@receiver(post_delete, sender=Mission)
+def retirer_statistique_mission(sender, instance, **kwargs):
+    """Retire la mission supprimée des statistiques matérialisées."""
+    contribution = getattr(instance, '_statistique', None) or instance._contribution_statistique()
+    StatistiqueMission.appliquer(contribution, -1)
+
+
+@receiver(pre_delete, sender=Entite)
+def detacher_statistiques_entite(sender, instance, **kwargs):
+    """Les missions de l'entité supprimée passent sans entité : leurs agrégats aussi."""
+    StatistiqueMission.detacher_entite(instance.pk)
+
+
+@receiver(post_delete, sender=Notification)
+def retirer_notification_non_lue(sender, instance, **kwargs):
+    """Décompte une notification non lue supprimée."""
+    if not instance.lue:
+        CompteurNotifications.ajuster([instance.destinataire_id], -1)
+
+
+@receiver(post_save, sender=Notification)
+def publier_notification(sender, instance, created=False, raw=False, **kwargs):
+    """Réveille les clients temps réel du destinataire une fois la notification validée."""
+    if created and not raw:
+        transaction.on_commit(lambda: centre.publier([instance.destinataire_id]))
+
+
+def _etat_echeances(instance):
+    """Valeurs chargées des champs lus par l'échéancier (sans charger les champs différés)."""
+    return {
+        attname: instance.__dict__[attname]
+        for attname in _champs_echeances(type(instance))
+        if attname in instance.__dict__
+    }
+
+
+def _champs_echeances(modele):
+    return [
+        modele._meta.get_field(champ).attname
+        for champ in ChangementEcheance.CHAMPS_SUIVIS[modele._meta.model_name]
+    ]
+
+
+@receiver(post_init, sender=Mission)
+@receiver(post_init, sender=Validation)
+@receiver(post_init, sender=SignatureFinanciere)
+def memoriser_echeances(sender, instance, **kwargs):
+    """Mémorise les champs d'échéance tels que chargés."""
+    instance._echeances = _etat_echeances(instance)
+
+
+@receiver(post_save, sender=Mission)
+@receiver(post_save, sender=Validation)
+@receiver(post_save, sender=SignatureFinanciere)
+def signaler_changement_echeance(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Signale à l'échéancier un objet dont un champ d'échéance a changé."""
+    if raw:
+        return
+    champs = ChangementEcheance.CHAMPS_SUIVIS[sender._meta.model_name]
+    if update_fields is not None and not set(update_fields) & set(champs):
+        return
+    avant, instance._echeances = getattr(instance, '_echeances', None), _etat_echeances(instance)
+    if created or avant != instance._echeances:
+        ChangementEcheance.objects.create(modele=sender._meta.model_name, objet_id=instance.pk)
+
+
+# Listes paginées dont le périmètre suit les hiérarchies d'utilisateurs et d'entités
+MODELES_PERIMETRE = (Mission, Validation, SignatureFinanciere, Justificatif, Avance, User)
+
+
+@receiver(post_save, sender=Mission)
+@receiver(post_save, sender=Validation)
+@receiver(post_save, sender=SignatureFinanciere)
+@receiver(post_save, sender=Justificatif)
+@receiver(post_save, sender=Avance)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Entite)
+@receiver(post_delete, sender=Mission)
+@receiver(post_delete, sender=Validation)
+@receiver(post_delete, sender=SignatureFinanciere)
+@receiver(post_delete, sender=Justificatif)
+@receiver(post_delete, sender=Avance)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Entite)
+def invalider_comptes_listes(sender, update_fields=None, **kwargs):
+    """Périme les COUNT en cache des listes paginées du modèle modifié."""
+    # Une connexion ne met à jour que last_login : aucun compte ne change
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # Un utilisateur ou une entité déplacé change le périmètre de toutes les listes
+    modeles = MODELES_PERIMETRE if sender in (User, Entite) else (sender,)
+
+    def invalider():
+        for modele in modeles:
+            invalider_comptes(modele)
+
+    # Comme pour les références : de nouveau à la validation, pour qu'un
+    # COUNT lu avant le commit ne reste pas en cache sous la nouvelle version
+    invalider()
+    transaction.on_commit(invalider)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Entite)
+@receiver(post_delete, sender=Entite)
+@receiver(post_save, sender=Vehicule)
+@receiver(post_delete, sender=Vehicule)
+def invalider_references(sender, update_fields=None, **kwargs):
+    """Périme le cache des données de référence du modèle modifié."""
+    # Une connexion ne met à jour que last_login : rien à périmer
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    espaces = {
+        User: (references.UTILISATEURS, references.ENTITES),
+        Entite: (references.ENTITES,),
+        Vehicule: (references.VEHICULES,),
+    }[sender]
+
+    def invalider():
+        for espace in espaces:
+            references.invalider(espace)
+
+    # Immédiatement, et de nouveau à la validation : une lecture concurrente
+    # faite avant le commit ne peut pas remettre en cache l'ancienne valeur
+    invalider()
+    transaction.on_commit(invalider)
+
+
+@receiver(post_save, sender=Mission)
+def perimer_documents_pdf(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Remet en file les PDF de la mission quand un champ qu'ils affichent a pu changer."""
+    if created or raw:
+        return
+    if update_fields is not None and not (set(update_fields) & travaux_pdf.CHAMPS_ORDRE_MISSION):
+        return
+    travaux_pdf.redemander([instance.pk])
+
+
+@receiver(m2m_changed, sender=Mission.participants.through)
+def perimer_documents_pdf_participants(sender, instance, action, reverse=False, pk_set=None, **kwargs):
+    """Les participants figurent sur l'ordre de mission."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Modification depuis l'utilisateur : missions concernées dans pk_set (sauf clear)
+        if pk_set:
+            travaux_pdf.redemander(pk_set)
+    else:
+        travaux_pdf.redemander([instance.pk])
+
+
+@receiver(post_delete, sender=Justificatif)
+def liberer_contenu_justificatif(sender, instance, **kwargs):
+    """Le justificatif supprimé libère sa référence au contenu stocké."""
+    stockage.liberer([instance.contenu_id])
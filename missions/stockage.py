@@ -0,0 +1,175 @@
+"""
+Stockage dédupliqué des fichiers justificatifs
+
+Chaque contenu est écrit une seule fois, sous un chemin dérivé de son
+SHA-256 (FichierStocke). Au téléversement, l'empreinte calculée pendant le
+flux (missions.uploads) suffit à reconnaître un doublon : le justificatif
+est rattaché au contenu existant et le fichier reçu est abandonné sans
+être recopié dans les médias.
+
+Les justificatifs comptent leurs références au contenu ; lorsque la
+dernière est libérée (suppression, remplacement du fichier), la ligne est
+supprimée dans la transaction et le fichier après sa validation. La
+commande `gc_justificatif_files` recompte les références et collecte ce
+qui aurait échappé à ce suivi.
+
+Un contenu recréé alors que le fichier d'une collecte précédente n'est pas
+encore effacé reçoit un autre nom (suffixe du stockage) : l'effacement
+différé ne peut pas emporter le fichier du nouveau contenu.
+"""
+import hashlib
+import logging
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import FichierStocke, Justificatif
+
+# Répertoire des contenus (voir chemin_fichier_stocke)
+REPERTOIRE = 'justificatifs/contenus'
+
+logger = logging.getLogger(__name__)
+
+
+def empreinte(fichier):
+    """SHA-256 du fichier : calculé pendant le téléversement, ou relu par morceaux."""
+    if hasattr(fichier, 'hash_sha256'):
+        return fichier.hash_sha256
+    sha256 = hashlib.sha256()
+    fichier.seek(0)
+    for morceau in fichier.chunks():
+        sha256.update(morceau)
+    fichier.seek(0)
+    return sha256.hexdigest()
+
+
+def stocker(fichier):
+    """
+    Contenu stocké du fichier, avec une référence de plus. Seul un contenu
+    inconnu est écrit ; un doublon n'est pas recopié. À appeler dans la
+    transaction qui enregistre le justificatif.
+    """
+    sha256 = empreinte(fichier)
+    with transaction.atomic():
+        contenu = FichierStocke.objects.select_for_update().filter(sha256=sha256).first()
+        if contenu is not None:
+            if not contenu.fichier.storage.exists(contenu.fichier.name):
+                # Fichier perdu (restauration partielle) : réécrit depuis ce téléversement
+                contenu.fichier.save(fichier.name, fichier, save=False)
+                FichierStocke.objects.filter(pk=contenu.pk).update(fichier=contenu.fichier.name)
+            FichierStocke.objects.filter(pk=contenu.pk).update(references=F('references') + 1)
+            contenu.refresh_from_db(fields=['references'])
+            return contenu
+
+        contenu = FichierStocke(
+            sha256=sha256,
+            taille=fichier.size,
+            type_mime=getattr(fichier, 'content_type', '') or '',
+            references=1,
+        )
+        contenu.fichier.save(fichier.name, fichier, save=False)
+        try:
+            with transaction.atomic():
+                contenu.save()
+        except IntegrityError:
+            # Même contenu enregistré en parallèle : le nôtre est superflu
+            contenu.fichier.storage.delete(contenu.fichier.name)
+            contenu = FichierStocke.objects.select_for_update().get(sha256=sha256)
+            FichierStocke.objects.filter(pk=contenu.pk).update(references=F('references') + 1)
+            contenu.refresh_from_db(fields=['references'])
+        return contenu
+
+
+def liberer(contenu_ids):
+    """
+    Retire une référence par id donné (répétable) ; les contenus qui n'en
+    ont plus sont supprimés, leur fichier après validation de la transaction.
+    """
+    comptes = Counter(pk for pk in contenu_ids if pk is not None)
+    if not comptes:
+        return 0
+    with transaction.atomic():
+        for pk, nombre in comptes.items():
+            FichierStocke.objects.filter(pk=pk).update(references=Greatest(F('references') - nombre, 0))
+        return collecter(FichierStocke.objects.filter(pk__in=comptes))
+
+
+def collecter(queryset=None):
+    """
+    Supprime les contenus sans référence (du queryset donné) ; retourne leur
+    nombre. Un contenu encore désigné par un justificatif (références
+    faussées) est conservé, en attendant `recompter`.
+    """
+    queryset = FichierStocke.objects.all() if queryset is None else queryset
+    with transaction.atomic():
+        orphelins = list(queryset.select_for_update().filter(references=0, justificatifs__isnull=True))
+        if not orphelins:
+            return 0
+        FichierStocke.objects.filter(pk__in=[contenu.pk for contenu in orphelins], references=0).delete()
+        noms = [(contenu.fichier.storage, contenu.fichier.name) for contenu in orphelins]
+        transaction.on_commit(lambda: _effacer(noms))
+    return len(orphelins)
+
+
+def recompter():
+    """Recalcule les références depuis les justificatifs ; retourne le nombre de contenus corrigés."""
+    comptes = (
+        Justificatif.objects.filter(contenu=OuterRef('pk'))
+        .order_by().values('contenu').annotate(n=Count('pk')).values('n')
+    )
+    with transaction.atomic():
+        return (
+            FichierStocke.objects.annotate(reel=Coalesce(Subquery(comptes), 0))
+            .exclude(references=F('reel'))
+            .update(references=Coalesce(Subquery(comptes), 0))
+        )
+
+
+def importer(justificatif):
+    """
+    Passe le fichier d'un justificatif antérieur au stockage dédupliqué ;
+    l'ancien fichier est effacé après validation.
+    """
+    ancien = justificatif.fichier
+    with transaction.atomic():
+        with ancien.open('rb'):
+            contenu = stocker(ancien)
+        Justificatif.objects.filter(pk=justificatif.pk).update(
+            contenu=contenu, fichier=contenu.fichier.name, hash_sha256=contenu.sha256, taille=contenu.taille
+        )
+        if ancien.name != contenu.fichier.name:
+            noms = [(ancien.storage, ancien.name)]
+            transaction.on_commit(lambda: _effacer(noms))
+    return contenu
+
+
+def fichiers_orphelins(storage, delai):
+    """
+    Fichiers du répertoire des contenus qu'aucune ligne ne désigne (contenu
+    écrit par une transaction annulée), plus vieux que `delai`.
+    """
+    limite = timezone.now() - delai
+    connus = set(FichierStocke.objects.values_list('fichier', flat=True))
+    pile = [REPERTOIRE]
+    while pile:
+        repertoire = pile.pop()
+        try:
+            sous_repertoires, noms = storage.listdir(repertoire)
+        except FileNotFoundError:
+            continue
+        pile.extend(f"{repertoire}/{nom}" for nom in sous_repertoires)
+        for nom in noms:
+            chemin = f"{repertoire}/{nom}"
+            if chemin not in connus and storage.get_modified_time(chemin) < limite:
+                yield chemin
+
+
+def _effacer(noms):
+    for storage, nom in noms:
+        try:
+            storage.delete(nom)
+        except OSError:
+            logger.exception(f"Échec de suppression du fichier {nom}")
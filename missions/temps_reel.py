@@ -0,0 +1,146 @@
+"""
+Diffusion en temps réel des notifications (SSE et long-poll)
+
+Un seul lecteur par processus interroge la table Notification
+(`id > dernier id vu`) tant qu'au moins un client attend, et réveille les
+clients des destinataires concernés ; un client inactif ne coûte donc
+aucune requête. Les notifications créées dans le processus réveillent
+aussi immédiatement leurs destinataires (signal post_save / diffusion).
+
+Le « jeton de version » d'un client est l'id de la dernière notification
+reçue : à la reconnexion, il ne reçoit que les suivantes.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class CentreNotifications:
+    """
+    Abonnements des clients connectés, et lecteur partagé de la table
+    Notification. Chaque boucle d'événements (worker ASGI, tests) a ses
+    propres abonnés et son propre lecteur.
+    """
+
+    # Intervalle entre deux lectures de la table tant qu'un client attend
+    INTERVALLE = 1.0
+
+    def __init__(self, intervalle=None):
+        self.intervalle = intervalle or self.INTERVALLE
+        # Boucle -> {utilisateur_id: {événements}} ; une boucle fermée disparaît avec elle
+        self.abonnes = weakref.WeakKeyDictionary()
+        self.lecteurs = weakref.WeakKeyDictionary()
+        # publier() parcourt les boucles depuis d'autres threads
+        self.verrou = threading.Lock()
+
+    def abonner(self, utilisateur_id):
+        """Événement réveillé à chaque nouvelle notification de l'utilisateur."""
+        boucle = asyncio.get_running_loop()
+        with self.verrou:
+            abonnes = self.abonnes.setdefault(boucle, defaultdict(set))
+        evenement = asyncio.Event()
+        abonnes[utilisateur_id].add(evenement)
+        lecteur = self.lecteurs.get(boucle)
+        if lecteur is None or lecteur.done():
+            self.lecteurs[boucle] = boucle.create_task(self._lire(abonnes))
+        return evenement
+
+    def desabonner(self, utilisateur_id, evenement):
+        boucle = asyncio.get_running_loop()
+        abonnes = self.abonnes.get(boucle, {})
+        evenements = abonnes.get(utilisateur_id)
+        if evenements is not None:
+            evenements.discard(evenement)
+            if not evenements:
+                del abonnes[utilisateur_id]
+        if not abonnes:
+            # Plus personne n'attend sur cette boucle : le lecteur s'arrête
+            lecteur = self.lecteurs.pop(boucle, None)
+            if lecteur is not None:
+                lecteur.cancel()
+
+    def publier(self, utilisateur_ids):
+        """Réveille les clients des utilisateurs donnés (appelable depuis n'importe quel thread)."""
+        utilisateur_ids = set(utilisateur_ids)
+        with self.verrou:
+            boucles = [(boucle, abonnes) for boucle, abonnes in self.abonnes.items() if abonnes]
+        for boucle, abonnes in boucles:
+            if boucle.is_closed():
+                continue
+            try:
+                boucle.call_soon_threadsafe(self._reveiller, abonnes, utilisateur_ids)
+            except RuntimeError:
+                pass
+
+    @staticmethod
+    def _reveiller(abonnes, utilisateur_ids):
+        for utilisateur_id in utilisateur_ids & abonnes.keys():
+            for evenement in abonnes[utilisateur_id]:
+                evenement.set()
+
+    async def _lire(self, abonnes):
+        """Lecture périodique des nouvelles notifications, arrêtée quand plus personne n'attend."""
+        # Relu à chaque démarrage, pour ne pas reparcourir l'historique
+        dernier_id = await sync_to_async(self._dernier_id)()
+        while abonnes:
+            await asyncio.sleep(self.intervalle)
+            try:
+                nouvelles = await sync_to_async(self._nouvelles)(dernier_id)
+            except Exception:
+                logger.exception("Échec de lecture des nouvelles notifications")
+                continue
+            if nouvelles:
+                dernier_id = max(pk for pk, _ in nouvelles)
+                self._reveiller(abonnes, {destinataire_id for _, destinataire_id in nouvelles})
+
+    @staticmethod
+    def _dernier_id():
+        return Notification.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    @staticmethod
+    def _nouvelles(dernier_id):
+        return list(Notification.objects.filter(id__gt=dernier_id).values_list('id', 'destinataire_id'))
+
+    async def attendre(self, utilisateur_id, depuis, delai):
+        """
+        Notifications de l'utilisateur d'id supérieur à `depuis` ; attend au
+        plus `delai` secondes qu'il en arrive. Retourne une liste (vide à
+        l'expiration du délai).
+        """
+        evenement = self.abonner(utilisateur_id)
+        try:
+            notifications = await sync_to_async(self.notifications)(utilisateur_id, depuis)
+            if notifications:
+                return notifications
+            try:
+                await asyncio.wait_for(evenement.wait(), delai)
+            except asyncio.TimeoutError:
+                return []
+            return await sync_to_async(self.notifications)(utilisateur_id, depuis)
+        finally:
+            self.desabonner(utilisateur_id, evenement)
+
+    @staticmethod
+    def notifications(utilisateur_id, depuis, limite=100):
+        return list(
+            Notification.objects.filter(destinataire_id=utilisateur_id, id__gt=depuis).order_by('id')[:limite]
+        )
+
+    @staticmethod
+    def version(utilisateur_id):
+        """Jeton de départ : id de la dernière notification de l'utilisateur."""
+        return (
+            Notification.objects.filter(destinataire_id=utilisateur_id)
+            .order_by('-id').values_list('id', flat=True).first() or 0
+        )
+
+
+centre = CentreNotifications()
@@ -0,0 +1,859 @@
+"""
+Tests de l'application missions
+"""
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+from smtplib import SMTPException
+from unittest import mock, skipIf, skipUnless
+
+from django.core import mail, signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from users.models import User, Entite
+from . import stockage, travaux_pdf
+from .imports import lire_fichier
+from .management.commands.check_query_budget import Command as BudgetRequetesCommand
+from .models import (
+    Mission, MissionStatus, StatistiqueMission, SequenceReference, EmailSortant, Notification,
+    Justificatif, FichierStocke, DocumentPDF, ChangementEcheance, CompteurNotifications
+)
+from .outbox import OutboxWorker, mettre_en_file
+from .pagination import compte_en_cache, decoder_curseur, encoder_curseur
+from .scheduler import Echeancier, TypeEcheance
+from .services import MissionImportService, NotificationService, ValidationService
+from .travaux_pdf import GenerateurPDF
+from .uploads import JustificatifUploadHandler
+from .temps_reel import CentreNotifications
+from .views import SEL_JETON_FLUX, NotificationListView, OrdreMissionPDFView, OrdresMissionExportView
+
+
+def creer_mission(createur, **champs):
+    valeurs = {
+        'titre': 'Mission',
+        'date_debut': date(2026, 1, 5),
+        'date_fin': date(2026, 1, 7),
+        'lieu_mission': 'Lomé',
+        'createur': createur,
+    }
+    valeurs.update(champs)
+    return Mission.objects.create(**valeurs)
+
+
+class StatistiqueMissionTests(TestCase):
+    """Agrégats maintenus incrémentalement == agrégats reconstruits."""
+
+    def setUp(self):
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.entite = Entite.objects.create(nom='Agence', code='AG1')
+
+    @staticmethod
+    def agregats():
+        return sorted(
+            StatistiqueMission.objects.values_list(
+                'entite_id', 'type', 'statut', 'jour', 'nombre',
+                'budget_estime', 'avance_demandee', 'total_depenses', 'solde_calcule'
+            ),
+            key=str
+        )
+
+    def assertCoherent(self):
+        incrementaux = self.agregats()
+        StatistiqueMission.reconstruire()
+        self.assertEqual(incrementaux, self.agregats())
+
+    def test_creation_modification_suppression(self):
+        missions = [
+            creer_mission(self.agent, budget_estime=Decimal('1000')),
+            creer_mission(self.agent, budget_estime=Decimal('2500')),
+            creer_mission(self.agent, entite=self.entite, budget_estime=Decimal('400')),
+        ]
+        self.assertCoherent()
+
+        missions[0].statut = MissionStatus.EN_ATTENTE
+        missions[0].save()
+        missions[1].budget_estime = Decimal('3000')
+        missions[1].save()
+        missions[2].entite = None
+        missions[2].save()
+        self.assertCoherent()
+
+        missions[0].delete()
+        self.assertCoherent()
+
+    def test_suppression_d_entite(self):
+        creer_mission(self.agent, entite=self.entite, budget_estime=Decimal('400'))
+        creer_mission(self.agent, budget_estime=Decimal('100'))
+        self.entite.delete()
+        self.assertEqual(Mission.objects.filter(entite__isnull=True).count(), 2)
+        self.assertEqual(
+            list(StatistiqueMission.objects.values_list('entite_id', 'nombre', 'budget_estime')),
+            [(None, 2, Decimal('500'))]
+        )
+        self.assertCoherent()
+
+    def test_import_en_masse(self):
+        lignes = [
+            (numero, {
+                'titre': f'Import {numero}', 'date_debut': '2026-02-01', 'date_fin': '2026-02-03',
+                'lieu_mission': 'Kara', 'budget_estime': '150',
+            })
+            for numero in range(2, 7)
+        ]
+        rapport = MissionImportService.importer(lignes, self.agent)
+        self.assertEqual(rapport['crees'], 5)
+        self.assertCoherent()
+
+    def test_un_seul_agregat_sans_entite(self):
+        creer_mission(self.agent)
+        creer_mission(self.agent)
+        self.assertEqual(StatistiqueMission.objects.filter(entite__isnull=True).count(), 1)
+        self.assertEqual(StatistiqueMission.objects.get().nombre, 2)
+
+    def test_agregat_vide_supprime(self):
+        mission = creer_mission(self.agent)
+        mission.delete()
+        self.assertFalse(StatistiqueMission.objects.exists())
+
+
+class SequenceReferenceTests(TestCase):
+    """Références uniques et consécutives par jour."""
+
+    def setUp(self):
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+
+    def test_references_uniques(self):
+        references = [creer_mission(self.agent).reference for _ in range(5)]
+        references += SequenceReference.prochaines_references('MIS', timezone.now().date(), 5)
+        references += [creer_mission(self.agent).reference for _ in range(5)]
+        self.assertEqual(len(set(references)), 15)
+        numeros = [int(reference.rsplit('-', 1)[1]) for reference in references]
+        self.assertEqual(numeros, list(range(1, 16)))
+
+    def test_compteur_par_jour(self):
+        jour = date(2026, 3, 1)
+        self.assertEqual(SequenceReference.prochaine_reference('MIS', jour), 'MIS-20260301-001')
+        self.assertEqual(SequenceReference.prochaine_reference('MIS', jour + timedelta(days=1)), 'MIS-20260302-001')
+        self.assertEqual(list(SequenceReference.reserver('MIS', jour, 3)), [2, 3, 4])
+
+
+class SequenceReferenceConcurrenceTests(TransactionTestCase):
+    """Missions créées depuis plusieurs threads : aucune référence en double, aucune erreur."""
+
+    THREADS = 8
+    PAR_THREAD = 10
+
+    def test_creations_simultanees(self):
+        agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        barriere = threading.Barrier(self.THREADS)
+        references, erreurs = [], []
+        verrou = threading.Lock()
+
+        def creer(index):
+            try:
+                barriere.wait()
+                for i in range(self.PAR_THREAD):
+                    reference = creer_mission(agent, titre=f'Mission {index}-{i}').reference
+                    with verrou:
+                        references.append(reference)
+            except Exception as e:
+                with verrou:
+                    erreurs.append(f'thread {index}: {e!r}')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=creer, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erreurs, [])
+        self.assertEqual(len(references), self.THREADS * self.PAR_THREAD)
+        self.assertEqual(len(set(references)), len(references))
+        self.assertEqual(SequenceReference.objects.get().valeur, len(references))
+
+
+class MissionImportTests(TestCase):
+    """Import de fichiers : erreurs reportées par ligne, lignes valides créées."""
+
+    def setUp(self):
+        self.rh = User.objects.create_user('rh', 'rh@test.local', 'pw', role='RH')
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.entite = Entite.objects.create(nom='Agence', code='AG1')
+
+    def importer(self, contenu, nom='missions.csv'):
+        lignes = lire_fichier(io.BytesIO(contenu), nom)
+        return MissionImportService.importer(lignes, self.rh, peut_assigner=True)
+
+    def test_erreurs_par_ligne(self):
+        rapport = self.importer(
+            'titre;date_debut;date_fin;lieu_mission;createur;entite\n'
+            'Valide;2026-02-01;2026-02-03;Kara;agent;AG1\n'
+            'Dates inversées;2026-02-05;2026-02-01;Kara;agent;AG1\n'
+            'Créateur inconnu;2026-02-01;2026-02-03;Kara;fantome;AG1\n'
+            'Entité inconnue;2026-02-01;2026-02-03;Kara;agent;XX9\n'.encode()
+        )
+        self.assertEqual((rapport['lignes'], rapport['crees']), (4, 1))
+        erreurs = {erreur['ligne']: erreur['erreurs'] for erreur in rapport['erreurs']}
+        self.assertEqual(sorted(erreurs), [3, 4, 5])
+        self.assertIn('non_field_errors', erreurs[3])
+        self.assertEqual(erreurs[4], {'createur': ['Utilisateur inconnu: fantome']})
+        self.assertEqual(erreurs[5], {'entite': ['Entité inconnue: XX9']})
+        mission = Mission.objects.get()
+        self.assertEqual((mission.titre, mission.createur, mission.entite), ('Valide', self.agent, self.entite))
+
+    def test_reference_en_double(self):
+        creer_mission(self.agent, reference='MIS-EXISTANTE')
+        rapport = self.importer(
+            'titre,date_debut,date_fin,lieu_mission,reference\n'
+            'Première,2026-02-01,2026-02-03,Kara,MIS-IMPORT-1\n'
+            'Doublon,2026-02-01,2026-02-03,Kara,MIS-IMPORT-1\n'
+            'Existante,2026-02-01,2026-02-03,Kara,MIS-EXISTANTE\n'.encode()
+        )
+        self.assertEqual(rapport['crees'], 1)
+        self.assertEqual([erreur['ligne'] for erreur in rapport['erreurs']], [3, 4])
+        self.assertEqual(
+            rapport['erreurs'][0]['erreurs'], {'reference': ['Référence déjà utilisée: MIS-IMPORT-1']}
+        )
+        self.assertEqual(Mission.objects.get(reference='MIS-IMPORT-1').titre, 'Première')
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl non installé')
+    def test_xlsx(self):
+        from openpyxl import Workbook
+
+        classeur = Workbook()
+        feuille = classeur.active
+        feuille.append(['Titre', 'Date debut', 'Date fin', 'Lieu mission', 'Entite'])
+        feuille.append(['Tournée', datetime(2026, 2, 1), datetime(2026, 2, 3), 'Sokodé', 'AG1'])
+        feuille.append([None, None, None, None, None])
+        feuille.append(['Sans dates', None, None, 'Kara', None])
+        fichier = io.BytesIO()
+        classeur.save(fichier)
+
+        rapport = self.importer(fichier.getvalue(), 'missions.xlsx')
+        self.assertEqual((rapport['lignes'], rapport['crees']), (2, 1))
+        self.assertEqual(rapport['erreurs'][0]['ligne'], 4)
+        mission = Mission.objects.get()
+        self.assertEqual((mission.date_debut, mission.entite), (date(2026, 2, 1), self.entite))
+
+    @skipIf(find_spec('openpyxl'), 'openpyxl installé')
+    def test_xlsx_sans_openpyxl(self):
+        with self.assertRaisesMessage(ValueError, 'openpyxl'):
+            self.importer(b'PK', 'missions.xlsx')
+
+    def test_format_inconnu(self):
+        with self.assertRaisesMessage(ValueError, 'CSV ou XLSX'):
+            self.importer(b'', 'missions.ods')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTests(TestCase):
+    """Réservation et nouvelles tentatives de la file d'e-mails."""
+
+    def worker(self, **options):
+        worker = OutboxWorker(connexions=1, max_tentatives=2, delai_secondes=60, **options)
+        self.addCleanup(worker.fermer)
+        return worker
+
+    def test_envoi(self):
+        mettre_en_file('Sujet', 'Corps', None, ['agent@test.local'])
+        self.assertEqual(self.worker().traiter_lot(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(EmailSortant.objects.get().statut, 'ENVOYE')
+
+    def test_reservation_exclusive(self):
+        mettre_en_file('Sujet', 'Corps', None, ['agent@test.local'])
+        now = timezone.now()
+        self.assertEqual(len(self.worker().reserver(now)), 1)
+        # Déjà réservé par le premier worker
+        self.assertEqual(self.worker().reserver(now), [])
+        # Réservation expirée (worker arrêté) : reprise
+        self.assertEqual(len(self.worker().reserver(now + OutboxWorker.EXPIRATION_VERROU * 2)), 1)
+
+    def test_nouvelle_tentative_puis_echec(self):
+        email = mettre_en_file('Sujet', 'Corps', None, ['agent@test.local'])
+        worker = self.worker()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=SMTPException('indisponible')):
+            self.assertEqual(worker.traiter_lot(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.statut, email.tentatives), ('EN_ATTENTE', 1))
+            self.assertGreater(email.prochaine_tentative, timezone.now())
+            # Pas de nouvelle tentative avant le délai
+            self.assertEqual(worker.traiter_lot(), (0, 0))
+
+            EmailSortant.objects.update(prochaine_tentative=timezone.now())
+            self.assertEqual(worker.traiter_lot(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.statut, email.tentatives), ('ECHEC', 2))
+        self.assertEqual(mail.outbox, [])
+
+
+class BudgetRequetesTests(TestCase):
+    """Listes paginées : nombre de requêtes fixe, quelle que soit la taille de page (check_query_budget)."""
+
+    # Requêtes par page : comptage, page, puis relations préchargées
+    BUDGETS = {'missions': 4, 'validations': 2, 'signatures': 2, 'avances': 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.utilisateurs = BudgetRequetesCommand()._seed(20)
+
+    def test_budgets(self):
+        commande = BudgetRequetesCommand()
+        for nom, vue, role in BudgetRequetesCommand.ENDPOINTS:
+            for taille in (1, 5, 20):
+                with self.subTest(liste=nom, taille=taille), self.assertNumQueries(self.BUDGETS[nom]):
+                    commande._count_queries(vue, self.utilisateurs[role], taille)
+
+
+class NotificationFilTests(TestCase):
+    """Parcours du fil des notifications par curseur."""
+
+    def setUp(self):
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.factory = APIRequestFactory()
+
+    def page(self, **params):
+        request = self.factory.get('/api/missions/notifications/', params, HTTP_HOST='localhost')
+        force_authenticate(request, user=self.agent)
+        return NotificationListView.as_view()(request).data
+
+    def test_curseur_aller_retour(self):
+        instant = timezone.now().replace(microsecond=123456)
+        curseur = encoder_curseur([instant, 42])
+        self.assertEqual(decoder_curseur(curseur, Notification, ['date_creation', 'id']), [instant, 42])
+        with self.assertRaises(ValueError):
+            decoder_curseur('invalide', Notification, ['date_creation', 'id'])
+
+    def test_parcours_complet(self):
+        notifications = Notification.objects.bulk_create(
+            Notification(destinataire=self.agent, titre=f'N{i}', message='m') for i in range(7)
+        )
+        # Même horodatage pour toutes : départagées par l'id
+        Notification.objects.update(date_creation=timezone.now())
+
+        vus = []
+        page = self.page(taille=3)
+        while True:
+            vus.extend(notification['id'] for notification in page['results'])
+            if page['next'] is None:
+                break
+            curseur = page['next'].split('curseur=')[1].split('&')[0]
+            page = self.page(taille=3, curseur=curseur)
+        self.assertEqual(vus, sorted((n.pk for n in notifications), reverse=True))
+
+
+class CompteurNotificationsTests(TestCase):
+    """Compteur de non lues initialisé à la première lecture, puis ajusté."""
+
+    def setUp(self):
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+
+    def notifier(self, nombre=1):
+        for _ in range(nombre):
+            Notification.objects.create(destinataire=self.agent, titre='N', message='m')
+
+    def test_initialisation_puis_ajustements(self):
+        self.notifier(2)
+        self.assertFalse(CompteurNotifications.objects.exists())
+        self.assertEqual(CompteurNotifications.lire(self.agent.pk), 2)
+        self.notifier()
+        with self.assertNumQueries(1):
+            self.assertEqual(CompteurNotifications.lire(self.agent.pk), 3)
+
+        NotificationService.marquer_lues(self.agent, ids=[Notification.objects.first().pk])
+        self.assertEqual(CompteurNotifications.lire(self.agent.pk), 2)
+        Notification.objects.filter(lue=False).first().delete()
+        self.assertEqual(CompteurNotifications.lire(self.agent.pk), 1)
+
+    def test_creation_annulee(self):
+        CompteurNotifications.lire(self.agent.pk)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.notifier()
+            raise RuntimeError
+        self.assertEqual(CompteurNotifications.lire(self.agent.pk), 0)
+
+    def test_reconstruction(self):
+        self.notifier(3)
+        CompteurNotifications.lire(self.agent.pk)
+        CompteurNotifications.objects.update(non_lues=42)
+        self.assertEqual(CompteurNotifications.reconstruire(), 1)
+        self.assertEqual(CompteurNotifications.lire(self.agent.pk), 3)
+
+
+class TempsReelTests(TestCase):
+    """Attente des notifications et accès au flux SSE."""
+
+    def setUp(self):
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        # Lecteur périodique hors jeu : seul publier() réveille les clients
+        self.centre = CentreNotifications(intervalle=60)
+
+    async def abonnes(self):
+        while not any(self.centre.abonnes.values()):
+            await asyncio.sleep(0.01)
+
+    async def test_attendre_reveil(self):
+        attente = asyncio.create_task(self.centre.attendre(self.agent.pk, 0, 5))
+        await self.abonnes()
+        notification = await Notification.objects.acreate(destinataire=self.agent, titre='N', message='m')
+        self.centre.publier([self.agent.pk])
+        self.assertEqual(await asyncio.wait_for(attente, 1), [notification])
+        self.assertFalse(self.centre.lecteurs.get(asyncio.get_running_loop()))
+
+    async def test_attendre_expiration(self):
+        self.assertEqual(await self.centre.attendre(self.agent.pk, 0, 0.05), [])
+
+    async def test_flux_jeton(self):
+        jeton = signing.dumps(self.agent.pk, salt=SEL_JETON_FLUX)
+        client = AsyncClient()
+        self.assertEqual((await client.get('/api/missions/notifications/flux/', {'jeton': 'abc'})).status_code, 401)
+        self.assertEqual((await client.get('/api/missions/notifications/flux/', {'jeton': jeton + 'x'})).status_code, 401)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 3600):
+            self.assertEqual((await client.get('/api/missions/notifications/flux/', {'jeton': jeton})).status_code, 401)
+        response = await client.get('/api/missions/notifications/flux/', {'jeton': jeton})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    def test_flux_sous_wsgi(self):
+        jeton = signing.dumps(self.agent.pk, salt=SEL_JETON_FLUX)
+        response = self.client.get('/api/missions/notifications/flux/', {'jeton': jeton})
+        self.assertEqual(response.status_code, 501)
+
+
+class ExportOrdresMissionTests(TestCase):
+    """Validation des paramètres de l'export groupé."""
+
+    def setUp(self):
+        self.comptable = User.objects.create_user('compta', 'compta@test.local', 'pw', role='COMPTABLE')
+
+    def get(self, **params):
+        request = APIRequestFactory().get('/api/missions/ordres-mission/export/', params, HTTP_HOST='localhost')
+        force_authenticate(request, user=self.comptable)
+        return OrdresMissionExportView.as_view()(request)
+
+    def test_parametres_invalides(self):
+        self.assertEqual(self.get(entite='abc').status_code, 400)
+        self.assertEqual(self.get(mois='2026-13').status_code, 400)
+        self.assertEqual(self.get(entite='999').status_code, 404)
+
+
+class CompteCacheTests(TestCase):
+    """Invalidation des COUNT en cache des listes paginées."""
+
+    def setUp(self):
+        cache.clear()
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+
+    def test_ecriture_perime_le_compte(self):
+        creer_mission(self.agent)
+        self.assertEqual(compte_en_cache(Mission.objects.all()), 1)
+        creer_mission(self.agent)
+        self.assertEqual(compte_en_cache(Mission.objects.all()), 2)
+        Mission.objects.first().delete()
+        self.assertEqual(compte_en_cache(Mission.objects.all()), 1)
+
+    def test_compte_servi_depuis_le_cache(self):
+        creer_mission(self.agent)
+        compte_en_cache(Mission.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(compte_en_cache(Mission.objects.all()), 1)
+
+    def test_import_perime_le_compte(self):
+        self.assertEqual(compte_en_cache(Mission.objects.all()), 0)
+        MissionImportService.importer([(2, {
+            'titre': 'Import', 'date_debut': '2026-02-01', 'date_fin': '2026-02-03', 'lieu_mission': 'Kara',
+        })], self.agent)
+        self.assertEqual(compte_en_cache(Mission.objects.all()), 1)
+
+    def test_connexion_ne_perime_pas(self):
+        compte_en_cache(User.objects.all())
+        self.agent.last_login = timezone.now()
+        self.agent.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            compte_en_cache(User.objects.all())
+
+    def test_deplacement_d_entite_perime_les_missions(self):
+        entite = Entite.objects.create(nom='Agence', code='AG1')
+        creer_mission(self.agent)
+        compte_en_cache(Mission.objects.all())
+        entite.nom = 'Agence centrale'
+        entite.save()
+        with self.assertNumQueries(1):
+            compte_en_cache(Mission.objects.all())
+
+
+class StockageJustificatifTests(TestCase):
+    """Contenus dédupliqués et comptage des références."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=self.media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.mission = creer_mission(self.agent)
+
+    def justificatif(self, contenu):
+        fichier = SimpleUploadedFile('recu.pdf', contenu, content_type='application/pdf')
+        stocke = stockage.stocker(fichier)
+        return Justificatif.objects.create(
+            mission=self.mission, intervenant=self.agent, montant=Decimal('10'), description='Reçu',
+            contenu=stocke, fichier=stocke.fichier.name, hash_sha256=stocke.sha256
+        )
+
+    def test_doublon_partage_le_fichier(self):
+        premier = self.justificatif(b'%PDF-1.4 recu')
+        second = self.justificatif(b'%PDF-1.4 recu')
+        self.assertEqual(premier.contenu_id, second.contenu_id)
+        self.assertEqual(FichierStocke.objects.get().references, 2)
+        self.assertEqual(premier.fichier.name, second.fichier.name)
+
+    def test_liberation_de_la_derniere_reference(self):
+        premier = self.justificatif(b'%PDF-1.4 recu')
+        second = self.justificatif(b'%PDF-1.4 recu')
+        contenu = premier.contenu
+        storage, nom = contenu.fichier.storage, contenu.fichier.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            premier.delete()
+        contenu.refresh_from_db()
+        self.assertEqual(contenu.references, 1)
+        self.assertTrue(storage.exists(nom))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(FichierStocke.objects.exists())
+        self.assertFalse(storage.exists(nom))
+
+    def test_liberer_plusieurs_references(self):
+        contenu = stockage.stocker(SimpleUploadedFile('recu.pdf', b'%PDF-1.4 recu'))
+        for _ in range(2):
+            stockage.stocker(SimpleUploadedFile('copie.pdf', b'%PDF-1.4 recu'))
+        self.assertEqual(stockage.liberer([contenu.pk, contenu.pk]), 0)
+        contenu.refresh_from_db()
+        self.assertEqual(contenu.references, 1)
+        # Jamais négatif : une libération en trop supprime le contenu
+        self.assertEqual(stockage.liberer([contenu.pk, contenu.pk]), 1)
+        self.assertFalse(FichierStocke.objects.exists())
+
+    def test_contenu_encore_utilise_conserve(self):
+        justificatif = self.justificatif(b'%PDF-1.4 recu')
+        # Références faussées : la collecte ne supprime pas un contenu utilisé
+        FichierStocke.objects.update(references=0)
+        self.assertEqual(stockage.collecter(), 0)
+        self.assertEqual(stockage.recompter(), 1)
+        self.assertEqual(FichierStocke.objects.get(pk=justificatif.contenu_id).references, 1)
+
+
+@override_settings(JUSTIFICATIF_TAILLE_MAX=100 * 1024)
+class TeleversementJustificatifTests(TestCase):
+    """Justificatifs reçus en flux par JustificatifUploadHandler."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=self.media, FILE_UPLOAD_TEMP_DIR=self.media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.mission = creer_mission(self.agent)
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def televerser(self, contenu, type_mime='application/pdf'):
+        return self.client.post('/api/missions/justificatifs/', {
+            'mission': self.mission.pk,
+            'intervenant': self.agent.pk,
+            'description': 'Reçu',
+            'montant': '10.00',
+            'fichier': SimpleUploadedFile('recu.pdf', contenu, content_type=type_mime),
+        }, format='multipart')
+
+    def test_requete_trop_grande_refusee_avant_lecture(self):
+        with mock.patch.object(JustificatifUploadHandler, 'receive_data_chunk') as reception:
+            response = self.televerser(b'%PDF-' + b'x' * 200 * 1024)
+        self.assertEqual(response.status_code, 400)
+        reception.assert_not_called()
+        self.assertFalse(Justificatif.objects.exists())
+
+    def test_fichier_trop_grand_en_cours_de_flux(self):
+        # Requête sous la marge de handle_raw_input : refus au fil de la réception
+        response = self.televerser(b'%PDF-' + b'x' * 120 * 1024)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('volumineux', str(response.data))
+        self.assertFalse(Justificatif.objects.exists())
+
+    def test_type_non_declare(self):
+        response = self.televerser(b'texte', type_mime='text/plain')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text/plain', str(response.data))
+
+    def test_signature_incorrecte(self):
+        response = self.televerser(b'<html>pas un pdf</html>')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('type déclaré', str(response.data))
+        self.assertFalse(FichierStocke.objects.exists())
+
+    def test_televersement_valide(self):
+        contenu = b'%PDF-1.4 ' + bytes(range(256)) * 300
+        response = self.televerser(contenu)
+        self.assertEqual(response.status_code, 201, response.data)
+        justificatif = Justificatif.objects.get()
+        self.assertEqual(justificatif.taille, len(contenu))
+        self.assertEqual(justificatif.hash_md5, hashlib.md5(contenu).hexdigest())
+        self.assertEqual(justificatif.hash_sha256, hashlib.sha256(contenu).hexdigest())
+        self.assertEqual(response.data['hash_sha256'], justificatif.hash_sha256)
+        with justificatif.fichier.open('rb') as fichier:
+            self.assertEqual(fichier.read(), contenu)
+
+
+class EcheancierTests(TestCase):
+    """Tas des échéances, flux ChangementEcheance et déclenchement."""
+
+    def setUp(self):
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.t0 = timezone.now()
+        self.echeancier = Echeancier()
+
+    def mission_de_retour(self, date_limite):
+        return creer_mission(self.agent, retour_declare=True, date_limite_justificatifs=date_limite)
+
+    def test_types_abstraits(self):
+        with self.assertRaises(TypeError):
+            TypeEcheance()
+
+    def test_changement_de_date_limite(self):
+        mission = self.mission_de_retour(self.t0 + timedelta(days=10))
+        self.echeancier.charger()
+        self.assertFalse(ChangementEcheance.objects.exists())
+        self.assertEqual(self.echeancier.prochaine(), self.t0 + timedelta(days=10))
+
+        mission.date_limite_justificatifs = self.t0 + timedelta(days=1)
+        mission.save()
+        self.assertEqual(self.echeancier.lire_changements(), 1)
+        self.assertFalse(ChangementEcheance.objects.exists())
+        self.assertEqual(self.echeancier.lire_changements(), 0)
+        self.assertEqual(self.echeancier.prochaine(), self.t0 + timedelta(days=1))
+
+        self.assertEqual(self.echeancier.declencher_echues(self.t0 + timedelta(days=2)), 1)
+        mission.refresh_from_db()
+        self.assertTrue(mission.relance_justificatifs)
+        self.assertEqual(EmailSortant.objects.count(), 1)
+        # L'entrée du tas à l'ancienne date est obsolète : pas de seconde relance
+        self.assertEqual(self.echeancier.declencher_echues(self.t0 + timedelta(days=11)), 0)
+        self.assertEqual(EmailSortant.objects.count(), 1)
+        self.assertIsNone(self.echeancier.prochaine())
+
+    def test_ordre_du_tas(self):
+        tardive = self.mission_de_retour(self.t0 + timedelta(days=5))
+        proche = self.mission_de_retour(self.t0 + timedelta(days=1))
+        self.echeancier.charger()
+        self.assertEqual(self.echeancier.declencher_echues(self.t0 + timedelta(days=2)), 1)
+        self.assertEqual(Mission.objects.filter(relance_justificatifs=True).get(), proche)
+        self.assertEqual(self.echeancier.prochaine(), tardive.date_limite_justificatifs)
+
+    def test_purge_des_changements(self):
+        ancien = ChangementEcheance.objects.create(modele='mission', objet_id=1)
+        ChangementEcheance.objects.filter(pk=ancien.pk).update(
+            date_creation=self.t0 - ChangementEcheance.RETENTION - timedelta(hours=1)
+        )
+        recent = ChangementEcheance.objects.create(modele='mission', objet_id=2)
+        self.assertEqual(ChangementEcheance.purger(), 1)
+        self.assertEqual(list(ChangementEcheance.objects.all()), [recent])
+
+
+class ExecuteurSynchrone:
+    """Remplace le pool de processus : rendu immédiat, dans le processus de test."""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def submit(self, fonction, *args):
+        futur = Future()
+        try:
+            futur.set_result(fonction(*args))
+        except Exception as e:
+            futur.set_exception(e)
+        return futur
+
+    def shutdown(self):
+        pass
+
+
+class DocumentPDFTests(TestCase):
+    """File de génération des ordres de mission et téléchargement."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=self.media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        executeur = mock.patch('missions.travaux_pdf.ProcessPoolExecutor', ExecuteurSynchrone)
+        executeur.start()
+        self.addCleanup(executeur.stop)
+
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role='AGENT')
+        self.mission = creer_mission(self.agent)
+        self.generateur = GenerateurPDF()
+
+    def rendu(self, rendre):
+        """Remplace le rendu de l'ordre de mission (l'extraction des données est conservée)."""
+        extraire, _, nom = travaux_pdf.RENDUS['ORDRE_MISSION']
+        return mock.patch.dict(travaux_pdf.RENDUS, {'ORDRE_MISSION': (extraire, rendre, nom)})
+
+    def document(self):
+        return DocumentPDF.objects.get(mission=self.mission)
+
+    def fichiers(self):
+        return [nom for _, _, noms in os.walk(self.media) for nom in noms]
+
+    def telecharger(self, **entetes):
+        request = APIRequestFactory().get(f'/api/missions/{self.mission.pk}/ordre-mission/', HTTP_HOST='localhost', **entetes)
+        force_authenticate(request, user=self.agent)
+        return OrdreMissionPDFView.as_view()(request, pk=self.mission.pk)
+
+    def test_approbation_met_en_file(self):
+        with mock.patch('missions.services.rendre_ordre_mission') as rendre:
+            with transaction.atomic():
+                ValidationService._approve_mission(self.mission)
+                self.assertEqual(self.document().statut, 'EN_ATTENTE')
+        rendre.assert_not_called()
+        self.assertFalse(self.document().fichier)
+        self.assertEqual(self.fichiers(), [])
+
+    def test_approbation_annulee(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                ValidationService._approve_mission(self.mission)
+                raise RuntimeError
+        self.assertFalse(DocumentPDF.objects.exists())
+
+    def test_reservation(self):
+        travaux_pdf.demander(self.mission)
+        now = timezone.now()
+        documents, jeton = self.generateur.reserver(now)
+        self.assertEqual([document.pk for document in documents], [self.document().pk])
+        self.assertEqual((self.document().statut, self.document().verrou), ('EN_COURS', jeton))
+        # Réservé : invisible pour un autre worker, jusqu'à expiration du verrou
+        self.assertEqual(self.generateur.reserver(now), ([], None))
+        documents, repris = self.generateur.reserver(now + GenerateurPDF.EXPIRATION_VERROU + timedelta(seconds=1))
+        self.assertEqual(len(documents), 1)
+        self.assertNotEqual(repris, jeton)
+        self.assertEqual(self.document().verrou, repris)
+
+    def test_rendu_perime_abandonne(self):
+        travaux_pdf.demander(self.mission)
+
+        def rendre(donnees):
+            # Mission modifiée pendant le rendu
+            travaux_pdf.demander(self.mission)
+            return b'%PDF-1.4 ancien'
+
+        with self.rendu(rendre):
+            self.assertEqual(self.generateur.traiter_lot(), (1, 0))
+        document = self.document()
+        self.assertEqual((document.statut, document.verrou), ('EN_ATTENTE', ''))
+        self.assertFalse(document.fichier)
+        self.assertEqual(self.fichiers(), [])
+
+    def test_echecs_puis_abandon(self):
+        travaux_pdf.demander(self.mission)
+        rendre = mock.Mock(side_effect=ValueError('rendu impossible'))
+        with self.rendu(rendre), self.assertLogs('missions.travaux_pdf', 'ERROR'):
+            for tentative in range(1, GenerateurPDF.MAX_TENTATIVES + 1):
+                avant = timezone.now()
+                self.assertEqual(self.generateur.traiter_lot(), (0, 1))
+                document = self.document()
+                self.assertEqual(document.tentatives, tentative)
+                self.assertIn('rendu impossible', document.derniere_erreur)
+                delai = GenerateurPDF.DELAI_SECONDES * 2 ** (tentative - 1)
+                self.assertGreaterEqual(document.prochaine_tentative, avant + timedelta(seconds=delai))
+                if tentative < GenerateurPDF.MAX_TENTATIVES:
+                    self.assertEqual(document.statut, 'EN_ATTENTE')
+                    # Rien avant le délai ; on l'avance pour la tentative suivante
+                    self.assertEqual(self.generateur.traiter_lot(), (0, 0))
+                    DocumentPDF.objects.update(prochaine_tentative=timezone.now())
+        self.assertEqual(self.document().statut, 'ECHEC')
+        self.assertEqual(rendre.call_count, GenerateurPDF.MAX_TENTATIVES)
+        self.assertEqual(self.telecharger().status_code, 500)
+
+    def test_telechargement(self):
+        self.assertEqual(self.telecharger().status_code, 404)
+        travaux_pdf.demander(self.mission)
+        response = self.telecharger()
+        self.assertEqual((response.status_code, response.data), (202, {'statut': 'EN_ATTENTE'}))
+
+        self.assertEqual(self.generateur.traiter_lot(), (1, 0))
+        document = self.document()
+        self.assertEqual(document.statut, 'PRET')
+        response = self.telecharger()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{document.empreinte}"')
+        contenu = b''.join(response.streaming_content)
+        self.assertTrue(contenu.startswith(b'%PDF-'))
+        self.assertEqual(hashlib.sha256(contenu).hexdigest(), document.empreinte)
+
+        self.assertEqual(self.telecharger(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.telecharger(HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+
+    def generer(self):
+        travaux_pdf.demander(self.mission)
+        self.assertEqual(self.generateur.traiter_lot(), (1, 0))
+        return self.document()
+
+    def test_mission_inchangee_reutilisee(self):
+        document = self.generer()
+        self.mission.save()
+        self.assertEqual(self.document().statut, 'EN_ATTENTE')
+        rendre = mock.Mock()
+        with self.rendu(rendre):
+            self.assertEqual(self.generateur.traiter_lot(), (1, 0))
+        rendre.assert_not_called()
+        self.assertEqual(self.generateur.reutilises, 1)
+        reutilise = self.document()
+        self.assertEqual(reutilise.statut, 'PRET')
+        self.assertEqual((reutilise.fichier.name, reutilise.empreinte), (document.fichier.name, document.empreinte))
+
+    def test_champ_non_affiche(self):
+        self.generer()
+        self.mission.statut = MissionStatus.EN_ATTENTE
+        self.mission.save(update_fields=['statut'])
+        self.assertEqual(self.document().statut, 'PRET')
+
+    def test_titre_et_participants(self):
+        document = self.generer()
+        self.mission.titre = 'Mission modifiée'
+        self.mission.save(update_fields=['titre'])
+        self.assertEqual(self.document().statut, 'EN_ATTENTE')
+        self.assertEqual(self.generateur.traiter_lot(), (1, 0))
+        renomme = self.document()
+        self.assertNotEqual(renomme.empreinte_source, document.empreinte_source)
+        self.assertEqual(self.generateur.reutilises, 0)
+        self.assertEqual(len(self.fichiers()), 1)
+
+        participant = User.objects.create_user('participant', 'participant@test.local', 'pw', role='AGENT')
+        self.mission.participants.add(participant)
+        self.assertEqual(self.document().statut, 'EN_ATTENTE')
+        self.assertEqual(self.generateur.traiter_lot(), (1, 0))
+        self.assertNotEqual(self.document().empreinte_source, renomme.empreinte_source)
@@ -0,0 +1,240 @@
+"""
+File de génération des PDF (DocumentPDF)
+
+`demander` remplace la génération synchrone dans les services : le
+document est remis EN_ATTENTE dans la transaction en cours, puis rendu par
+le worker `process_pdf_jobs` sur un pool de processus (reportlab occupe le
+CPU et ne libère pas le GIL), hors des requêtes et des verrous.
+
+Seuls les documents « sales » sont rendus : le worker compare l'empreinte
+des données extraites à celle du dernier rendu et, si elle est identique,
+conserve le fichier existant. Les écritures de mission remettent en file
+les documents existants (`redemander`) ; la commande `refresh_pdf_documents`
+fait de même pour tous, après un changement de nom, d'entité ou de véhicule.
+"""
+import hashlib
+import logging
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.db import models
+from django.utils import timezone
+
+from . import references
+from .models import DocumentPDF, Mission
+from .pdf import donnees_ordre_mission, empreinte_donnees, rendre_ordre_mission
+
+logger = logging.getLogger(__name__)
+
+
+# Champs de Mission lus par l'ordre de mission (une écriture d'un autre champ ne le périme pas)
+CHAMPS_ORDRE_MISSION = frozenset({
+    'reference', 'titre', 'createur', 'entite', 'date_debut', 'date_fin',
+    'lieu_mission', 'budget_estime', 'description', 'vehicule',
+})
+
+# type de document: (extraction des données depuis la mission, rendu en octets, nom du fichier)
+RENDUS = {
+    'ORDRE_MISSION': (
+        lambda mission: donnees_ordre_mission(mission, references.vehicule(mission.vehicule_id)),
+        rendre_ordre_mission,
+        'ordre_mission_{reference}',
+    ),
+}
+
+
+def demander(mission, type='ORDRE_MISSION'):
+    """
+    Met le document de la mission en file de génération. À appeler dans la
+    transaction du service : la demande n'existe que si celle-ci est validée.
+    Un rendu en cours est abandonné au profit du nouveau.
+    """
+    now = timezone.now()
+    document, _ = DocumentPDF.objects.update_or_create(
+        mission=mission,
+        type=type,
+        defaults={
+            'statut': 'EN_ATTENTE',
+            'tentatives': 0,
+            'prochaine_tentative': now,
+            'date_demande': now,
+            'derniere_erreur': '',
+            'verrou': '',
+        }
+    )
+    return document
+
+
+def redemander(mission_ids):
+    """
+    Remet en file les documents déjà générés des missions : le worker ne
+    rendra que ceux dont les données ont changé.
+    """
+    return DocumentPDF.objects.filter(mission_id__in=mission_ids).exclude(statut='EN_ATTENTE').update(
+        statut='EN_ATTENTE',
+        tentatives=0,
+        prochaine_tentative=timezone.now(),
+        derniere_erreur='',
+        verrou=''
+    )
+
+
+def fichier_a_jour(document, empreinte_source):
+    """Le fichier du document correspond-il aux données d'empreinte donnée ?"""
+    return (
+        bool(document.fichier)
+        and document.empreinte_source == empreinte_source
+        and document.fichier.storage.exists(document.fichier.name)
+    )
+
+
+class GenerateurPDF:
+    """
+    Rend les documents en file sur un pool de processus.
+
+    Comme pour la file d'e-mails, un lot est réservé par un UPDATE portant
+    un jeton unique ; une réservation plus vieille que `EXPIRATION_VERROU`
+    est reprise. Les données sont extraites ici (requêtes groupées) et seuls
+    des dictionnaires simples partent vers les processus.
+    """
+
+    EXPIRATION_VERROU = timezone.timedelta(minutes=10)
+    MAX_TENTATIVES = 3
+    DELAI_SECONDES = 60
+
+    def __init__(self, processus=None, taille_lot=20):
+        self.taille_lot = taille_lot
+        self.reutilises = 0
+        self.executor = ProcessPoolExecutor(max_workers=processus)
+
+    def reserver(self, now):
+        """Réserve le prochain lot de documents à générer."""
+        a_generer = (
+            models.Q(statut='EN_ATTENTE', prochaine_tentative__lte=now) |
+            models.Q(statut='EN_COURS', date_verrou__lt=now - self.EXPIRATION_VERROU)
+        )
+        candidats = list(
+            DocumentPDF.objects.filter(a_generer)
+            .order_by('prochaine_tentative')
+            .values_list('pk', flat=True)[:self.taille_lot]
+        )
+        if not candidats:
+            return [], None
+
+        jeton = uuid.uuid4().hex
+        DocumentPDF.objects.filter(a_generer, pk__in=candidats).update(
+            statut='EN_COURS', verrou=jeton, date_verrou=now
+        )
+        return list(DocumentPDF.objects.filter(verrou=jeton, statut='EN_COURS')), jeton
+
+    def traiter_lot(self):
+        """Génère un lot ; retourne (générés ou réutilisés, échecs)."""
+        documents, jeton = self.reserver(timezone.now())
+        if not documents:
+            return 0, 0
+
+        missions = (
+            Mission.objects.select_related('createur', 'entite')
+            .prefetch_related('participants')
+            .in_bulk([document.mission_id for document in documents])
+        )
+        rendus = []
+        for document in documents:
+            extraire, rendre, _ = RENDUS[document.type]
+            try:
+                donnees = extraire(missions[document.mission_id])
+                empreinte_source = empreinte_donnees(donnees)
+                if fichier_a_jour(document, empreinte_source):
+                    rendus.append((empreinte_source, None))
+                else:
+                    rendus.append((empreinte_source, self.executor.submit(rendre, donnees)))
+            except Exception as e:
+                rendus.append((None, e))
+
+        generes = echecs = 0
+        for document, (empreinte_source, rendu) in zip(documents, rendus):
+            if rendu is None:
+                # Données inchangées : le fichier existant reste valable
+                DocumentPDF.objects.filter(pk=document.pk, verrou=jeton).update(
+                    statut='PRET', tentatives=0, derniere_erreur='', verrou=''
+                )
+                self.reutilises += 1
+                generes += 1
+                continue
+            try:
+                if isinstance(rendu, Exception):
+                    raise rendu
+                contenu = rendu.result()
+            except Exception as e:
+                self._echec(document, jeton, repr(e))
+                echecs += 1
+            else:
+                self._enregistrer(document, jeton, missions[document.mission_id], contenu, empreinte_source)
+                generes += 1
+        return generes, echecs
+
+    @staticmethod
+    def _enregistrer(document, jeton, mission, contenu, empreinte_source):
+        """Enregistre le fichier (nommé d'après son empreinte) et marque le document prêt."""
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        ancien = document.fichier.name
+        nouveau = not (ancien and empreinte == document.empreinte)
+        if nouveau:
+            nom = RENDUS[document.type][2].format(reference=mission.reference)
+            document.fichier.save(f"{nom}-{empreinte[:16]}.pdf", ContentFile(contenu), save=False)
+
+        mis_a_jour = DocumentPDF.objects.filter(pk=document.pk, verrou=jeton).update(
+            statut='PRET',
+            fichier=document.fichier.name,
+            empreinte=empreinte,
+            empreinte_source=empreinte_source,
+            taille=len(contenu),
+            date_generation=timezone.now(),
+            tentatives=0,
+            derniere_erreur='',
+            verrou='',
+        )
+        if not mis_a_jour:
+            # Document redemandé pendant le rendu : ce résultat est périmé
+            if nouveau:
+                document.fichier.storage.delete(document.fichier.name)
+            return
+        if nouveau and ancien:
+            document.fichier.storage.delete(ancien)
+        logger.info(f"PDF généré pour la mission {mission.reference}")
+
+    def _echec(self, document, jeton, erreur):
+        tentatives = document.tentatives + 1
+        definitif = tentatives >= self.MAX_TENTATIVES
+        DocumentPDF.objects.filter(pk=document.pk, verrou=jeton).update(
+            statut='ECHEC' if definitif else 'EN_ATTENTE',
+            tentatives=tentatives,
+            prochaine_tentative=timezone.now() + timezone.timedelta(
+                seconds=self.DELAI_SECONDES * 2 ** (tentatives - 1)
+            ),
+            derniere_erreur=erreur,
+            verrou=''
+        )
+        logger.error(f"Échec de génération du PDF {document.pk} (tentative {tentatives}): {erreur}")
+
+    def executer(self, intervalle=2, une_fois=False, arret=None):
+        """Génère les lots disponibles, puis attend `intervalle` secondes si la file est vide."""
+        arret = arret or threading.Event()
+        total = [0, 0]
+        try:
+            while not arret.is_set():
+                generes, echecs = self.traiter_lot()
+                total[0] += generes
+                total[1] += echecs
+                if generes + echecs == 0:
+                    if une_fois:
+                        break
+                    arret.wait(intervalle)
+        finally:
+            self.fermer()
+        return tuple(total)
+
+    def fermer(self):
+        self.executor.shutdown()
@@ -0,0 +1,112 @@
+"""
+Téléversement des justificatifs en flux
+
+Le gestionnaire `JustificatifUploadHandler` remplace les gestionnaires par
+défaut de Django sur les vues de justificatifs : chaque morceau reçu est
+écrit directement sur disque (FILE_UPLOAD_TEMP_DIR, que le stockage
+déplace ensuite vers les médias), pendant que la taille et les empreintes
+MD5 et SHA-256 sont calculées au fil de l'eau. La mémoire utilisée ne
+dépend donc pas de la taille du fichier.
+
+Le type MIME (déclaré puis vérifié sur les premiers octets) et la taille
+sont contrôlés dès la réception : un fichier refusé interrompt la lecture
+de la requête au lieu d'être reçu en entier.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+# Signature des premiers octets de chaque type accepté
+SIGNATURES = {
+    'application/pdf': (b'%PDF-',),
+    'image/jpeg': (b'\xff\xd8\xff',),
+    'image/png': (b'\x89PNG\r\n\x1a\n',),
+}
+
+
+class FichierRefuse(MultiPartParserError):
+    """Fichier refusé pendant la réception (type ou taille) ; répondu en 400 par DRF."""
+
+
+class FichierJustificatif(TemporaryUploadedFile):
+    """Fichier reçu, avec sa taille et ses empreintes calculées pendant le flux."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.md5 = hashlib.md5(usedforsecurity=False)
+        self.sha256 = hashlib.sha256()
+
+    @property
+    def hash_md5(self):
+        return self.md5.hexdigest()
+
+    @property
+    def hash_sha256(self):
+        return self.sha256.hexdigest()
+
+
+class JustificatifUploadHandler(FileUploadHandler):
+    """Reçoit les fichiers de justificatifs en flux, avec empreintes et limites."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.taille_max = settings.JUSTIFICATIF_TAILLE_MAX
+        self.types_mime = settings.JUSTIFICATIF_TYPES_MIME
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Requête plus grande que la limite : refusée avant d'en lire le corps
+        if content_length > self.taille_max + 64 * 1024:
+            raise FichierRefuse(
+                f"Fichier trop volumineux ({self.taille_max // (1024 * 1024)} Mo au plus)"
+            )
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.content_type not in self.types_mime:
+            raise FichierRefuse(f"Type de fichier non accepté: {self.content_type}")
+        self.fichier = FichierJustificatif(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.debut = b''
+        self.verifie = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.verifie:
+            # Premiers octets (éventuellement sur plusieurs morceaux) : signature du type
+            self.debut += raw_data[:16 - len(self.debut)]
+            if len(self.debut) >= 16:
+                self._verifier_signature()
+
+        self.fichier.size += len(raw_data)
+        if self.fichier.size > self.taille_max:
+            self.fichier.close()
+            raise FichierRefuse(
+                f"Fichier trop volumineux ({self.taille_max // (1024 * 1024)} Mo au plus)"
+            )
+        self.fichier.md5.update(raw_data)
+        self.fichier.sha256.update(raw_data)
+        self.fichier.write(raw_data)
+        # Aucune donnée transmise aux gestionnaires suivants
+        return None
+
+    def _verifier_signature(self):
+        self.verifie = True
+        if not self.debut.startswith(SIGNATURES.get(self.content_type, (b'',))):
+            self.fichier.close()
+            raise FichierRefuse(f"Le contenu ne correspond pas au type déclaré ({self.content_type})")
+
+    def file_complete(self, file_size):
+        if not self.verifie:
+            self._verifier_signature()
+        self.fichier.seek(0)
+        self.fichier.size = file_size
+        return self.fichier
+
+
+class JustificatifUploadMixin:
+    """Vues de justificatifs : fichiers reçus par JustificatifUploadHandler."""
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [JustificatifUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
@@ -6,10 +6,13 @@ app_name = 'missions'
 urlpatterns = [
     # Missions
     path('', views.MissionListView.as_view(), name='mission-list'),
+    path('import/', views.MissionImportView.as_view(), name='mission-import'),
+    path('ordres-mission/export/', views.OrdresMissionExportView.as_view(), name='ordres-mission-export'),
     path('<int:pk>/', views.MissionDetailView.as_view(), name='mission-detail'),
     path('<int:pk>/submit/', views.MissionSubmitView.as_view(), name='mission-submit'),
     path('<int:pk>/declare-return/', views.MissionDeclareReturnView.as_view(), name='mission-declare-return'),
     path('<int:pk>/submit-justificatifs/', views.MissionSubmitJustificatifsView.as_view(), name='mission-submit-justificatifs'),
+    path('<int:pk>/ordre-mission/', views.OrdreMissionPDFView.as_view(), name='mission-ordre-mission'),
     path('<int:pk>/verify-justificatifs/', views.JustificatifVerifyView.as_view(), name='verify-justificatifs'),
 
     # Validations
@@ -27,6 +30,12 @@ urlpatterns = [
 
     # Notifications
     path('notifications/', views.NotificationListView.as_view(), name='notification-list'),
+    path('notifications/lues/', views.NotificationLectureView.as_view(), name='notification-lecture'),
+    path('notifications/non-lues/', views.notifications_non_lues, name='notification-non-lues'),
+    path('notifications/attente/', views.notifications_attente, name='notification-attente'),
+    path('notifications/flux/', views.notifications_flux, name='notification-flux'),
+    path('references/statistiques/', views.references_statistiques, name='references-statistiques'),
+    path('notifications/flux/jeton/', views.NotificationFluxJetonView.as_view(), name='notification-flux-jeton'),
 
     # Justificatifs
     path('justificatifs/', views.JustificatifListView.as_view(), name='justificatif-list'),
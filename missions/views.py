@@ -1,26 +1,66 @@
-from rest_framework import generics, status, permissions
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from rest_framework import generics, status, permissions, serializers
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
 from django.db import models
+from django.http import FileResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import parse_etags
+from django.utils.dateparse import parse_date
 from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Mission, Validation, Justificatif
+from .models import (
+    Mission, Validation, Justificatif, SignatureFinanciere, Avance, Notification, CompteurNotifications,
+    DocumentPDF
+)
 from .serializers import (
     MissionSerializer, MissionCreateSerializer,
     ValidationSerializer, JustificatifSerializer,
     JustificatifValidationSerializer,
-    SignatureFinanciereSerializer, AvanceSerializer, NotificationSerializer
+    SignatureFinanciereSerializer, AvanceSerializer, AvanceCreateSerializer,
+    NotificationSerializer, NotificationLectureSerializer
 )
-from .services import ValidationService, NotificationService, MissionReturnService
-
-
-class MissionListView(generics.ListCreateAPIView):
+from .services import (
+    ValidationService, NotificationService, MissionReturnService, StatistiquesService,
+    MissionImportService
+)
+from . import references
+from .export_pdf import ExportOrdresMission, missions_a_exporter
+from .imports import lire_fichier
+from users.models import Entite, User, UserRole
+from users.permissions import contexte_permissions
+from .pagination import ORDRE_CHRONOLOGIQUE, KeysetPagination
+from .prefetch import PrefetchPlanMixin
+from .temps_reel import centre
+from .uploads import JustificatifUploadMixin
+
+# Attente par défaut d'un long-poll et intervalle de maintien du flux SSE,
+# puis attente maximale qu'un client peut demander (secondes)
+DELAI_ATTENTE = 25
+DELAI_ATTENTE_MAX = 55
+
+# Sel des jetons d'accès au flux SSE (NotificationFluxJetonView)
+SEL_JETON_FLUX = 'missions.notifications.flux'
+
+
+class MissionListView(PrefetchPlanMixin, generics.ListCreateAPIView):
     """Vue pour lister et créer des missions."""
 
     permission_classes = [permissions.IsAuthenticated]
+    # Ordre du mode curseur (?curseur=), sans COUNT
+    keyset_ordering = ORDRE_CHRONOLOGIQUE
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['statut', 'type', 'createur']
 
@@ -30,29 +70,45 @@ class MissionListView(generics.ListCreateAPIView):
         return MissionSerializer
 
     def get_queryset(self):
-        user = self.request.user
-
-        # Filtrer selon la hiérarchie
-        if user.role == 'ADMIN' or user.role == 'DG':
-            # Admins et DG voient tout
-            return Mission.objects.all()
-        elif user.role == 'CHEF_AGENCE':
-            # Chefs d'agence voient leurs missions et celles de leurs subordonnés
-            subordinates = user.get_subordinates()
-            subordinate_ids = [sub.id for sub in subordinates]
-            return Mission.objects.filter(
-                models.Q(createur=user) |
-                models.Q(createur__in=subordinate_ids)
-            )
-        else:
-            # Autres utilisateurs voient seulement leurs missions
-            return Mission.objects.filter(createur=user)
+        # Filtrer selon la hiérarchie (une seule sous-requête indexée)
+        return Mission.objects.visible_to(self.request.user, contexte_permissions(self.request))
 
     def perform_create(self, serializer):
         serializer.save(createur=self.request.user)
 
 
-class MissionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MissionImportView(APIView):
+    """
+    Vue pour importer des missions depuis un fichier CSV ou XLSX (champ
+    `fichier`). Les lignes invalides sont listées dans le rapport sans
+    empêcher l'import des autres.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        fichier = request.FILES.get('fichier')
+        if fichier is None:
+            return Response(
+                {'error': 'Aucun fichier fourni (champ "fichier")'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            rapport = MissionImportService.importer(
+                lire_fichier(fichier, fichier.name),
+                request.user,
+                peut_assigner=contexte_permissions(request).role in (UserRole.ADMIN, UserRole.DG, UserRole.RH)
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        code = status.HTTP_201_CREATED if rapport['crees'] else status.HTTP_400_BAD_REQUEST
+        return Response(rapport, status=code)
+
+
+class MissionDetailView(PrefetchPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """Vue pour récupérer, modifier et supprimer une mission."""
 
     serializer_class = MissionSerializer
@@ -60,33 +116,23 @@ class MissionDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         # Même logique de filtrage que pour la liste
-        user = self.request.user
-
-        if user.role == 'ADMIN' or user.role == 'DG':
-            return Mission.objects.all()
-        elif user.role == 'CHEF_AGENCE':
-            subordinates = user.get_subordinates()
-            subordinate_ids = [sub.id for sub in subordinates]
-            return Mission.objects.filter(
-                models.Q(createur=user) |
-                models.Q(createur__in=subordinate_ids)
-            )
-        else:
-            return Mission.objects.filter(createur=user)
+        return Mission.objects.visible_to(self.request.user, contexte_permissions(self.request))
 
 
-class ValidationListView(generics.ListCreateAPIView):
+class ValidationListView(PrefetchPlanMixin, generics.ListCreateAPIView):
     """Vue pour lister et créer des validations."""
 
     serializer_class = ValidationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Ordre du mode curseur (?curseur=), sans COUNT
+    keyset_ordering = ORDRE_CHRONOLOGIQUE
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['statut', 'niveau', 'mission']
 
     def get_queryset(self):
         user = self.request.user
 
-        if user.role == 'ADMIN' or user.role == 'DG':
+        if contexte_permissions(self.request).voit_tout:
             return Validation.objects.all()
         else:
             # Les utilisateurs voient les validations où ils sont valideurs
@@ -96,7 +142,7 @@ class ValidationListView(generics.ListCreateAPIView):
         serializer.save(valideur=self.request.user)
 
 
-class ValidationDetailView(generics.RetrieveUpdateAPIView):
+class ValidationDetailView(PrefetchPlanMixin, generics.RetrieveUpdateAPIView):
     """Vue pour récupérer et mettre à jour une validation."""
 
     serializer_class = ValidationSerializer
@@ -105,7 +151,7 @@ class ValidationDetailView(generics.RetrieveUpdateAPIView):
     def get_queryset(self):
         user = self.request.user
 
-        if user.role == 'ADMIN' or user.role == 'DG':
+        if contexte_permissions(self.request).voit_tout:
             return Validation.objects.all()
         else:
             return Validation.objects.filter(valideur=user)
@@ -178,54 +224,54 @@ class ValidateMissionView(APIView):
             )
 
 
-class JustificatifListView(generics.ListCreateAPIView):
+class JustificatifListView(JustificatifUploadMixin, PrefetchPlanMixin, generics.ListCreateAPIView):
     """Vue pour lister et créer des justificatifs."""
 
     serializer_class = JustificatifSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Ordre du mode curseur (?curseur=), sans COUNT
+    keyset_ordering = ORDRE_CHRONOLOGIQUE
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['statut', 'type', 'mission', 'intervenant']
+    filterset_fields = ['statut', 'type_document', 'mission', 'intervenant']
 
     def get_queryset(self):
-        user = self.request.user
+        contexte = contexte_permissions(self.request)
 
-        if user.role == 'ADMIN' or user.role == 'DG':
+        if contexte.voit_tout:
             return Justificatif.objects.all()
-        elif user.can_validate:
+        elif contexte.peut_valider:
             # Les validateurs voient les justificatifs de leur équipe
-            if user.role == 'CHEF_AGENCE':
-                team_members = [user.id] + [sub.id for sub in user.get_subordinates()]
-                return Justificatif.objects.filter(intervenant__in=team_members)
+            if contexte.role == 'CHEF_AGENCE':
+                return Justificatif.objects.filter(intervenant__in=contexte.equipe)
             else:
                 # Autres validateurs voient tout
                 return Justificatif.objects.all()
         else:
             # Les intervenants voient seulement leurs justificatifs
-            return Justificatif.objects.filter(intervenant=user)
+            return Justificatif.objects.filter(intervenant=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(intervenant=self.request.user)
 
 
-class JustificatifDetailView(generics.RetrieveUpdateDestroyAPIView):
+class JustificatifDetailView(JustificatifUploadMixin, PrefetchPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """Vue pour récupérer, modifier et supprimer un justificatif."""
 
     serializer_class = JustificatifSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
+        contexte = contexte_permissions(self.request)
 
-        if user.role == 'ADMIN' or user.role == 'DG':
+        if contexte.voit_tout:
             return Justificatif.objects.all()
-        elif user.can_validate:
-            if user.role == 'CHEF_AGENCE':
-                team_members = [user.id] + [sub.id for sub in user.get_subordinates()]
-                return Justificatif.objects.filter(intervenant__in=team_members)
+        elif contexte.peut_valider:
+            if contexte.role == 'CHEF_AGENCE':
+                return Justificatif.objects.filter(intervenant__in=contexte.equipe)
             else:
                 return Justificatif.objects.all()
         else:
-            return Justificatif.objects.filter(intervenant=user)
+            return Justificatif.objects.filter(intervenant=self.request.user)
 
 
 class ValidateJustificatifView(APIView):
@@ -239,7 +285,7 @@ class ValidateJustificatifView(APIView):
             user = request.user
 
             # Vérifier que l'utilisateur peut valider ce justificatif
-            if not justificatif.peut_etre_valide_par(user):
+            if not justificatif.peut_etre_valide_par(user, contexte_permissions(request)):
                 return Response(
                     {'error': _('Vous n\'êtes pas autorisé à valider ce justificatif.')},
                     status=status.HTTP_403_FORBIDDEN
@@ -288,32 +334,42 @@ class ValidateJustificatifView(APIView):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def mission_stats(request):
-    """Vue pour obtenir les statistiques des missions."""
-    user = request.user
+    """
+    Vue pour obtenir les statistiques des missions.
+
+    Paramètres : group_by (entite, type, createur, mois), date_debut, date_fin.
+    """
+    contexte = contexte_permissions(request)
 
     # Filtrer les missions selon les permissions
-    if user.role == 'ADMIN' or user.role == 'DG':
-        missions = Mission.objects.all()
-    elif user.role == 'CHEF_AGENCE':
-        subordinates = user.get_subordinates()
-        subordinate_ids = [sub.id for sub in subordinates]
-        missions = Mission.objects.filter(
-            models.Q(createur=user) |
-            models.Q(createur__in=subordinate_ids)
+    missions = Mission.objects.visible_to(request.user, contexte)
+
+    group_by = [dimension for dimension in request.query_params.get('group_by', '').split(',') if dimension]
+    inconnues = set(group_by) - set(StatistiquesService.DIMENSIONS)
+    if inconnues:
+        return Response(
+            {'error': _('Dimensions de regroupement invalides: %s') % ', '.join(sorted(inconnues))},
+            status=status.HTTP_400_BAD_REQUEST
         )
-    else:
-        missions = Mission.objects.filter(createur=user)
-
-    stats = {
-        'total': missions.count(),
-        'en_attente': missions.filter(statut='EN_ATTENTE').count(),
-        'validees': missions.filter(statut='VALIDEE').count(),
-        'en_cours': missions.filter(statut='EN_COURS').count(),
-        'cloturees': missions.filter(statut='CLOTUREE').count(),
-        'rejetees': missions.filter(statut='REJETEE').count(),
-        'budget_total': sum(m.budget_prevu for m in missions),
-    }
 
+    bornes = {}
+    for param in ('date_debut', 'date_fin'):
+        valeur = request.query_params.get(param)
+        try:
+            bornes[param] = parse_date(valeur) if valeur else None
+        except ValueError:
+            bornes[param] = None
+        if valeur and bornes[param] is None:
+            return Response(
+                {'error': _('Date invalide pour %s (format AAAA-MM-JJ).') % param},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    if contexte.voit_tout and set(group_by) <= set(StatistiquesService.DIMENSIONS_AGREGEES):
+        # Périmètre complet : lecture de la table d'agrégats matérialisée
+        stats = StatistiquesService.compute_from_rollup(group_by, **bornes)
+    else:
+        stats = StatistiquesService.compute(missions, group_by, **bornes)
     return Response(stats)
 
 
@@ -412,11 +468,13 @@ class ValidationDecideView(APIView):
             )
 
 
-class ValidationListView(generics.ListAPIView):
+class ValidationListView(PrefetchPlanMixin, generics.ListAPIView):
     """Vue pour lister les validations."""
 
     serializer_class = ValidationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Ordre du mode curseur (?curseur=), sans COUNT
+    keyset_ordering = ORDRE_CHRONOLOGIQUE
 
     def get_queryset(self):
         user = self.request.user
@@ -424,7 +482,7 @@ class ValidationListView(generics.ListAPIView):
         # Filtrer selon le statut demandé
         statut_filter = self.request.query_params.get('statut', 'EN_ATTENTE')
 
-        if user.role == 'ADMIN' or user.role == 'DG':
+        if contexte_permissions(self.request).voit_tout:
             # Admins et DG voient toutes les validations
             return Validation.objects.filter(statut=statut_filter)
         else:
@@ -517,6 +575,120 @@ class MissionDeclareReturnView(APIView):
             )
 
 
+class OrdreMissionPDFView(APIView):
+    """
+    Téléchargement de l'ordre de mission généré par le worker PDF.
+
+    Le fichier porte un ETag (empreinte SHA-256 du contenu) : un client qui
+    renvoie If-None-Match reçoit 304 tant que le document n'a pas changé.
+    Tant qu'aucune version n'est prête, la réponse est 202 avec le statut.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        mission = Mission.objects.visible_to(request.user, contexte_permissions(request)).filter(pk=pk).first()
+        if mission is None:
+            return Response({'error': 'Mission non trouvée'}, status=status.HTTP_404_NOT_FOUND)
+
+        document = DocumentPDF.objects.filter(mission=mission, type='ORDRE_MISSION').first()
+        if document is None:
+            return Response(
+                {'error': 'Aucun ordre de mission pour cette mission'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if not document.fichier:
+            if document.statut == 'ECHEC':
+                return Response(
+                    {'error': 'La génération de l\'ordre de mission a échoué', 'statut': document.statut},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            return Response({'statut': document.statut}, status=status.HTTP_202_ACCEPTED)
+
+        # La dernière version prête est servie, même si une nouvelle est en file
+        etag = f'"{document.empreinte}"'
+        etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if '*' in etags or etag in [e.removeprefix('W/') for e in etags]:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                document.fichier.open('rb'),
+                content_type='application/pdf',
+                as_attachment=True,
+                filename=f"ordre_mission_{mission.reference}.pdf"
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class OrdresMissionExportView(APIView):
+    """
+    Export groupé des ordres de mission, en ZIP (un PDF par mission) ou en
+    PDF unique, envoyé en flux.
+
+    Paramètres : mois (AAAA-MM), entite (id, sous-entités comprises),
+    sortie (zip ou pdf, zip par défaut).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    ROLES = (UserRole.COMPTABLE, UserRole.RH, UserRole.DIRECTEUR_FINANCES, UserRole.DG, UserRole.ADMIN)
+
+    def get(self, request):
+        if contexte_permissions(request).role not in self.ROLES:
+            return Response(
+                {'error': _('Vous n\'êtes pas autorisé à exporter les ordres de mission.')},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        sortie = request.query_params.get('sortie', 'zip')
+        if sortie not in ('zip', 'pdf'):
+            return Response(
+                {'error': _('Sortie invalide. Utilisez "zip" ou "pdf".')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        mois = request.query_params.get('mois')
+        debut_mois = None
+        if mois:
+            try:
+                debut_mois = parse_date(f'{mois}-01')
+            except ValueError:
+                pass
+            if debut_mois is None:
+                return Response({'error': _('Mois invalide (format AAAA-MM).')}, status=status.HTTP_400_BAD_REQUEST)
+
+        entite = None
+        if request.query_params.get('entite'):
+            try:
+                entite_id = int(request.query_params['entite'])
+            except ValueError:
+                return Response({'error': _('Entité invalide.')}, status=status.HTTP_400_BAD_REQUEST)
+            entite = Entite.objects.filter(pk=entite_id).first()
+            if entite is None:
+                return Response({'error': _('Entité introuvable.')}, status=status.HTTP_404_NOT_FOUND)
+
+        missions = list(missions_a_exporter(mois=debut_mois, entite=entite)[:settings.EXPORT_PDF_MAX_MISSIONS + 1])
+        if not missions:
+            return Response({'error': _('Aucun ordre de mission à exporter.')}, status=status.HTTP_404_NOT_FOUND)
+        if len(missions) > settings.EXPORT_PDF_MAX_MISSIONS:
+            return Response(
+                {'error': _('Trop de missions (%d au plus) : précisez le mois ou l\'entité.')
+                 % settings.EXPORT_PDF_MAX_MISSIONS},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        export = ExportOrdresMission(missions)
+        nom = '_'.join(['ordres_mission'] + [partie for partie in (mois, entite and entite.code) if partie])
+        if sortie == 'zip':
+            response = StreamingHttpResponse(export.flux_zip(), content_type='application/zip')
+        else:
+            response = StreamingHttpResponse(export.flux_pdf(), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nom}.{sortie}"'
+        return response
+
+
 class MissionSubmitJustificatifsView(APIView):
     """Vue pour soumettre les justificatifs de mission"""
 
@@ -566,7 +738,7 @@ class JustificatifVerifyView(APIView):
             mission = Mission.objects.get(pk=pk)
 
             # Vérifier que l'utilisateur est RH
-            if request.user.role != 'RH':
+            if contexte_permissions(request).role != UserRole.RH:
                 return Response(
                     {'error': 'Seuls les utilisateurs RH peuvent vérifier les justificatifs'},
                     status=status.HTTP_403_FORBIDDEN
@@ -597,7 +769,7 @@ class JustificatifVerifyView(APIView):
             )
 
 
-class SignatureListView(generics.ListAPIView):
+class SignatureListView(PrefetchPlanMixin, generics.ListAPIView):
     """Vue pour lister les signatures en attente."""
 
     serializer_class = SignatureFinanciereSerializer
@@ -613,10 +785,12 @@ class SignatureListView(generics.ListAPIView):
         ).order_by('ordre')
 
 
-class AvanceListCreateView(generics.ListCreateAPIView):
+class AvanceListCreateView(PrefetchPlanMixin, generics.ListCreateAPIView):
     """Vue pour lister et créer des avances."""
 
     permission_classes = [permissions.IsAuthenticated]
+    # Ordre du mode curseur (?curseur=), sans COUNT
+    keyset_ordering = ORDRE_CHRONOLOGIQUE
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['mission', 'beneficiaire', 'statut']
 
@@ -629,7 +803,7 @@ class AvanceListCreateView(generics.ListCreateAPIView):
         user = self.request.user
 
         # Les comptables voient toutes les avances
-        if user.role == 'COMPTABLE':
+        if contexte_permissions(self.request).role == UserRole.COMPTABLE:
             return Avance.objects.all()
 
         # Les autres voient seulement leurs avances (en tant que bénéficiaire)
@@ -637,7 +811,7 @@ class AvanceListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         # Vérifier que l'utilisateur est comptable
-        if self.request.user.role != 'COMPTABLE':
+        if contexte_permissions(self.request).role != UserRole.COMPTABLE:
             raise serializers.ValidationError(
                 "Seuls les comptables peuvent créer des avances."
             )
@@ -655,7 +829,7 @@ class AvanceListCreateView(generics.ListCreateAPIView):
         )
 
 
-class AvanceDetailView(generics.RetrieveUpdateAPIView):
+class AvanceDetailView(PrefetchPlanMixin, generics.RetrieveUpdateAPIView):
     """Vue pour consulter et mettre à jour une avance."""
 
     serializer_class = AvanceSerializer
@@ -665,7 +839,7 @@ class AvanceDetailView(generics.RetrieveUpdateAPIView):
         user = self.request.user
 
         # Les comptables voient toutes les avances
-        if user.role == 'COMPTABLE':
+        if contexte_permissions(self.request).role == UserRole.COMPTABLE:
             return Avance.objects.all()
 
         # Les autres voient seulement leurs avances
@@ -673,7 +847,7 @@ class AvanceDetailView(generics.RetrieveUpdateAPIView):
 
     def perform_update(self, serializer):
         # Seuls les comptables peuvent mettre à jour les avances
-        if self.request.user.role != 'COMPTABLE':
+        if contexte_permissions(self.request).role != UserRole.COMPTABLE:
             raise serializers.ValidationError(
                 "Seuls les comptables peuvent modifier les avances."
             )
@@ -689,28 +863,197 @@ class AvanceDetailView(generics.RetrieveUpdateAPIView):
         serializer.save()
 
 
-class NotificationListView(generics.ListAPIView):
-    """Vue pour lister les notifications de l'utilisateur."""
+class NotificationListView(PrefetchPlanMixin, generics.ListAPIView):
+    """
+    Fil des notifications de l'utilisateur, paginé par curseur.
+
+    La consultation ne marque plus rien comme lu : voir NotificationLectureView.
+    """
 
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(
             destinataire=self.request.user
-        ).order_by('-date_creation')
+        )
 
-    def list(self, request, *args, **kwargs):
-        # Marquer toutes les notifications comme lues lors de la consultation
-        Notification.objects.filter(
-            destinataire=request.user,
-            lue=False
-        ).update(lue=True, date_lecture=timezone.now())
 
-        return super().list(request, *args, **kwargs)
+class NotificationLectureView(APIView):
+    """Marque comme lues des notifications (ids, ou tout jusqu'à un curseur du fil)."""
 
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = NotificationLectureSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        marquees = NotificationService.marquer_lues(
+            request.user,
+            ids=serializer.validated_data.get('ids'),
+            jusqu_a=serializer.validated_data.get('jusqu_a')
+        )
+        return Response({
+            'marquees': marquees,
+            'non_lues': CompteurNotifications.lire(request.user.pk),
+        })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def notifications_non_lues(request):
+    """Nombre de notifications non lues (badge), lu dans le compteur de l'utilisateur."""
+    return Response({'non_lues': CompteurNotifications.lire(request.user.pk)})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def references_statistiques(request):
+    """Succès et échecs du cache des références dans ce processus (administrateurs)."""
+    if contexte_permissions(request).role != UserRole.ADMIN:
+        return Response(
+            {'error': _('Réservé aux administrateurs.')},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(references.statistiques())
+
+
+async def _utilisateur_jwt(request):
+    """Utilisateur du jeton JWT de la requête, ou None (vues asynchrones hors DRF)."""
+    try:
+        resultat = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return resultat[0] if resultat else None
+
+
+async def _utilisateur_flux(request):
+    """
+    Utilisateur du flux SSE : jeton signé `?jeton=` (EventSource ne peut pas
+    envoyer d'en-tête Authorization), sinon jeton JWT de l'en-tête.
+    """
+    jeton = request.GET.get('jeton')
+    if not jeton:
+        return await _utilisateur_jwt(request)
+    try:
+        user_id = signing.loads(jeton, salt=SEL_JETON_FLUX, max_age=settings.NOTIFICATIONS_FLUX_JETON_TTL)
+    except signing.BadSignature:
+        return None
+    return await User.objects.filter(pk=user_id, is_active=True).afirst()
+
+
+def _non_authentifie():
+    return JsonResponse({'detail': "Informations d'authentification non fournies ou invalides."}, status=401)
+
+
+def _version(valeur):
+    try:
+        return max(0, int(valeur))
+    except (TypeError, ValueError):
+        return None
+
+
+@require_GET
+async def notifications_attente(request):
+    """
+    Long-poll : renvoie les notifications d'id supérieur à `depuis` dès qu'il
+    y en a, ou une liste vide après `delai` secondes. Sans `depuis`, renvoie
+    immédiatement la version courante. Réponse : {'version', 'results'}.
+    """
+    user = await _utilisateur_jwt(request)
+    if user is None:
+        return _non_authentifie()
+
+    depuis = _version(request.GET.get('depuis'))
+    if depuis is None:
+        version = await sync_to_async(centre.version)(user.pk)
+        return JsonResponse({'version': version, 'results': []})
+
+    try:
+        delai = min(max(float(request.GET.get('delai', DELAI_ATTENTE)), 0), DELAI_ATTENTE_MAX)
+    except ValueError:
+        delai = DELAI_ATTENTE
+    notifications = await centre.attendre(user.pk, depuis, delai)
+    return JsonResponse({
+        'version': notifications[-1].id if notifications else depuis,
+        'results': NotificationSerializer(notifications, many=True).data,
+    })
+
+
+class NotificationFluxJetonView(APIView):
+    """
+    Jeton d'accès au flux SSE, valable NOTIFICATIONS_FLUX_JETON_TTL secondes.
+
+    Le client (EventSource) ouvre `notifications/flux/?jeton=<jeton>` ; le
+    jeton n'est vérifié qu'à l'ouverture. Si la connexion est refusée ou
+    perdue après son expiration, il en demande un nouveau et rouvre le flux
+    avec `&depuis=<dernier id reçu>`.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'jeton': signing.dumps(request.user.pk, salt=SEL_JETON_FLUX),
+            'expire_dans': settings.NOTIFICATIONS_FLUX_JETON_TTL,
+        })
+
+
+@require_GET
+async def notifications_flux(request):
+    """
+    Flux SSE (text/event-stream) des nouvelles notifications : un événement
+    `notification` par ligne, d'id = id de la notification (reprise via
+    l'en-tête Last-Event-ID), et un commentaire de maintien toutes les
+    DELAI_ATTENTE secondes. Authentification par `?jeton=` (voir
+    NotificationFluxJetonView) ou par l'en-tête Authorization.
+
+    Réservé à un serveur ASGI : sous WSGI, le flux occuperait un worker
+    sans fin (501).
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': _('Flux disponible uniquement via un serveur ASGI ; utiliser notifications/attente/.')},
+            status=501
+        )
+
+    user = await _utilisateur_flux(request)
+    if user is None:
+        return _non_authentifie()
 
-class SignatureListView(generics.ListAPIView):
+    depuis = _version(request.headers.get('Last-Event-ID') or request.GET.get('depuis'))
+    if depuis is None:
+        depuis = await sync_to_async(centre.version)(user.pk)
+
+    async def evenements(depuis):
+        evenement = centre.abonner(user.pk)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                # Effacé avant la lecture : un réveil pendant la lecture n'est pas perdu
+                evenement.clear()
+                notifications = await sync_to_async(centre.notifications)(user.pk, depuis)
+                for notification in notifications:
+                    donnees = json.dumps(NotificationSerializer(notification).data)
+                    yield f'id: {notification.id}\nevent: notification\ndata: {donnees}\n\n'
+                    depuis = notification.id
+                if notifications:
+                    continue
+                try:
+                    await asyncio.wait_for(evenement.wait(), DELAI_ATTENTE)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+        finally:
+            centre.desabonner(user.pk, evenement)
+
+    response = StreamingHttpResponse(evenements(depuis), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class SignatureListView(PrefetchPlanMixin, generics.ListAPIView):
     """Vue pour lister les signatures en attente."""
 
     serializer_class = SignatureFinanciereSerializer
@@ -726,10 +1069,12 @@ class SignatureListView(generics.ListAPIView):
         ).order_by('ordre')
 
 
-class AvanceListCreateView(generics.ListCreateAPIView):
+class AvanceListCreateView(PrefetchPlanMixin, generics.ListCreateAPIView):
     """Vue pour lister et créer des avances."""
 
     permission_classes = [permissions.IsAuthenticated]
+    # Ordre du mode curseur (?curseur=), sans COUNT
+    keyset_ordering = ORDRE_CHRONOLOGIQUE
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['mission', 'beneficiaire', 'statut']
 
@@ -742,7 +1087,7 @@ class AvanceListCreateView(generics.ListCreateAPIView):
         user = self.request.user
 
         # Les comptables voient toutes les avances
-        if user.role == 'COMPTABLE':
+        if contexte_permissions(self.request).role == UserRole.COMPTABLE:
             return Avance.objects.all()
 
         # Les autres voient seulement leurs avances (en tant que bénéficiaire)
@@ -750,7 +1095,7 @@ class AvanceListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         # Vérifier que l'utilisateur est comptable
-        if self.request.user.role != 'COMPTABLE':
+        if contexte_permissions(self.request).role != UserRole.COMPTABLE:
             raise serializers.ValidationError(
                 "Seuls les comptables peuvent créer des avances."
             )
@@ -768,7 +1113,7 @@ class AvanceListCreateView(generics.ListCreateAPIView):
         )
 
 
-class AvanceDetailView(generics.RetrieveUpdateAPIView):
+class AvanceDetailView(PrefetchPlanMixin, generics.RetrieveUpdateAPIView):
     """Vue pour consulter et mettre à jour une avance."""
 
     serializer_class = AvanceSerializer
@@ -778,7 +1123,7 @@ class AvanceDetailView(generics.RetrieveUpdateAPIView):
         user = self.request.user
 
         # Les comptables voient toutes les avances
-        if user.role == 'COMPTABLE':
+        if contexte_permissions(self.request).role == UserRole.COMPTABLE:
             return Avance.objects.all()
 
         # Les autres voient seulement leurs avances
@@ -786,7 +1131,7 @@ class AvanceDetailView(generics.RetrieveUpdateAPIView):
 
     def perform_update(self, serializer):
         # Seuls les comptables peuvent mettre à jour les avances
-        if self.request.user.role != 'COMPTABLE':
+        if contexte_permissions(self.request).role != UserRole.COMPTABLE:
             raise serializers.ValidationError(
                 "Seuls les comptables peuvent modifier les avances."
             )
@@ -802,22 +1147,18 @@ class AvanceDetailView(generics.RetrieveUpdateAPIView):
         serializer.save()
 
 
-class NotificationListView(generics.ListAPIView):
-    """Vue pour lister les notifications de l'utilisateur."""
+class NotificationListView(PrefetchPlanMixin, generics.ListAPIView):
+    """
+    Fil des notifications de l'utilisateur, paginé par curseur.
+
+    La consultation ne marque plus rien comme lu : voir NotificationLectureView.
+    """
 
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(
             destinataire=self.request.user
-        ).order_by('-date_creation')
-
-    def list(self, request, *args, **kwargs):
-        # Marquer toutes les notifications comme lues lors de la consultation
-        Notification.objects.filter(
-            destinataire=request.user,
-            lue=False
-        ).update(lue=True, date_lecture=timezone.now())
-
-        return super().list(request, *args, **kwargs)
+        )
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.db.models import ForeignKey, Lookup
+
+
+class InSubtree(Lookup):
+    """
+    Filtre `<fk_entite>__in_subtree=<entite>` : l'entité donnée ou l'une de
+    ses descendantes, résolu par une sous-requête sur la table de fermeture.
+    """
+
+    lookup_name = 'in_subtree'
+
+    def get_prep_lookup(self):
+        return getattr(self.rhs, 'pk', self.rhs)
+
+    def as_sql(self, compiler, connection):
+        from .models import EntiteClosure
+
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        qn = connection.ops.quote_name
+        subquery = (
+            f"SELECT {qn('descendant_id')} FROM {qn(EntiteClosure._meta.db_table)} "
+            f"WHERE {qn('ancestor_id')} = {rhs}"
+        )
+        return f"{lhs} IN ({subquery})", lhs_params + rhs_params
+
+
+def register_subtree_lookups():
+    """Enregistre `in_subtree` sur toutes les clés étrangères vers Entite."""
+    Entite = apps.get_model('users', 'Entite')
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, ForeignKey) and field.related_model is Entite:
+                field.register_lookup(InSubtree)
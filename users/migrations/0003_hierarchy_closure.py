@@ -0,0 +1,67 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_closure(apps, model_name, closure_name, parent_field):
+    """Construit la fermeture transitive à partir des liens parent existants."""
+    Model = apps.get_model('users', model_name)
+    Closure = apps.get_model('users', closure_name)
+    parents = dict(Model.objects.values_list('id', parent_field))
+
+    rows = []
+    for node_id in parents:
+        ancestor_id, depth, seen = node_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            rows.append(Closure(ancestor_id=ancestor_id, descendant_id=node_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    Closure.objects.bulk_create(rows, batch_size=1000)
+
+
+def backfill_closures(apps, schema_editor):
+    build_closure(apps, 'User', 'UserClosure', 'manager_id')
+    build_closure(apps, 'Entite', 'EntiteClosure', 'parent_id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_agence_user_direction_user_service'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntiteClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0, help_text="Distance entre l'ancêtre et le descendant", verbose_name='Profondeur')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='users.entite', verbose_name='Ancêtre')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='users.entite', verbose_name='Descendant')),
+            ],
+            options={
+                'verbose_name': 'Lien hiérarchique entité',
+                'verbose_name_plural': 'Liens hiérarchiques entités',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='users_eclos_desc_anc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0, help_text="Distance entre l'ancêtre et le descendant", verbose_name='Profondeur')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to=settings.AUTH_USER_MODEL, verbose_name='Ancêtre')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to=settings.AUTH_USER_MODEL, verbose_name='Descendant')),
+            ],
+            options={
+                'verbose_name': 'Lien hiérarchique utilisateur',
+                'verbose_name_plural': 'Liens hiérarchiques utilisateurs',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='users_uclos_desc_anc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(backfill_closures, migrations.RunPython.noop),
+    ]
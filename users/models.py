@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+from .models_hierarchy import UserClosure, EntiteClosure
+
 
 class UserRole(models.TextChoices):
     AGENT = 'AGENT', _('Agent')
@@ -15,6 +17,28 @@ class UserRole(models.TextChoices):
     CHAUFFEUR = 'CHAUFFEUR', _('Chauffeur')
 
 
+# Niveau hiérarchique de chaque rôle (has_role_or_higher)
+ROLE_HIERARCHY = {
+    UserRole.AGENT: 1,
+    UserRole.CHEF_AGENCE: 2,
+    UserRole.RESPONSABLE_COPEC: 3,
+    UserRole.RH: 2,
+    UserRole.COMPTABLE: 2,
+    UserRole.DIRECTEUR_FINANCES: 2,
+    UserRole.DG: 4,
+    UserRole.ADMIN: 5,
+    UserRole.CHAUFFEUR: 1,
+}
+
+# Rôles habilités à valider (User.can_validate)
+VALIDATOR_ROLES = frozenset({
+    UserRole.CHEF_AGENCE,
+    UserRole.RESPONSABLE_COPEC,
+    UserRole.DG,
+    UserRole.RH,
+})
+
+
 class UserManager(BaseUserManager):
     """Custom manager for User model."""
 
@@ -151,12 +175,7 @@ class User(AbstractUser):
     @property
     def can_validate(self):
         """Check if user can validate missions."""
-        return self.role in [
-            UserRole.CHEF_AGENCE,
-            UserRole.RESPONSABLE_COPEC,
-            UserRole.DG,
-            UserRole.RH
-        ]
+        return self.role in VALIDATOR_ROLES
 
     @property
     def can_create_missions(self):
@@ -167,22 +186,34 @@ class User(AbstractUser):
         """Get all direct subordinates."""
         return User.objects.filter(manager=self)
 
+    def get_all_subordinates(self):
+        """Get direct and indirect subordinates through the closure table."""
+        return User.objects.filter(
+            ancestor_links__ancestor=self,
+            ancestor_links__depth__gt=0
+        )
+
     def has_role_or_higher(self, required_roles):
         """Check if user has one of the required roles or higher."""
-        role_hierarchy = {
-            UserRole.AGENT: 1,
-            UserRole.CHEF_AGENCE: 2,
-            UserRole.RESPONSABLE_COPEC: 3,
-            UserRole.RH: 2,
-            UserRole.COMPTABLE: 2,
-            UserRole.DIRECTEUR_FINANCES: 2,
-            UserRole.DG: 4,
-            UserRole.ADMIN: 5,
-            UserRole.CHAUFFEUR: 1,
-        }
-
-        user_level = role_hierarchy.get(self.role, 0)
-        return any(role_hierarchy.get(role, 0) <= user_level for role in required_roles)
+        user_level = ROLE_HIERARCHY.get(self.role, 0)
+        return any(ROLE_HIERARCHY.get(role, 0) <= user_level for role in required_roles)
+
+
+class EntiteQuerySet(models.QuerySet):
+    """QuerySet des entités avec accès aux sous-arbres."""
+
+    def subtree(self, racine, include_self=True, with_depth=False):
+        """
+        Toutes les entités descendantes de `racine` en une seule requête,
+        via la table de fermeture. `with_depth` annote `profondeur`.
+        """
+        lookups = {'ancestor_links__ancestor': racine}
+        if not include_self:
+            lookups['ancestor_links__depth__gt'] = 0
+        queryset = self.filter(**lookups)
+        if with_depth:
+            queryset = queryset.annotate(profondeur=models.F('ancestor_links__depth'))
+        return queryset
 
 
 class Entite(models.Model):
@@ -230,6 +261,8 @@ class Entite(models.Model):
         auto_now_add=True
     )
 
+    objects = EntiteQuerySet.as_manager()
+
     class Meta:
         app_label = 'users'
         verbose_name = _('Entité')
@@ -240,7 +273,5 @@ class Entite(models.Model):
         return f"{self.nom} ({self.code})"
 
     def get_enfants(self):
-        """Récupère tous les enfants directs et indirects."""
-        enfants = list(self.enfants.all())
-        for enfant in list(enfants):
-            enfants.extend(enfant.get_enfants())
+        """Récupère tous les enfants directs et indirects (une seule requête)."""
+        return Entite.objects.subtree(self, include_self=False)
@@ -0,0 +1,122 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ClosureTable(models.Model):
+    """
+    Table de fermeture transitive (ancêtre, descendant, profondeur).
+
+    Chaque noeud possède une ligne vers lui-même (profondeur 0) et une ligne
+    vers chacun de ses ancêtres. Les sous-classes définissent les clés
+    étrangères `ancestor` et `descendant`.
+    """
+
+    depth = models.PositiveIntegerField(
+        _('Profondeur'),
+        default=0,
+        help_text=_('Distance entre l\'ancêtre et le descendant')
+    )
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def insert_node(cls, node_id, parent_id=None):
+        """Ajoute un nouveau noeud sous `parent_id`."""
+        rows = [cls(ancestor_id=node_id, descendant_id=node_id, depth=0)]
+        if parent_id:
+            ancestors = cls.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+            rows.extend(
+                cls(ancestor_id=ancestor_id, descendant_id=node_id, depth=depth + 1)
+                for ancestor_id, depth in ancestors
+            )
+        cls.objects.bulk_create(rows, ignore_conflicts=True)
+
+    @classmethod
+    def move_node(cls, node_id, parent_id=None):
+        """Déplace le sous-arbre de `node_id` sous `parent_id` (None = racine)."""
+        subtree = list(cls.objects.filter(ancestor_id=node_id).values_list('descendant_id', 'depth'))
+        if not subtree:
+            cls.insert_node(node_id, parent_id)
+            return
+
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        if parent_id in subtree_ids:
+            raise ValueError('Un noeud ne peut pas être rattaché à l\'un de ses descendants')
+
+        # Détacher le sous-arbre de ses anciens ancêtres
+        cls.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+        if parent_id:
+            ancestors = list(cls.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+            cls.objects.bulk_create([
+                cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=a_depth + d_depth + 1)
+                for ancestor_id, a_depth in ancestors
+                for descendant_id, d_depth in subtree
+            ])
+
+    @classmethod
+    def detach_node(cls, node_id):
+        """Détache le sous-arbre de `node_id` avant la suppression du noeud."""
+        subtree_ids = list(cls.objects.filter(ancestor_id=node_id).values_list('descendant_id', flat=True))
+        cls.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+
+class UserClosure(ClosureTable):
+    """Fermeture transitive de la hiérarchie `User.manager`."""
+
+    ancestor = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name=_('Ancêtre')
+    )
+
+    descendant = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name=_('Descendant')
+    )
+
+    class Meta:
+        app_label = 'users'
+        verbose_name = _('Lien hiérarchique utilisateur')
+        verbose_name_plural = _('Liens hiérarchiques utilisateurs')
+        unique_together = ['ancestor', 'descendant']
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='users_uclos_desc_anc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class EntiteClosure(ClosureTable):
+    """Fermeture transitive de l'arbre `Entite.parent`."""
+
+    ancestor = models.ForeignKey(
+        'Entite',
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name=_('Ancêtre')
+    )
+
+    descendant = models.ForeignKey(
+        'Entite',
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name=_('Descendant')
+    )
+
+    class Meta:
+        app_label = 'users'
+        verbose_name = _('Lien hiérarchique entité')
+        verbose_name_plural = _('Liens hiérarchiques entités')
+        unique_together = ['ancestor', 'descendant']
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='users_eclos_desc_anc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
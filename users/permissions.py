@@ -0,0 +1,65 @@
+"""
+Contexte de permissions de l'utilisateur courant
+
+Rôle, capacités de validation et subordonnés directs sont calculés au
+plus une fois par requête, au premier usage, puis consultés par les vues
+(get_queryset) et les sérialiseurs (validations par ligne) sans nouvelle
+requête SQL. Le périmètre hiérarchique des missions reste une sous-requête
+sur les tables de fermeture (MissionQuerySet.visible_to).
+"""
+from django.utils.functional import cached_property
+
+from .models import VALIDATOR_ROLES, User, UserRole
+
+
+class ContextePermissions:
+    """Droits d'un utilisateur, chargés à la demande et mémorisés."""
+
+    def __init__(self, user):
+        self.user = user
+        self.role = getattr(user, 'role', None)
+
+    @cached_property
+    def voit_tout(self):
+        """Admins et DG voient toutes les données."""
+        return self.role in (UserRole.ADMIN, UserRole.DG)
+
+    @cached_property
+    def peut_valider(self):
+        return self.role in VALIDATOR_ROLES
+
+    @cached_property
+    def subordonnes_directs(self):
+        """Ids des subordonnés directs (une requête)."""
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(User.objects.filter(manager_id=self.user.pk).values_list('id', flat=True))
+
+    @cached_property
+    def equipe(self):
+        """L'utilisateur et ses subordonnés directs."""
+        return self.subordonnes_directs | {self.user.pk}
+
+    def peut_valider_justificatif(self, justificatif):
+        """Équivalent de Justificatif.peut_etre_valide_par, sans requête par ligne."""
+        if not self.peut_valider:
+            return False
+        # Les chefs d'agence valident les justificatifs de leurs subordonnés directs
+        if self.role == UserRole.CHEF_AGENCE:
+            return justificatif.intervenant_id in self.subordonnes_directs
+        return self.role in (UserRole.RESPONSABLE_COPEC, UserRole.DG, UserRole.RH, UserRole.COMPTABLE)
+
+
+def contexte_permissions(request):
+    """
+    Contexte de permissions de `request.user`, construit au premier appel
+    et conservé sur la requête HTTP sous-jacente (partagé par la vue et
+    ses sérialiseurs).
+    """
+    user = request.user
+    http_request = getattr(request, '_request', request)
+    contexte = getattr(http_request, '_contexte_permissions', None)
+    if contexte is None or contexte.user is not user:
+        contexte = ContextePermissions(user)
+        http_request._contexte_permissions = contexte
+    return contexte
@@ -0,0 +1,56 @@
+"""
+Maintenance incrémentale des tables de fermeture hiérarchiques
+"""
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import User, Entite, UserClosure, EntiteClosure
+
+# (modèle, champ parent, table de fermeture)
+HIERARCHIES = {
+    User: ('manager', UserClosure),
+    Entite: ('parent', EntiteClosure),
+}
+
+
+def _remember_parent(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mémorise le parent actuel en base avant la sauvegarde."""
+    parent_field, closure = HIERARCHIES[sender]
+    instance._closure_parent_changed = False
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and parent_field not in update_fields:
+        return
+
+    parent_id = getattr(instance, f'{parent_field}_id')
+    old_parent_id = sender.objects.filter(pk=instance.pk).values_list(f'{parent_field}_id', flat=True).first()
+    if old_parent_id == parent_id:
+        return
+    if parent_id and closure.objects.filter(ancestor_id=instance.pk, descendant_id=parent_id).exists():
+        raise ValueError('Un noeud ne peut pas être rattaché à l\'un de ses descendants')
+    instance._closure_parent_changed = True
+
+
+def _update_closure(sender, instance, created, raw=False, **kwargs):
+    """Répercute la création ou le déplacement d'un noeud dans la fermeture."""
+    if raw:
+        return
+    parent_field, closure = HIERARCHIES[sender]
+    parent_id = getattr(instance, f'{parent_field}_id')
+    if created:
+        closure.insert_node(instance.pk, parent_id)
+    elif getattr(instance, '_closure_parent_changed', False):
+        closure.move_node(instance.pk, parent_id)
+        instance._closure_parent_changed = False
+
+
+def _detach_closure(sender, instance, **kwargs):
+    """Détache le sous-arbre du noeud supprimé de ses anciens ancêtres."""
+    _, closure = HIERARCHIES[sender]
+    closure.detach_node(instance.pk)
+
+
+for model in HIERARCHIES:
+    receiver(pre_save, sender=model)(_remember_parent)
+    receiver(post_save, sender=model)(_update_closure)
+    receiver(pre_delete, sender=model)(_detach_closure)
@@ -0,0 +1,148 @@
+"""
+Tests de l'application users
+"""
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from .models import ROLE_HIERARCHY, User, UserRole, Entite, UserClosure, EntiteClosure
+from .permissions import ContextePermissions, contexte_permissions
+from missions.models import Mission
+
+
+class HierarchieRolesTests(TestCase):
+    """User.has_role_or_higher suit ROLE_HIERARCHY."""
+
+    def test_chaque_role(self):
+        for role in UserRole:
+            user = User(role=role)
+            for requis in UserRole:
+                with self.subTest(role=role, requis=requis):
+                    attendu = ROLE_HIERARCHY[requis] <= ROLE_HIERARCHY[role]
+                    self.assertEqual(user.has_role_or_higher([requis]), attendu)
+
+    def test_role_inconnu(self):
+        self.assertFalse(User(role='INCONNU').has_role_or_higher([UserRole.AGENT]))
+        self.assertTrue(User(role=UserRole.AGENT).has_role_or_higher(['INCONNU']))
+
+
+class ContextePermissionsTests(TestCase):
+    """Subordonnés directs lus une fois par contexte, partagé par la requête."""
+
+    def setUp(self):
+        self.dg = User.objects.create_user('dg', 'dg@test.local', 'pw', role=UserRole.DG)
+        self.chef = User.objects.create_user('chef', 'chef@test.local', 'pw', role=UserRole.CHEF_AGENCE, manager=self.dg)
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role=UserRole.AGENT, manager=self.chef)
+
+    def test_subordonnes_directs(self):
+        contexte = ContextePermissions(self.dg)
+        with self.assertNumQueries(1):
+            self.assertEqual(contexte.subordonnes_directs, {self.chef.pk})
+            self.assertEqual(contexte.equipe, {self.dg.pk, self.chef.pk})
+        with self.assertNumQueries(0):
+            contexte.subordonnes_directs
+
+    def test_deplacement_suivi(self):
+        self.agent.manager = self.dg
+        self.agent.save()
+        self.assertEqual(ContextePermissions(self.chef).subordonnes_directs, frozenset())
+        self.assertEqual(ContextePermissions(self.dg).subordonnes_directs, {self.chef.pk, self.agent.pk})
+
+    def test_contexte_par_requete(self):
+        requete = APIRequestFactory().get('/')
+        requete.user = self.chef
+        contexte = contexte_permissions(requete)
+        self.assertIs(contexte_permissions(requete), contexte)
+        requete.user = self.agent
+        self.assertIsNot(contexte_permissions(requete), contexte)
+
+
+def liens(closure):
+    return {(lien.ancestor_id, lien.descendant_id, lien.depth) for lien in closure.objects.all()}
+
+
+def subordonnes_recursifs(user):
+    """Ancien parcours récursif de la hiérarchie (get_subordinates)."""
+    trouves = set()
+    for subordonne in user.get_subordinates():
+        trouves |= {subordonne.pk} | subordonnes_recursifs(subordonne)
+    return trouves
+
+
+class FermetureTests(TestCase):
+    """Tables de fermeture tenues à jour par les signaux (users.signals)."""
+
+    def setUp(self):
+        self.dg = User.objects.create_user('dg', 'dg@test.local', 'pw', role=UserRole.DG)
+        self.chef = User.objects.create_user('chef', 'chef@test.local', 'pw', role=UserRole.CHEF_AGENCE, manager=self.dg)
+        self.agent = User.objects.create_user('agent', 'agent@test.local', 'pw', role=UserRole.AGENT, manager=self.chef)
+        self.autre = User.objects.create_user('autre', 'autre@test.local', 'pw', role=UserRole.AGENT)
+
+    def test_insertion(self):
+        dg, chef, agent, autre = self.dg.pk, self.chef.pk, self.agent.pk, self.autre.pk
+        self.assertEqual(liens(UserClosure), {
+            (dg, dg, 0), (chef, chef, 0), (agent, agent, 0), (autre, autre, 0),
+            (dg, chef, 1), (chef, agent, 1), (dg, agent, 2),
+        })
+
+    def test_deplacement(self):
+        self.chef.manager = self.autre
+        self.chef.save()
+        dg, chef, agent, autre = self.dg.pk, self.chef.pk, self.agent.pk, self.autre.pk
+        self.assertEqual(liens(UserClosure), {
+            (dg, dg, 0), (chef, chef, 0), (agent, agent, 0), (autre, autre, 0),
+            (autre, chef, 1), (chef, agent, 1), (autre, agent, 2),
+        })
+
+    def test_suppression(self):
+        self.chef.delete()
+        self.agent.refresh_from_db()
+        self.assertIsNone(self.agent.manager_id)
+        dg, agent, autre = self.dg.pk, self.agent.pk, self.autre.pk
+        self.assertEqual(liens(UserClosure), {(dg, dg, 0), (agent, agent, 0), (autre, autre, 0)})
+
+    def test_cycle_refuse(self):
+        self.dg.manager = self.agent
+        with self.assertRaisesMessage(ValueError, 'descendants'):
+            self.dg.save()
+        with self.assertRaises(ValueError):
+            UserClosure.move_node(self.chef.pk, self.agent.pk)
+        self.assertEqual(len(liens(UserClosure)), 7)
+
+    def test_entites(self):
+        siege = Entite.objects.create(nom='Siège', code='SIEGE')
+        region = Entite.objects.create(nom='Région', code='REG', parent=siege)
+        agence = Entite.objects.create(nom='Agence', code='AG1', parent=region)
+        self.assertEqual(liens(EntiteClosure), {
+            (siege.pk, siege.pk, 0), (region.pk, region.pk, 0), (agence.pk, agence.pk, 0),
+            (siege.pk, region.pk, 1), (region.pk, agence.pk, 1), (siege.pk, agence.pk, 2),
+        })
+        agence.parent = siege
+        agence.save()
+        self.assertEqual(set(Entite.objects.subtree(region).values_list('pk', flat=True)), {region.pk})
+        self.assertIn((siege.pk, agence.pk, 1), liens(EntiteClosure))
+
+        region.parent = agence
+        region.save()
+        siege.parent = region
+        with self.assertRaises(ValueError):
+            siege.save()
+
+        agence.delete()
+        self.assertEqual(liens(EntiteClosure), {(siege.pk, siege.pk, 0)})
+
+    def test_visibilite_equivalente_au_parcours_recursif(self):
+        for user in (self.dg, self.chef, self.agent, self.autre):
+            Mission.objects.create(
+                titre=f'Mission {user.identifiant}', date_debut=date(2026, 1, 5), date_fin=date(2026, 1, 7),
+                lieu_mission='Lomé', createur=user
+            )
+        for user in (self.chef, self.agent, self.autre):
+            with self.subTest(user=user.identifiant):
+                createurs = subordonnes_recursifs(user) | {user.pk}
+                self.assertEqual(
+                    set(Mission.objects.visible_to(user)),
+                    set(Mission.objects.filter(createur__in=createurs))
+                )
+        self.assertEqual(Mission.objects.visible_to(self.dg).count(), 4)